@@ -0,0 +1,137 @@
+"""
+Endpoint benchmarks: query count, latency percentiles and peak memory of
+the list and dashboard endpoints, measured through the test client so the
+whole middleware/DRF stack is included.
+
+``run_benchmarks`` produces a JSON-serializable report and
+``compare_reports`` lists the regressions of a report against a stored
+baseline. Query counts are deterministic and compared exactly; latency and
+memory are compared with a relative tolerance.
+"""
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from events.agenda import reset_agenda
+from .cache import bump_company_version
+
+# name -> (path, query string); the query string is formatted with the anchor date
+ENDPOINTS = {
+    'events': ('/api/events/', {}),
+    'events_search': ('/api/events/', {'search': 'Silva'}),
+    'events_by_menu_value': ('/api/events/', {'ordering': '-menu_price_total'}),
+    'calendar_month': ('/api/events/calendar/', {'year': '{anchor.year}', 'month': '{anchor.month}'}),
+    'dashboard_stats': ('/api/dashboard/stats/', {}),
+    'dashboard_summary': ('/api/dashboard/summary/', {}),
+    'financial_dashboard': ('/api/financials/financial-dashboard/', {}),
+    'financial_summary': ('/api/financial-summary/', {}),
+    'transactions': ('/api/financials/transactions/', {}),
+    'quotes': ('/api/financials/quotes/', {}),
+    'notifications': ('/api/financials/notifications/', {}),
+    'clients': ('/api/clients/', {}),
+}
+
+# Metrics compared against the baseline, with whether they get the relative tolerance
+COMPARED_METRICS = {
+    'queries': False,
+    'p95_ms': True,
+    'peak_memory_kb': True,
+}
+
+
+def percentiles(timings):
+    """p50/p95/p99 of a list of timings (needs at least one)"""
+    if len(timings) == 1:
+        return dict.fromkeys(('p50_ms', 'p95_ms', 'p99_ms'), round(timings[0], 3))
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+    }
+
+
+def _request(client, path, params):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(path, params)
+        elapsed = (time.perf_counter() - started) * 1000
+    return response, elapsed, len(queries)
+
+
+def benchmark_endpoint(client, user, path, params, iterations, warm_cache=False):
+    """Measure one endpoint; every iteration is a cold cache unless ``warm_cache``"""
+    def prepare():
+        if not warm_cache:
+            bump_company_version(user.company_id)
+            reset_agenda(user.company_id)
+
+    # Untimed request so URL resolution, imports and lazy setup don't count
+    prepare()
+    response, _, _ = _request(client, path, params)
+
+    timings, query_counts = [], []
+    for _ in range(iterations):
+        prepare()
+        response, elapsed, query_count = _request(client, path, params)
+        timings.append(elapsed)
+        query_counts.append(query_count)
+
+    # Memory is traced in a separate request: tracing slows everything down
+    prepare()
+    tracemalloc.start()
+    try:
+        client.get(path, params)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'path': path,
+        'params': params,
+        'status': response.status_code,
+        'queries': max(query_counts),
+        **percentiles(timings),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'response_bytes': len(response.content),
+    }
+
+
+def run_benchmarks(user, iterations=20, anchor=None, endpoints=None, warm_cache=False):
+    """Benchmark every endpoint (or the named ones) as ``user``; returns {name: metrics}"""
+    client = APIClient()
+    client.force_authenticate(user)
+
+    results = {}
+    for name, (path, params) in ENDPOINTS.items():
+        if endpoints and name not in endpoints:
+            continue
+        params = {key: value.format(anchor=anchor) for key, value in params.items()}
+        results[name] = benchmark_endpoint(client, user, path, params, iterations, warm_cache)
+    return results
+
+
+def compare_reports(report, baseline, tolerance=0.25):
+    """
+    List (endpoint, metric, baseline value, current value) for every metric
+    that got worse than the baseline. Query counts must not grow at all;
+    latency and memory may grow by ``tolerance`` (relative).
+    """
+    regressions = []
+    for name, baseline_metrics in baseline.get('endpoints', {}).items():
+        metrics = report['endpoints'].get(name)
+        if metrics is None:
+            continue
+        for metric, relative in COMPARED_METRICS.items():
+            expected, current = baseline_metrics.get(metric), metrics.get(metric)
+            if expected is None or current is None:
+                continue
+            limit = expected * (1 + tolerance) if relative else expected
+            if current > limit:
+                regressions.append((name, metric, expected, current))
+    return regressions
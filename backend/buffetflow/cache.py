@@ -0,0 +1,196 @@
+"""
+Per-company response cache for the read-heavy dashboard endpoints.
+
+Cache keys embed a per-company version number. Any write to a model that
+feeds the dashboards bumps that version, so every cached response of the
+company is invalidated at once without having to know or delete its keys.
+
+The same version backs weak ETags (``conditional_per_company``): a client
+revalidating with If-None-Match gets a 304 without the view running at all
+as long as nothing in its company changed.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = 'tenant-cache'
+
+
+def _version_key(company_id):
+    return f'{KEY_PREFIX}:{company_id}:version'
+
+
+def _stats_key(name, outcome):
+    return f'{KEY_PREFIX}:stats:{name}:{outcome}'
+
+
+def _new_version():
+    # Time based, so a version that was evicted never restarts at an old value
+    return time.time_ns()
+
+
+def get_company_version(company_id):
+    version = cache.get(_version_key(company_id))
+    if version is None:
+        version = _new_version()
+        if not cache.add(_version_key(company_id), version, timeout=None):
+            version = cache.get(_version_key(company_id), version)
+    return version
+
+
+def bump_company_version(company_id):
+    if not company_id:
+        return
+    try:
+        cache.incr(_version_key(company_id))
+    except ValueError:
+        cache.set(_version_key(company_id), _new_version(), timeout=None)
+
+
+def reset_company_version(company_id):
+    cache.set(_version_key(company_id), _new_version(), timeout=None)
+
+
+def _count(name, outcome):
+    key = _stats_key(name, outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def cache_stats(names):
+    """Hit/miss counters of the given cached views"""
+    keys = [_stats_key(name, outcome) for name in names for outcome in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    return {
+        name: {
+            'hits': values.get(_stats_key(name, 'hits'), 0),
+            'misses': values.get(_stats_key(name, 'misses'), 0),
+        }
+        for name in names
+    }
+
+
+CACHED_VIEWS = []
+
+
+def cached_per_company(name, timeout=None):
+    """
+    Cache the data of successful responses of a view per company, query
+    string and current date (for data relative to "today"). Apply it below ``@api_view`` (or through ``method_decorator`` on
+    an APIView method) so it receives the DRF request.
+    """
+    CACHED_VIEWS.append(name)
+
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            company_id = getattr(request.user, 'company_id', None)
+            if not company_id:
+                return view_func(request, *args, **kwargs)
+
+            query = '&'.join(sorted(request.GET.urlencode().split('&')))
+            query_hash = hashlib.md5(query.encode()).hexdigest()
+            version = get_company_version(company_id)
+            key = f'{KEY_PREFIX}:{company_id}:v{version}:{timezone.localdate().isoformat()}:{name}:{query_hash}'
+
+            data = cache.get(key)
+            if data is not None:
+                _count(name, 'hits')
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _count(name, 'misses')
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout or settings.TENANT_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def company_etag(name, company_id, *parts):
+    """
+    Weak ETag that changes with the company version and the current date
+    (for data relative to "today"); ``parts`` tell apart variants of a view.
+    Compute it before reading the data: a concurrent write then makes the
+    tag stale (one extra refetch), never the data.
+    """
+    source = ':'.join([name, str(get_company_version(company_id)), timezone.localdate().isoformat(), *map(str, parts)])
+    return f'W/"{hashlib.md5(source.encode()).hexdigest()}"'
+
+
+def etag_matches(etag, if_none_match):
+    # Weak comparison (RFC 9110 13.1.2): opaque tags are compared without W/
+    candidates = parse_etags(if_none_match)
+    return '*' in candidates or any(candidate.removeprefix('W/') == etag.removeprefix('W/') for candidate in candidates)
+
+
+def set_revalidation_headers(response, etag):
+    response['ETag'] = etag
+    # Let clients keep the response but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_per_company(name):
+    """
+    Answer GET requests with a weak ETag (``company_etag`` of the user and
+    the query string), and with 304 Not Modified when If-None-Match still
+    matches, so unchanged data is neither queried nor serialized. Apply it
+    below ``@api_view`` and above ``cached_per_company``.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            company_id = getattr(request.user, 'company_id', None)
+            if request.method not in ('GET', 'HEAD') or not company_id:
+                return view_func(request, *args, **kwargs)
+
+            query = '&'.join(sorted(request.GET.urlencode().split('&')))
+            etag = company_etag(name, company_id, request.user.pk, query)
+
+            if etag_matches(etag, request.headers.get('If-None-Match', '')):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            set_revalidation_headers(response, etag)
+            patch_vary_headers(response, ('Authorization', 'Cookie'))
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_on_change(model, get_company_id):
+    """Bump the company version whenever an instance of ``model`` is saved or deleted"""
+    def handler(sender, instance, **kwargs):
+        bump_company_version(get_company_id(instance))
+
+    uid = f'{KEY_PREFIX}:{model._meta.label}'
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}:save')
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+def reset_version_on_create(company_model):
+    """Start newly created companies on a fresh version (ids may be reused, e.g. in tests)"""
+    def handler(sender, instance, created, **kwargs):
+        if created:
+            reset_company_version(instance.pk)
+
+    post_save.connect(handler, sender=company_model, weak=False, dispatch_uid=f'{KEY_PREFIX}:company-created')
@@ -0,0 +1,315 @@
+"""
+Streaming CSV/XLSX exports of events, clients and financial transactions.
+
+Rows are read with ``values_list(...).iterator()``, so no model instance is
+built and the database cursor is consumed in chunks; every chunk is encoded
+and handed to the response (or file) right away, keeping memory flat
+whatever the number of rows. XLSX files are written by hand as a ZIP of
+SpreadsheetML parts whose sheet is compressed while it is generated, the
+same way the proposal export streams its archive.
+
+Each dataset applies the same filters as its list endpoint, from a dict of
+query parameters, so the API and the ``export_data`` command agree.
+"""
+import csv
+import json
+import re
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+from clients.models import Client
+from events.filters import EventFilterError, filter_events
+from events.proposal_export import ZipStream
+from financials.filters import FinancialTransactionFilter
+from financials.models import FinancialTransaction
+from search.backends import matching_object_ids
+
+EXPORT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'xlsx')
+# Spreadsheet apps evaluate CSV text starting with these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportError(ValueError):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class ExportRenderer(BaseRenderer):
+    """Lets content negotiation pick the file format (``?format=`` or Accept); the body is streamed"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error responses get here
+        return json.dumps(data, ensure_ascii=False, default=str).encode(self.charset)
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+class XLSXRenderer(ExportRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+    charset = 'utf-8'
+
+
+EXPORT_RENDERERS = [CSVRenderer, XLSXRenderer]
+
+
+def _events(company, params):
+    try:
+        events = filter_events(company.events.all(), params, company.pk)
+    except EventFilterError as e:
+        raise ExportError({'error': str(e)})
+    return events.order_by('event_date', 'start_time', 'id')
+
+
+def _clients(company, params):
+    clients = Client.objects.filter(company=company)
+    search = params.get('search', '').strip()
+    if search:
+        clients = clients.filter(pk__in=matching_object_ids(company.pk, search, 'client'))
+    return clients.order_by('name', 'id')
+
+
+def _transactions(company, params):
+    filterset = FinancialTransactionFilter(params, queryset=FinancialTransaction.objects.filter(company=company))
+    if not filterset.is_valid():
+        raise ExportError(filterset.errors)
+    return filterset.qs.order_by('-transaction_date', '-id')
+
+
+# name -> (file name, queryset builder, [(header, values_list lookup)])
+DATASETS = {
+    'events': ('eventos', _events, [
+        ('id', 'id'),
+        ('titulo', 'title'),
+        ('tipo', 'event_type'),
+        ('status', 'status'),
+        ('data', 'event_date'),
+        ('inicio', 'start_time'),
+        ('fim', 'end_time'),
+        ('convidados', 'guest_count'),
+        ('local', 'venue_location'),
+        ('cliente_id', 'client_id'),
+        ('cliente', 'client_name'),
+        ('cliente_email', 'client_email'),
+        ('cliente_telefone', 'client_phone'),
+        ('custo_estimado', 'estimated_cost'),
+        ('preco_final', 'final_price'),
+        ('custo_cardapio', 'menu_cost_total'),
+        ('preco_cardapio', 'menu_price_total'),
+        ('criado_em', 'created_at'),
+    ]),
+    'clients': ('clientes', _clients, [
+        ('id', 'id'),
+        ('tipo', 'client_type'),
+        ('nome', 'name'),
+        ('nome_completo', 'full_name'),
+        ('cpf', 'cpf'),
+        ('rg', 'rg'),
+        ('nome_fantasia', 'fantasy_name'),
+        ('razao_social', 'corporate_name'),
+        ('cnpj', 'cnpj'),
+        ('inscricao_estadual', 'state_registration'),
+        ('email', 'email'),
+        ('telefone', 'phone'),
+        ('endereco', 'address'),
+        ('cep', 'zip_code'),
+        ('criado_em', 'created_at'),
+    ]),
+    'transactions': ('transacoes', _transactions, [
+        ('id', 'id'),
+        ('data', 'transaction_date'),
+        ('descricao', 'description'),
+        ('tipo', 'transaction_type'),
+        ('status', 'status'),
+        ('valor', 'amount'),
+        ('evento_id', 'related_event_id'),
+        ('evento', 'related_event__title'),
+        ('criado_em', 'created_at'),
+    ]),
+}
+
+
+def export_rows(dataset, company, params):
+    """(headers, row tuples) of a dataset for the company, filtered like its list endpoint"""
+    _, queryset, columns = DATASETS[dataset]
+    rows = queryset(company, params).values_list(*(lookup for _, lookup in columns))
+    return [header for header, _ in columns], rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, time):
+        return value.isoformat(timespec='seconds')
+    return str(value)
+
+
+def escape_formula(text):
+    """Quote text a spreadsheet would run as a formula; the importer removes the quote again"""
+    return "'" + text if text.startswith(FORMULA_PREFIXES) else text
+
+
+def unescape_formula(text):
+    return text[1:] if text.startswith("'") and text[1:].startswith(FORMULA_PREFIXES) else text
+
+
+def _csv_text(value):
+    # Only text fields: numbers (negative amounts) are written as they are
+    return escape_formula(value) if isinstance(value, str) else _text(value)
+
+
+class _Line:
+    """File-like object for csv.writer that returns the written line"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(headers, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Generate the CSV bytes, starting with a BOM so spreadsheet apps read it as UTF-8"""
+    writer = csv.writer(_Line())
+    chunk = ['\ufeff' + writer.writerow(headers)]
+    for row in rows:
+        chunk.append(writer.writerow([_csv_text(value) for value in row]))
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk).encode('utf-8')
+            chunk = []
+    yield ''.join(chunk).encode('utf-8')
+
+
+# Characters XML 1.0 doesn't allow, even escaped
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# Days are counted from 1899-12-30 in the 1900 date system
+_EXCEL_EPOCH = date(1899, 12, 30)
+# cellXfs index of the date style in XLSX_STYLES
+_DATE_STYLE = 1
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '</styleSheet>'
+)
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return f'<c s="{_DATE_STYLE}"><v>{(value - _EXCEL_EPOCH).days}</v></c>'
+    text = escape(_INVALID_XML.sub('', _text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+def xlsx_stream(headers, rows, sheet_name='Dados', chunk_size=EXPORT_CHUNK_SIZE):
+    """Generate the bytes of a single-sheet XLSX workbook with inline strings"""
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(name=escape(sheet_name)))
+        archive.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        archive.writestr('xl/styles.xml', XLSX_STYLES)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            chunk = [XLSX_SHEET_START, _xlsx_row(headers)]
+            for row in rows:
+                chunk.append(_xlsx_row(row))
+                if len(chunk) >= chunk_size:
+                    sheet.write(''.join(chunk).encode('utf-8'))
+                    chunk = []
+                    yield stream.drain()
+            chunk.append(XLSX_SHEET_END)
+            sheet.write(''.join(chunk).encode('utf-8'))
+    yield stream.drain()
+
+
+def export_stream(dataset, company, params, export_format):
+    """Bytes of the export in ``export_format`` (raises ExportError for invalid filters)"""
+    headers, rows = export_rows(dataset, company, params)
+    if export_format == 'xlsx':
+        return xlsx_stream(headers, rows, sheet_name=DATASETS[dataset][0].capitalize())
+    return csv_stream(headers, rows)
+
+
+def export_response(request, dataset):
+    """Streaming download of a dataset in the negotiated format, filtered by the query string"""
+    export_format = request.accepted_renderer.format
+    stream = export_stream(dataset, request.user.company, request.GET, export_format)
+    response = StreamingHttpResponse(stream, content_type=request.accepted_renderer.media_type)
+    filename = f'{DATASETS[dataset][0]}-{timezone.localdate():%Y-%m-%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
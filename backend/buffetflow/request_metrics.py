@@ -0,0 +1,262 @@
+"""
+Per-request SQL and timing instrumentation.
+
+``RequestMetricsMiddleware`` times every request in phases: database
+(through ``connection.execute_wrapper``, so it works with DEBUG off),
+view code, and response rendering, i.e. the JSON encoding of DRF
+responses. Each request produces:
+
+- a ``Server-Timing`` header, when REQUEST_METRICS_SERVER_TIMING is on or
+  the user is staff, so browser dev tools show the breakdown;
+- a structured (JSON) log line on the ``buffetflow.requests`` logger. Requests
+  slower than REQUEST_METRICS_SLOW_MS are logged as warnings with their
+  slowest SQL statements and kept as samples for the aggregate view.
+
+Per-endpoint aggregates are buffered in process memory and added to the
+shared cache with atomic ``incr`` at most every REQUEST_METRICS_FLUSH_SECONDS,
+so the cost per request is a few counter updates under a lock.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger('buffetflow.requests')
+
+KEY_PREFIX = 'request-metrics'
+# Upper bounds (ms) of the latency histogram used to estimate percentiles
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+COUNTER_FIELDS = ('count', 'total_us', 'db_us', 'render_us', 'queries', 'errors')
+SLOW_SQL_STATEMENTS = 3
+SLOW_SQL_MAX_LENGTH = 500
+SLOW_SAMPLES = 20
+UNRESOLVED = 'unresolved'
+
+
+def _counter_key(endpoint, field):
+    # Endpoints contain spaces and route converters, which aren't valid in every cache backend
+    return f'{KEY_PREFIX}:{hashlib.md5(endpoint.encode()).hexdigest()}:{field}'
+
+
+def _bucket_fields():
+    return [f'le_{bound}' for bound in LATENCY_BUCKETS_MS] + ['le_inf']
+
+
+def _bucket_field(total_ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if total_ms <= bound:
+            return f'le_{bound}'
+    return 'le_inf'
+
+
+class _Buffer:
+    """Counters of this process not yet added to the shared cache"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(lambda: defaultdict(int))
+        self.slow_samples = []
+        self.flushed_at = time.monotonic()
+
+    def add(self, endpoint, values, slow_sample=None):
+        with self.lock:
+            counters = self.counters[endpoint]
+            for field, value in values.items():
+                counters[field] += value
+            if slow_sample:
+                self.slow_samples.append(slow_sample)
+            due = time.monotonic() - self.flushed_at >= settings.REQUEST_METRICS_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counters, self.counters = self.counters, defaultdict(lambda: defaultdict(int))
+            slow_samples, self.slow_samples = self.slow_samples, []
+            self.flushed_at = time.monotonic()
+        if not counters and not slow_samples:
+            return
+
+        try:
+            endpoints = set(cache.get(f'{KEY_PREFIX}:endpoints', ()))
+            if not endpoints.issuperset(counters):
+                # Not atomic, but every flush re-adds this process's endpoints
+                cache.set(f'{KEY_PREFIX}:endpoints', sorted(endpoints | set(counters)), timeout=None)
+
+            for endpoint, values in counters.items():
+                for field, value in values.items():
+                    key = _counter_key(endpoint, field)
+                    cache.add(key, 0, timeout=None)
+                    try:
+                        cache.incr(key, value)
+                    except ValueError:
+                        cache.set(key, value, timeout=None)
+
+            if slow_samples:
+                samples = cache.get(f'{KEY_PREFIX}:slow', []) + slow_samples
+                cache.set(f'{KEY_PREFIX}:slow', samples[-SLOW_SAMPLES:], timeout=None)
+        except Exception:
+            # Metrics must never break a request
+            logger.exception('Could not flush the request metrics')
+
+
+_buffer = _Buffer()
+
+
+def flush_request_metrics():
+    _buffer.flush()
+
+
+def reset_request_metrics():
+    """Forget every aggregate (the buffered and the shared ones)"""
+    _buffer.flush()
+    endpoints = cache.get(f'{KEY_PREFIX}:endpoints', [])
+    cache.delete_many(
+        [_counter_key(endpoint, field) for endpoint in endpoints for field in COUNTER_FIELDS + tuple(_bucket_fields())]
+        + [f'{KEY_PREFIX}:endpoints', f'{KEY_PREFIX}:slow']
+    )
+
+
+def _estimate_percentile(buckets, count, fraction):
+    """Upper bound of the histogram bucket holding the given fraction of requests"""
+    seen = 0
+    for bound, field in zip(LATENCY_BUCKETS_MS + (None,), _bucket_fields()):
+        seen += buckets.get(field, 0)
+        if seen >= fraction * count:
+            return bound
+    return None
+
+
+def endpoint_metrics():
+    """Aggregates per endpoint, most total time first, and the latest slow request samples"""
+    flush_request_metrics()
+    endpoints = cache.get(f'{KEY_PREFIX}:endpoints', [])
+    fields = COUNTER_FIELDS + tuple(_bucket_fields())
+    values = cache.get_many([_counter_key(endpoint, field) for endpoint in endpoints for field in fields])
+
+    rows = []
+    for endpoint in endpoints:
+        counters = {field: values.get(_counter_key(endpoint, field), 0) for field in fields}
+        count = counters['count']
+        if not count:
+            continue
+        rows.append({
+            'endpoint': endpoint,
+            'count': count,
+            'errors': counters['errors'],
+            'total_ms': round(counters['total_us'] / 1000, 1),
+            'avg_ms': round(counters['total_us'] / count / 1000, 2),
+            'avg_db_ms': round(counters['db_us'] / count / 1000, 2),
+            'avg_render_ms': round(counters['render_us'] / count / 1000, 2),
+            'avg_queries': round(counters['queries'] / count, 2),
+            'p50_ms_at_most': _estimate_percentile(counters, count, 0.50),
+            'p95_ms_at_most': _estimate_percentile(counters, count, 0.95),
+        })
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return {'endpoints': rows, 'slow_requests': cache.get(f'{KEY_PREFIX}:slow', [])}
+
+
+class _RequestTimer:
+    """Collects the queries of one request through a connection execute wrapper"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest = []
+        self.view_finished = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += duration
+            entry = (duration, self.queries, sql)
+            if len(self.slowest) < SLOW_SQL_STATEMENTS:
+                heapq.heappush(self.slowest, entry)
+            elif entry > self.slowest[0]:
+                heapq.heapreplace(self.slowest, entry)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        timer = _RequestTimer()
+        request._request_timer = timer
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        total_ms = (finished - timer.started) * 1000
+        db_ms = timer.db_seconds * 1000
+        render_ms = (finished - timer.view_finished) * 1000 if timer.view_finished else 0.0
+        view_ms = max(total_ms - db_ms - render_ms, 0.0)
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = f'{request.method} /{match.route}' if match else f'{request.method} {UNRESOLVED}'
+
+        if settings.REQUEST_METRICS_SERVER_TIMING or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db_ms:.1f};desc="{timer.queries} queries"',
+                f'view;dur={view_ms:.1f}',
+                f'render;dur={render_ms:.1f}',
+                f'total;dur={total_ms:.1f}',
+            ])
+
+        record = {
+            'endpoint': endpoint,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timer.queries,
+            'db_ms': round(db_ms, 2),
+            'view_ms': round(view_ms, 2),
+            'render_ms': round(render_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+
+        slow_sample = None
+        if total_ms >= settings.REQUEST_METRICS_SLOW_MS:
+            record['slowest_sql'] = [
+                {'ms': round(duration * 1000, 2), 'sql': sql[:SLOW_SQL_MAX_LENGTH]}
+                for duration, _, sql in sorted(timer.slowest, reverse=True)
+            ]
+            slow_sample = record
+            logger.warning(json.dumps(record))
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record))
+
+        counters = {
+            'count': 1,
+            'total_us': int(total_ms * 1000),
+            'db_us': int(db_ms * 1000),
+            'render_us': int(render_ms * 1000),
+            'queries': timer.queries,
+            _bucket_field(total_ms): 1,
+        }
+        if response.status_code >= 500:
+            counters['errors'] = 1
+        _buffer.add(endpoint, counters, slow_sample)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called when the view returned an unrendered (DRF/template) response:
+        # everything from here to the end of get_response is rendering
+        timer = getattr(request, '_request_timer', None)
+        if timer is not None:
+            timer.view_finished = time.perf_counter()
+        return response
@@ -60,9 +60,12 @@ INSTALLED_APPS = [
     'companies',
     'clients',
     'dashboard',
+    'search',
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the other middleware too
+    'buffetflow.request_metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -103,6 +106,80 @@ DATABASES = {
 }
 
 
+# Full-text search lookups (trigram/tsvector) are only available on PostgreSQL
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    INSTALLED_APPS.append('django.contrib.postgres')
+
+# Cache
+# Redis in production (REDIS_URL is set by docker-compose.prod.yml), local memory otherwise
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'buffetflow',
+        }
+    }
+
+# Seconds a per-company dashboard response stays cached (writes invalidate it earlier)
+TENANT_CACHE_TIMEOUT = config('TENANT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds an agenda month bucket stays cached (event writes invalidate their months earlier)
+AGENDA_CACHE_TIMEOUT = config('AGENDA_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Celery (background jobs). Without a broker, tasks run inline (eager mode). With one,
+# a worker must run (the ``worker`` service of docker-compose) and share MEDIA_ROOT with web.
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not CELERY_BROKER_URL, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = False
+CELERY_TASK_IGNORE_RESULT = True
+
+# Processes used to render proposal PDFs in bulk exports (1 renders in the request process)
+PROPOSAL_EXPORT_WORKERS = config('PROPOSAL_EXPORT_WORKERS', default=2, cast=int)
+
+# CSV imports up to this size run in the request; larger files become background jobs
+IMPORT_SYNC_MAX_BYTES = config('IMPORT_SYNC_MAX_BYTES', default=256 * 1024, cast=int)
+# Rows validated and inserted together by the CSV importer
+IMPORT_BATCH_SIZE = config('IMPORT_BATCH_SIZE', default=500, cast=int)
+# Rejected rows whose errors are kept in the import report
+IMPORT_MAX_REPORTED_ERRORS = config('IMPORT_MAX_REPORTED_ERRORS', default=1000, cast=int)
+
+
+# Request metrics (buffetflow.request_metrics): timings of every request, slow request samples
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+# Requests at least this slow are logged as warnings with their slowest SQL statements
+REQUEST_METRICS_SLOW_MS = config('REQUEST_METRICS_SLOW_MS', default=500, cast=int)
+# Seconds between flushes of a process's counters to the shared cache
+REQUEST_METRICS_FLUSH_SECONDS = config('REQUEST_METRICS_FLUSH_SECONDS', default=10, cast=int)
+# Send the Server-Timing header to every user (staff users always get it)
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=DEBUG, cast=bool)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # INFO logs one JSON line per request; WARNING only the slow ones
+        'buffetflow.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,72 @@
+"""
+Shared helpers for the test suites of the BuffetFlow apps.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Adds ``assertQueryBudget`` to a TestCase.
+
+    Unlike ``assertNumQueries`` the budget is an upper bound, so endpoints can
+    declare how many queries they may run and the suite fails as soon as one
+    goes over it (e.g. when an N+1 sneaks into a serializer).
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f"{index}. {query['sql']}"
+                for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f'{executed} queries executed, budget is {budget}:\n{queries}')
+
+
+class QueryPlanMixin:
+    """
+    Adds ``assertUsesIndex`` to a TestCase.
+
+    The queryset is run through ``EXPLAIN`` and the test fails if any table is
+    read with a sequential scan. On PostgreSQL sequential scans are disabled
+    for the check, so a small seeded table still shows whether an index *can*
+    serve the query: a remaining "Seq Scan" means no index fits.
+    """
+
+    @classmethod
+    def analyze(cls, using=DEFAULT_DB_ALIAS):
+        """Refresh planner statistics after seeding, so plans match a populated database"""
+        connection = connections[using]
+        if connection.vendor in ('postgresql', 'sqlite'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def query_plan(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def sequential_scans(self, plan, vendor):
+        lines = [line.strip() for line in plan.splitlines()]
+        if vendor == 'postgresql':
+            return [line for line in lines if 'Seq Scan' in line]
+        if vendor == 'sqlite':
+            return [line for line in lines if re.search(r'\bSCAN \w+$', line)]
+        return []
+
+    def assertUsesIndex(self, queryset):
+        vendor = connections[queryset.db].vendor
+        plan = self.query_plan(queryset)
+        scans = self.sequential_scans(plan, vendor)
+        if scans:
+            self.fail(f'Sequential scan in the plan of:\n{queryset.query}\n\n{plan}')
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ClientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clients'
+
+    def ready(self):
+        from buffetflow.cache import invalidate_on_change
+        from .models import Client
+
+        invalidate_on_change(Client, lambda client: client.company_id)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Client
+from .validators import is_valid_cnpj, is_valid_cpf
 
 
 class ClientSerializer(serializers.ModelSerializer):
@@ -32,4 +33,24 @@ class ClientSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         user = self.context['request'].user
         validated_data['company'] = user.company
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class ClientImportSerializer(ClientSerializer):
+    """
+    Row validation of bulk imports. The importer checks email uniqueness
+    for a whole batch at once, so the per-row unique validator is dropped.
+    """
+    class Meta(ClientSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+    def validate_cpf(self, value):
+        if value and not is_valid_cpf(value):
+            raise serializers.ValidationError('CPF inválido.')
+        return value
+
+    def validate_cnpj(self, value):
+        if value and not is_valid_cnpj(value):
+            raise serializers.ValidationError('CNPJ inválido.')
+        return value
+
@@ -0,0 +1,31 @@
+import re
+
+
+def only_digits(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def _check_digit(digits, weights):
+    remainder = sum(int(digit) * weight for digit, weight in zip(digits, weights)) % 11
+    return '0' if remainder < 2 else str(11 - remainder)
+
+
+def is_valid_cpf(value):
+    """CPF with or without punctuation, checked against its two check digits"""
+    digits = only_digits(value)
+    if len(digits) != 11 or len(set(digits)) == 1:
+        return False
+    first = _check_digit(digits[:9], range(10, 1, -1))
+    second = _check_digit(digits[:10], range(11, 1, -1))
+    return digits[9:] == first + second
+
+
+def is_valid_cnpj(value):
+    """CNPJ with or without punctuation, checked against its two check digits"""
+    digits = only_digits(value)
+    if len(digits) != 14 or len(set(digits)) == 1:
+        return False
+    weights = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    first = _check_digit(digits[:12], weights)
+    second = _check_digit(digits[:13], [6] + weights)
+    return digits[12:] == first + second
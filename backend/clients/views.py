@@ -1,15 +1,29 @@
-from rest_framework import viewsets, filters
+from django.utils.decorators import method_decorator
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from buffetflow.cache import conditional_per_company
+from buffetflow.export import EXPORT_RENDERERS, export_response
+from search.filters import IndexedSearchFilter
 from .models import Client
 from .serializers import ClientSerializer
 
 
+@method_decorator(conditional_per_company('clients'), name='list')
 class ClientViewSet(viewsets.ModelViewSet):
     serializer_class = ClientSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['name', 'email', 'phone']
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter]
+    search_kind = 'client'
     filterset_fields = ['company']
 
     def get_queryset(self):
         user = self.request.user
         return Client.objects.filter(company=user.company)
+
+    @action(detail=False, renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """Stream the clients matching the list filters as CSV (default) or XLSX (``?format=xlsx``)"""
+        if not request.user.company:
+            return Response({'error': 'No company associated'}, status=status.HTTP_400_BAD_REQUEST)
+        return export_response(request, 'clients')
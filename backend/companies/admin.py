@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PaymentMethod
+from .models import ImportJob, PaymentMethod
 
 
 @admin.register(PaymentMethod)
@@ -8,4 +8,13 @@ class PaymentMethodAdmin(admin.ModelAdmin):
     list_filter = ['card_brand', 'is_default', 'is_active', 'created_at']
     search_fields = ['company__name', 'card_last_four', 'provider_customer_id']
     readonly_fields = ['created_at', 'updated_at', 'provider_customer_id', 'provider_payment_method_id']
-    ordering = ['-is_default', '-created_at']
\ No newline at end of file
+    ordering = ['-is_default', '-created_at']
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ['company', 'kind', 'status', 'total_rows', 'created_rows', 'error_rows', 'created_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['company__name']
+    readonly_fields = ['row_errors', 'created_at', 'finished_at']
+
@@ -0,0 +1,237 @@
+"""
+Bulk CSV import of clients and events.
+
+The file is read as a stream and handled in batches of IMPORT_BATCH_SIZE
+rows. Each row goes through the import serializer, which needs no queries.
+Then the whole batch is checked at once against data prefetched with one
+query per batch: email uniqueness for clients, and client lookup plus time
+slot uniqueness for events. Valid rows are inserted with ``bulk_create``
+and indexed for search in the same transaction. Invalid rows are skipped
+and reported with their line number and field errors.
+
+Headers may be the column names of the CSV export (``buffetflow.export``),
+so an exported file can be imported back, or the serializer field names;
+the quote the export puts before formula-like text is removed.
+Comma and semicolon separated UTF-8 files are accepted.
+"""
+import csv
+import io
+import itertools
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from buffetflow.cache import bump_company_version
+from buffetflow.export import DATASETS, unescape_formula
+from clients.models import Client
+from clients.serializers import ClientImportSerializer
+from events.agenda import invalidate_months
+from events.models import Event
+from events.serializers import EventImportSerializer
+from search.indexing import index_new_objects
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def column_names(kind):
+    """CSV header -> serializer field, for the writable fields of the kind's import serializer"""
+    serializer_class, _, _ = IMPORTERS[kind]
+    writable = {name for name, field in serializer_class().fields.items() if not field.read_only}
+
+    names = {name: name for name in writable}
+    for header, lookup in DATASETS[kind][2]:
+        field = lookup.removesuffix('_id')
+        if field in writable:
+            names.setdefault(header, field)
+    return names
+
+
+def read_rows(file, columns):
+    """Yield (line number, {field: value}) for every non-empty data row; blank cells are left out"""
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    header_line = text.readline()
+    delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+    reader = csv.reader(itertools.chain([header_line], text), delimiter=delimiter)
+
+    header = [name.strip().lower() for name in next(reader, [])]
+    fields = [columns.get(name) for name in header]
+    if not any(fields):
+        raise ImportFileError('Nenhuma coluna do cabeçalho foi reconhecida')
+
+    for row in reader:
+        # The export quotes text that starts like a formula
+        values = {
+            field: unescape_formula(value.strip()) for field, value in zip(fields, row) if field and value.strip()
+        }
+        if values:
+            yield reader.line_num, values
+
+
+def _error_messages(errors):
+    return {field: [str(message) for message in messages] for field, messages in errors.items()}
+
+
+def _client_batch(company, user, rows, seen):
+    """Client instances of the valid rows and (line, errors) of the others"""
+    taken = set(Client.objects.filter(
+        email__in={data['email'] for _, data in rows}
+    ).values_list('email', flat=True))
+
+    clients, errors = [], []
+    for line, data in rows:
+        email = data['email']
+        if email in taken:
+            errors.append((line, {'email': ['Já existe um cliente com este e-mail.']}))
+        elif email in seen:
+            errors.append((line, {'email': [f'E-mail repetido no arquivo (linha {seen[email]}).']}))
+        else:
+            seen[email] = line
+            clients.append(Client(company=company, **data))
+    return clients, errors
+
+
+def _event_batch(company, user, rows, seen):
+    """Event instances of the valid rows and (line, errors) of the others"""
+    client_ids = {data['client'] for _, data in rows if data.get('client')}
+    client_emails = {data['client_email'] for _, data in rows if not data.get('client') and data.get('client_email')}
+    clients = Client.objects.filter(company=company).filter(
+        Q(pk__in=client_ids) | Q(email__in=client_emails)
+    ).only('id', 'name', 'email', 'phone')
+    by_id, by_email = {}, {}
+    for client in clients:
+        by_id[client.pk] = by_email[client.email] = client
+
+    taken = set(Event.objects.filter(
+        company=company, event_date__in={data['event_date'] for _, data in rows}
+    ).values_list('event_date', 'start_time'))
+
+    events, errors = [], []
+    for line, data in rows:
+        row_errors = {}
+        client_id = data.pop('client', None)
+        client = by_id.get(client_id) if client_id else by_email.get(data.get('client_email'))
+        if client_id and client is None:
+            row_errors['client'] = ['Cliente não encontrado.']
+        if client is not None:
+            data.setdefault('client_name', client.name)
+            data.setdefault('client_email', client.email)
+            data.setdefault('client_phone', client.phone)
+        for field in ('client_name', 'client_email', 'client_phone'):
+            if not data.get(field) and 'client' not in row_errors:
+                row_errors[field] = ['Este campo é obrigatório.']
+
+        slot = (data['event_date'], data['start_time'])
+        if slot in taken:
+            row_errors['start_time'] = ['Já existe um evento neste dia e horário.']
+        elif slot in seen:
+            row_errors['start_time'] = [f'Dia e horário repetidos no arquivo (linha {seen[slot]}).']
+
+        if row_errors:
+            errors.append((line, row_errors))
+            continue
+        seen[slot] = line
+        events.append(Event(company=company, created_by=user, client=client, **data))
+    return events, errors
+
+
+def _events_created(company, events):
+    # bulk_create sends no signals: refresh the agenda months they fall in
+    invalidate_months(company.pk, [event.event_date for event in events])
+
+
+# kind -> (row serializer, batch check, hook run after each inserted batch)
+IMPORTERS = {
+    'clients': (ClientImportSerializer, _client_batch, None),
+    'events': (EventImportSerializer, _event_batch, _events_created),
+}
+
+
+def import_csv(kind, company, file, user=None, batch_size=None, max_errors=None, progress=None):
+    """
+    Import the rows of a CSV file object (bytes) into the company. Returns
+    {'total_rows', 'created_rows', 'error_rows', 'row_errors'}; ``progress``
+    is called with the running totals after every batch.
+    """
+    serializer_class, check_batch, after_batch = IMPORTERS[kind]
+    model = serializer_class.Meta.model
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    max_errors = settings.IMPORT_MAX_REPORTED_ERRORS if max_errors is None else max_errors
+
+    result = {'total_rows': 0, 'created_rows': 0, 'error_rows': 0, 'row_errors': []}
+
+    def report(line, errors):
+        result['error_rows'] += 1
+        if len(result['row_errors']) < max_errors:
+            result['row_errors'].append({'row': line, 'errors': errors})
+
+    # One instance for every row: a ModelSerializer builds its fields per instance
+    serializer = serializer_class()
+    rows = read_rows(file, column_names(kind))
+    seen = {}
+    try:
+        while batch := list(itertools.islice(rows, batch_size)):
+            valid = []
+            for line, values in batch:
+                try:
+                    valid.append((line, dict(serializer.run_validation(values))))
+                except serializers.ValidationError as e:
+                    report(line, _error_messages(e.detail))
+
+            instances, errors = check_batch(company, user, valid, seen) if valid else ([], [])
+            for line, row_errors in errors:
+                report(line, row_errors)
+
+            with transaction.atomic():
+                created = model.objects.bulk_create(instances)
+                index_new_objects(created)
+            if after_batch and created:
+                after_batch(company, created)
+
+            result['total_rows'] += len(batch)
+            result['created_rows'] += len(created)
+            if progress:
+                progress(result)
+    except UnicodeDecodeError:
+        raise ImportFileError('O arquivo deve estar codificado em UTF-8')
+    finally:
+        if result['created_rows']:
+            bump_company_version(company.pk)
+
+    result['row_errors'].sort(key=lambda entry: entry['row'])
+    return result
+
+
+def run_import(job, file):
+    """Run an ImportJob on a file object, recording progress and the outcome on the job"""
+    job.status = 'running'
+    job.save(update_fields=['status'])
+
+    def progress(result):
+        job.total_rows, job.created_rows, job.error_rows = (
+            result['total_rows'], result['created_rows'], result['error_rows']
+        )
+        job.save(update_fields=['total_rows', 'created_rows', 'error_rows'])
+
+    try:
+        result = import_csv(job.kind, job.company, file, user=job.requested_by, progress=progress)
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'done'
+        job.error = ''
+        job.total_rows, job.created_rows, job.error_rows = (
+            result['total_rows'], result['created_rows'], result['error_rows']
+        )
+        job.row_errors = result['row_errors']
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        'status', 'error', 'total_rows', 'created_rows', 'error_rows', 'row_errors', 'finished_at'
+    ])
+    return job
@@ -0,0 +1,359 @@
+"""
+Synthetic tenants for load testing.
+
+Every company is generated from its own ``random.Random`` seeded with
+(seed, company index), so the same arguments always produce the same rows
+no matter how the companies are split between worker processes. Rows are
+written with ``bulk_create`` in batches of ``batch_size``. Since bulk_create
+sends no signals, the denormalized data (event menu totals, monthly
+financial rollups, search documents) is rebuilt once per company at the end.
+"""
+import random
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+
+from clients.models import Client
+from events.menu_totals import refresh_menu_totals
+from events.models import Event, EventMenu, MenuItem
+from financials.models import FinancialTransaction, Notification, Quote
+from financials.rollups import rebuild_rollups
+from search.indexing import rebuild_index
+from users.models import Company
+
+User = get_user_model()
+
+EMAIL_DOMAIN = 'loadtest.local'
+START_TIMES = [time(hour, minute) for hour in (10, 12, 15, 18, 19, 20) for minute in (0, 30)]
+# Events are spread over this many days around the anchor date (more if needed to fit them)
+DATE_SPAN_DAYS = 730
+
+MENU_TEMPLATES = {
+    'appetizer': ['Canapés de Salmão', 'Bruschetta Italiana', 'Coxinhas de Frango', 'Bolinho de Bacalhau',
+                  'Mini Quiches', 'Tábua de Frios', 'Vol-au-vent', 'Croquetas de Camarão'],
+    'main': ['Filé Mignon ao Molho Madeira', 'Salmão Grelhado', 'Frango à Parmegiana', 'Costela de Porco',
+             'Lasanha Bolonhesa', 'Risotto de Cogumelos', 'Strogonoff de Frango', 'Moqueca de Peixe'],
+    'side': ['Arroz Branco', 'Batata Rústica', 'Legumes Grelhados', 'Purê de Batata', 'Salada Verde',
+             'Farofa de Banana', 'Polenta Cremosa', 'Cuscuz Marroquino'],
+    'dessert': ['Tiramisu', 'Pudim de Leite', 'Mousse de Chocolate', 'Torta de Limão', 'Petit Gateau',
+                'Cheesecake de Morango', 'Pavê de Chocolate', 'Brownie com Sorvete'],
+    'beverage': ['Suco de Laranja Natural', 'Refrigerantes', 'Água Mineral', 'Cerveja Nacional',
+                 'Vinho Tinto', 'Caipirinha', 'Champagne', 'Café Expresso'],
+}
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+               'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+              'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes']
+CITIES = [('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'), ('Curitiba', 'PR'),
+          ('Porto Alegre', 'RS'), ('Salvador', 'BA'), ('Recife', 'PE'), ('Fortaleza', 'CE')]
+VENUES = ['Salão Principal', 'Espaço Jardim', 'Casa de Festas', 'Sítio', 'Hotel Centro', 'Clube Social']
+EXPENSES = ['Compra de ingredientes', 'Salário da equipe', 'Combustível', 'Aluguel de equipamentos',
+            'Marketing', 'Manutenção', 'Conta de luz', 'Conta de água']
+
+EVENT_STATUSES = [choice for choice, _ in Event.STATUS_CHOICES]
+QUOTED_STATUSES = {'proposta_pendente', 'proposta_enviada', 'proposta_recusada', 'proposta_aceita'}
+QUOTE_STATUS_BY_EVENT = {
+    'proposta_pendente': 'draft',
+    'proposta_enviada': 'sent',
+    'proposta_recusada': 'rejected',
+    'proposta_aceita': 'approved',
+}
+PAID_STATUSES = {'em_execucao', 'pos_evento', 'concluido'}
+
+
+def _money(rng, low, high):
+    return Decimal(rng.uniform(low, high)).quantize(Decimal('0.01'))
+
+
+def _person(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _phone(rng):
+    return f'(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}'
+
+
+def _chunks(count, size):
+    for start in range(0, count, size):
+        yield start, min(size, count - start)
+
+
+def _create_company(rng, label, index):
+    city, state = rng.choice(CITIES)
+    name = f'Buffet {rng.choice(LAST_NAMES)} {index}'
+    return Company.objects.create(
+        name=name,
+        business_name=f'{name} Eventos Ltda',
+        email=f'{label}-c{index}@{EMAIL_DOMAIN}',
+        phone=_phone(rng),
+        city=city,
+        state=state,
+        default_profit_margin=_money(rng, 25, 45),
+        max_events_per_month=rng.randint(20, 100),
+    )
+
+
+def _create_users(rng, company, label, index, password_hash):
+    roles = ['owner'] + ['manager'] * rng.randint(1, 2) + ['staff'] * rng.randint(1, 4)
+    users = []
+    for number, role in enumerate(roles):
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f'{label}-c{index}-u{number}'
+        users.append(User(
+            username=username,
+            email=f'{username}@{EMAIL_DOMAIN}',
+            password=password_hash,
+            first_name=first_name,
+            last_name=last_name,
+            role=role,
+            company=company,
+        ))
+    return User.objects.bulk_create(users)
+
+
+def _create_menu_items(rng, company):
+    items = []
+    for category, names in MENU_TEMPLATES.items():
+        for name in rng.sample(names, rng.randint(4, len(names))):
+            cost = _money(rng, 5, 25)
+            items.append(MenuItem(
+                company=company,
+                name=name,
+                category=category,
+                cost_per_person=cost,
+                price_per_person=(cost * Decimal(rng.uniform(1.3, 2.0))).quantize(Decimal('0.01')),
+                seasonal=rng.random() < 0.2,
+            ))
+    return MenuItem.objects.bulk_create(items)
+
+
+def _create_clients(rng, company, label, index, count, batch_size):
+    client_ids = []
+    for start, size in _chunks(count, batch_size):
+        clients = []
+        for number in range(start, start + size):
+            name = _person(rng)
+            clients.append(Client(
+                full_name=name,
+                name=name,
+                email=f'{label}-c{index}-cl{number}@{EMAIL_DOMAIN}',
+                phone=_phone(rng),
+                company=company,
+            ))
+        client_ids.extend(client.pk for client in Client.objects.bulk_create(clients))
+    return client_ids
+
+
+def _event_slots(rng, count, anchor):
+    """``count`` distinct (date, start time) pairs, as the slot is unique per company"""
+    span = max(DATE_SPAN_DAYS, 2 * count // len(START_TIMES) + 1)
+    first_day = anchor - timedelta(days=span // 2)
+    for slot in rng.sample(range(span * len(START_TIMES)), count):
+        day, start = divmod(slot, len(START_TIMES))
+        yield first_day + timedelta(days=day), START_TIMES[start]
+
+
+def _build_event(rng, company, users, client_ids, event_date, start_time):
+    status = rng.choice(EVENT_STATUSES)
+    estimated_cost = _money(rng, 2000, 15000)
+    final_price = None
+    if status not in QUOTED_STATUSES or status == 'proposta_aceita':
+        final_price = (estimated_cost * Decimal(rng.uniform(1.2, 1.8))).quantize(Decimal('0.01'))
+    event_type, event_type_name = rng.choice(Event.EVENT_TYPE_CHOICES)
+    client_name = _person(rng)
+    return Event(
+        company=company,
+        created_by=rng.choice(users),
+        title=f'{event_type_name} - {client_name}',
+        event_type=event_type,
+        client_name=client_name,
+        client_email=f'{client_name.split()[0].lower()}{rng.randint(1, 9999)}@{EMAIL_DOMAIN}',
+        client_phone=_phone(rng),
+        client_id=rng.choice(client_ids) if client_ids and rng.random() < 0.7 else None,
+        event_date=event_date,
+        start_time=start_time,
+        end_time=time(min(start_time.hour + rng.randint(3, 5), 23), start_time.minute),
+        guest_count=rng.randint(20, 300),
+        venue_location=rng.choice(VENUES),
+        status=status,
+        proposal_validity_date=event_date - timedelta(days=rng.randint(7, 30)),
+        estimated_cost=estimated_cost,
+        final_price=final_price,
+        value=final_price,
+    )
+
+
+def _event_rows(rng, label, events, menu_items, users, anchor):
+    """Menu rows, quotes and income transactions that belong to a batch of saved events"""
+    menus, quotes, incomes = [], [], []
+    for event in events:
+        for item in rng.sample(menu_items, rng.randint(4, min(10, len(menu_items)))):
+            menus.append(EventMenu(event=event, menu_item=item, quantity=rng.randint(1, 2)))
+
+        if event.status in QUOTED_STATUSES:
+            quote_status = QUOTE_STATUS_BY_EVENT[event.status]
+            if quote_status == 'sent' and event.proposal_validity_date < anchor:
+                quote_status = 'expired'
+            margin = _money(rng, 25, 45)
+            quotes.append(Quote(
+                event=event,
+                created_by=rng.choice(users),
+                quote_number=f'QT-{label}-{event.pk}',
+                total_cost=event.estimated_cost,
+                profit_margin=margin,
+                total_price=(event.estimated_cost * (1 + margin / 100)).quantize(Decimal('0.01')),
+                valid_until=event.proposal_validity_date,
+                status=quote_status,
+            ))
+
+        if event.status in PAID_STATUSES and event.value:
+            incomes.append(FinancialTransaction(
+                company=event.company,
+                related_event=event,
+                description=f'Pagamento evento: {event.title}'[:255],
+                amount=event.value,
+                transaction_type='INCOME',
+                transaction_date=event.event_date + timedelta(days=rng.randint(-30, 7)),
+                status='COMPLETED' if event.status == 'concluido' else 'PENDING',
+            ))
+    return menus, quotes, incomes
+
+
+def _create_expenses(rng, company, count, anchor, batch_size):
+    created = 0
+    for _, size in _chunks(count, batch_size):
+        FinancialTransaction.objects.bulk_create([
+            FinancialTransaction(
+                company=company,
+                description=rng.choice(EXPENSES),
+                amount=_money(rng, 50, 3000),
+                transaction_type='EXPENSE',
+                transaction_date=anchor - timedelta(days=rng.randint(0, DATE_SPAN_DAYS // 2)),
+                status=rng.choices(['COMPLETED', 'PENDING', 'CANCELED'], weights=[8, 3, 1])[0],
+            )
+            for _ in range(size)
+        ])
+        created += size
+    return created
+
+
+def _create_notifications(rng, company, users, event_ids, count):
+    titles = {
+        'event_conflict': 'Conflito de horário detectado',
+        'quote_expiring': 'Orçamento expirando em breve',
+        'payment_due': 'Pagamento pendente',
+        'event_reminder': 'Lembrete de evento',
+        'general': 'Notificação geral',
+    }
+    notifications = []
+    for _ in range(count):
+        notification_type = rng.choice(list(titles))
+        notifications.append(Notification(
+            company=company,
+            user=rng.choice(users) if rng.random() < 0.5 else None,
+            event_id=rng.choice(event_ids) if event_ids and rng.random() < 0.5 else None,
+            notification_type=notification_type,
+            priority=rng.choice(Notification.PRIORITY_CHOICES)[0],
+            title=titles[notification_type],
+            message=f'{titles[notification_type]}.',
+            is_read=rng.random() < 0.6,
+        ))
+    return len(Notification.objects.bulk_create(notifications))
+
+
+def generate_company(index, seed, label, events, transactions, anchor, password_hash, batch_size):
+    """Create one synthetic company with all its rows; returns {model label: row count}"""
+    rng = random.Random(f'{seed}:{index}')
+    counts = {}
+
+    with transaction.atomic():
+        company = _create_company(rng, label, index)
+        users = _create_users(rng, company, label, index, password_hash)
+        menu_items = _create_menu_items(rng, company)
+        client_ids = _create_clients(rng, company, label, index, max(1, events // 4), batch_size)
+        counts.update(companies=1, users=len(users), menu_items=len(menu_items), clients=len(client_ids))
+
+        slots = list(_event_slots(rng, events, anchor))
+        event_ids = []
+        for key in ('events', 'event_menus', 'quotes', 'transactions'):
+            counts[key] = 0
+        for start, size in _chunks(events, batch_size):
+            saved = Event.objects.bulk_create([
+                _build_event(rng, company, users, client_ids, event_date, start_time)
+                for event_date, start_time in slots[start:start + size]
+            ])
+            event_ids.extend(event.pk for event in saved)
+            menus, quotes, incomes = _event_rows(rng, label, saved, menu_items, users, anchor)
+            EventMenu.objects.bulk_create(menus, batch_size=batch_size)
+            Quote.objects.bulk_create(quotes, batch_size=batch_size)
+            FinancialTransaction.objects.bulk_create(incomes, batch_size=batch_size)
+            counts['events'] += len(saved)
+            counts['event_menus'] += len(menus)
+            counts['quotes'] += len(quotes)
+            counts['transactions'] += len(incomes)
+
+        counts['transactions'] += _create_expenses(rng, company, transactions, anchor, batch_size)
+        counts['notifications'] = _create_notifications(rng, company, users, event_ids, max(10, events // 10))
+
+        # bulk_create sends no signals: rebuild what they would have maintained
+        refresh_menu_totals(Event.objects.filter(company=company))
+        rebuild_rollups(company)
+        rebuild_index(company)
+
+    return counts
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _generate_in_worker(arguments):
+    try:
+        return generate_company(*arguments)
+    finally:
+        connections.close_all()
+
+
+def generate_load_data(companies, events, transactions, seed=0, label=None, anchor=None,
+                       password='teste123', batch_size=1000, workers=1, progress=None):
+    """
+    Generate ``companies`` synthetic companies with ``events`` events and
+    ``transactions`` extra expense transactions each; returns the total row
+    count per model. ``progress`` is called with (company index, counts,
+    seconds) as each company finishes.
+    """
+    label = label or f'load{seed}'
+    anchor = anchor or date.today()
+    # Hashing is deliberately slow: every generated user shares one hash
+    password_hash = make_password(password)
+    jobs = [
+        (index, seed, label, events, transactions, anchor, password_hash, batch_size)
+        for index in range(companies)
+    ]
+
+    totals = {}
+
+    def collect(index, counts, started):
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+        if progress:
+            progress(index, counts, timer.monotonic() - started)
+
+    started = timer.monotonic()
+    if workers <= 1:
+        for job in jobs:
+            collect(job[0], generate_company(*job), started)
+        return totals
+
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for job, counts in zip(jobs, pool.map(_generate_in_worker, jobs)):
+            collect(job[0], counts, started)
+    return totals
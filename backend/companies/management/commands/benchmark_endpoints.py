@@ -0,0 +1,125 @@
+import json
+import platform
+from datetime import date
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from buffetflow.benchmark import ENDPOINTS, compare_reports, run_benchmarks
+from companies.load_data import generate_load_data
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database with synthetic data, measure the query count, latency '
+        'percentiles and peak memory of the list and dashboard endpoints, and write a JSON report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=3, help='Companies in the seeded dataset')
+        parser.add_argument('--events', type=int, default=2000, help='Events per company')
+        parser.add_argument('--transactions', type=int, default=3000, help='Expense transactions per company')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--anchor', type=date.fromisoformat, default=date(2026, 1, 1),
+            help='Date the seeded calendar is centred on; fixed so reports are comparable',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument(
+            '--endpoint', action='append', choices=sorted(ENDPOINTS), dest='endpoints',
+            help='Only benchmark this endpoint (repeatable)',
+        )
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Let the per-company response cache serve repeated requests (cold by default)',
+        )
+        parser.add_argument('--output', default='benchmark-report.json', help='Where to write the JSON report')
+        parser.add_argument('--baseline', help='Report to compare against; regressions make the command fail')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed relative growth of latency and memory over the baseline (query counts must not grow)',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read the baseline {options['baseline']}: {e}")
+
+        endpoints = self.measure(options)
+
+        report = {
+            'meta': {
+                'generated_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'dataset': {key: options[key] for key in ('companies', 'events', 'transactions', 'seed')},
+                'anchor': options['anchor'].isoformat(),
+                'iterations': options['iterations'],
+                'warm_cache': options['warm_cache'],
+            },
+            'endpoints': endpoints,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+            output.write('\n')
+
+        for name, metrics in endpoints.items():
+            self.stdout.write(
+                f"{name:<22} {metrics['status']} {metrics['queries']:>3} queries  "
+                f"p50 {metrics['p50_ms']:>8.2f} ms  p95 {metrics['p95_ms']:>8.2f} ms  "
+                f"p99 {metrics['p99_ms']:>8.2f} ms  peak {metrics['peak_memory_kb']:>8.1f} KiB"
+            )
+        self.stdout.write(f"Report written to {options['output']}")
+
+        failed = [name for name, metrics in endpoints.items() if metrics['status'] != 200]
+        if failed:
+            raise CommandError(f"Endpoints did not answer 200: {', '.join(failed)}")
+
+        if baseline is not None:
+            regressions = compare_reports(report, baseline, options['tolerance'])
+            for name, metric, expected, current in regressions:
+                self.stderr.write(f'{name} {metric}: baseline {expected}, now {current}')
+            if regressions:
+                raise CommandError(f'{len(regressions)} metrics regressed against the baseline')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def measure(self, options):
+        """Seed and benchmark inside a test database that is destroyed afterwards"""
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write('Seeding the benchmark dataset...')
+            generate_load_data(
+                companies=options['companies'],
+                events=options['events'],
+                transactions=options['transactions'],
+                seed=options['seed'],
+                label='bench',
+                anchor=options['anchor'],
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            user = User.objects.filter(role='owner').order_by('id').first()
+            return run_benchmarks(
+                user,
+                iterations=options['iterations'],
+                anchor=options['anchor'],
+                endpoints=options['endpoints'],
+                warm_cache=options['warm_cache'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
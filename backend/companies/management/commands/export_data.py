@@ -0,0 +1,60 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from buffetflow.export import DATASETS, FORMATS, ExportError, export_stream
+from users.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Export the events, clients or financial transactions of a company as CSV or XLSX, '
+        'streamed with the same filters as the list endpoints'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--company', type=int, required=True, help='Company id')
+        parser.add_argument('--format', choices=FORMATS, default='csv', dest='export_format')
+        parser.add_argument('--output', help='File to write (standard output for CSV when omitted)')
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='NAME=VALUE', dest='filters',
+            help='List endpoint filter, e.g. --filter start_date=2026-01-01 --filter status=COMPLETED (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            company = Company.objects.get(pk=options['company'])
+        except Company.DoesNotExist:
+            raise CommandError(f"Company {options['company']} not found")
+
+        params = QueryDict(mutable=True)
+        for item in options['filters']:
+            name, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f'Filters must look like NAME=VALUE, got {item!r}')
+            params.appendlist(name, value)
+
+        if options['export_format'] == 'xlsx' and not options['output']:
+            raise CommandError('XLSX exports need --output')
+
+        try:
+            stream = export_stream(options['dataset'], company, params, options['export_format'])
+        except ExportError as e:
+            raise CommandError(f'Invalid filters: {e.errors}')
+
+        written = 0
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in stream:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
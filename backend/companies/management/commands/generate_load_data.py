@@ -0,0 +1,74 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from companies.load_data import EMAIL_DOMAIN, generate_load_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic companies with users, menu items, clients, events, quotes, '
+        'transactions and notifications for load testing (deterministic for a given --seed)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=10, help='Number of companies to create')
+        parser.add_argument('--events', type=int, default=1000, help='Events per company')
+        parser.add_argument(
+            '--transactions', type=int, default=2000,
+            help='Expense transactions per company, on top of the income of paid events',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed generates the same data')
+        parser.add_argument(
+            '--label',
+            help='Prefix of the generated e-mails and quote numbers (default: load<seed>); must not be in use',
+        )
+        parser.add_argument(
+            '--anchor', type=date.fromisoformat,
+            help='Date the generated calendar is centred on, YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument('--password', default='teste123', help='Password of every generated user')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes generating companies in parallel (ignored on SQLite, which has a single writer)',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('companies', 'events', 'batch_size', 'workers'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        if options['transactions'] < 0:
+            raise CommandError('--transactions must not be negative')
+
+        label = options['label'] or f"load{options['seed']}"
+        if get_user_model().objects.filter(email__startswith=f'{label}-', email__endswith=f'@{EMAIL_DOMAIN}').exists():
+            raise CommandError(f'Data labelled "{label}" already exists; choose another --label or --seed')
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stderr.write('SQLite allows a single writer: generating with one process')
+            workers = 1
+
+        def progress(index, counts, seconds):
+            rows = sum(counts.values())
+            self.stdout.write(f'company {index}: {rows} rows ({seconds:.1f}s elapsed)')
+
+        totals = generate_load_data(
+            companies=options['companies'],
+            events=options['events'],
+            transactions=options['transactions'],
+            seed=options['seed'],
+            label=label,
+            anchor=options['anchor'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            workers=workers,
+            progress=progress,
+        )
+
+        for name, count in totals.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Generated {sum(totals.values())} rows labelled "{label}"'))
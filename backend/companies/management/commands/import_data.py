@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from companies.importer import IMPORTERS, ImportFileError, import_csv
+from users.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Import clients or events of a company from a CSV file, validating and inserting them in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help='UTF-8 CSV file, comma or semicolon separated')
+        parser.add_argument('--company', type=int, required=True, help='Company id')
+        parser.add_argument('--batch-size', type=int, help='Rows validated and inserted together')
+
+    def handle(self, *args, **options):
+        try:
+            company = Company.objects.get(pk=options['company'])
+        except Company.DoesNotExist:
+            raise CommandError(f"Company {options['company']} not found")
+
+        def progress(result):
+            self.stdout.write(f"{result['total_rows']} rows read, {result['created_rows']} imported")
+
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_csv(
+                    options['kind'], company, file, batch_size=options['batch_size'], progress=progress
+                )
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for entry in result['row_errors']:
+            messages = '; '.join(f"{field}: {' '.join(errors)}" for field, errors in entry['errors'].items())
+            self.stderr.write(f"line {entry['row']}: {messages}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created_rows']} of {result['total_rows']} rows ({result['error_rows']} rejected)"
+        ))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from users.models import Company
 
@@ -44,4 +45,42 @@ class PaymentMethod(models.Model):
         # If this is being set as default, unset all other defaults for this company
         if self.is_default:
             PaymentMethod.objects.filter(company=self.company, is_default=True).update(is_default=False)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class ImportJob(models.Model):
+    """A bulk CSV import of clients or events, with the errors of the rejected rows"""
+    KIND_CHOICES = [
+        ('clients', 'Clientes'),
+        ('events', 'Eventos'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('running', 'Em processamento'),
+        ('done', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='import_jobs')
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Removed once the import has run
+    file = models.FileField(upload_to='imports/', blank=True)
+
+    total_rows = models.PositiveIntegerField(default=0)
+    created_rows = models.PositiveIntegerField(default=0)
+    error_rows = models.PositiveIntegerField(default=0)
+    # [{"row": line number, "errors": {field: [messages]}}], capped at IMPORT_MAX_REPORTED_ERRORS
+    row_errors = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import #{self.pk} - {self.get_kind_display()} ({self.status})"
+
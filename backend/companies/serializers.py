@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from users.models import Company
-from .models import PaymentMethod
+from .models import ImportJob, PaymentMethod
 
 
 class CompanySerializer(serializers.ModelSerializer):
@@ -81,3 +81,15 @@ class PaymentMethodCreateSerializer(serializers.Serializer):
         return value.strip()
 
 
+class ImportJobSerializer(serializers.ModelSerializer):
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'kind_display', 'status', 'status_display', 'total_rows', 'created_rows',
+            'error_rows', 'row_errors', 'error', 'created_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
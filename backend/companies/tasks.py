@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from .importer import run_import
+from .models import ImportJob
+
+
+@shared_task
+def run_import_job(job_id):
+    """Import the uploaded CSV of a queued ImportJob, then drop the file"""
+    job = ImportJob.objects.select_related('company', 'requested_by').filter(pk=job_id).first()
+    if job is None or job.status != 'pending':
+        return
+
+    try:
+        with job.file.open('rb') as file:
+            run_import(job, file)
+    finally:
+        job.file.delete(save=False)
+        job.save(update_fields=['file'])
@@ -0,0 +1,350 @@
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from datetime import date, time
+from decimal import Decimal
+from io import StringIO
+from xml.etree import ElementTree
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buffetflow import celery_app
+from buffetflow.benchmark import ENDPOINTS, compare_reports, run_benchmarks
+from buffetflow.export import EXPORT_CHUNK_SIZE
+from buffetflow.testing import QueryBudgetMixin
+from clients.models import Client
+from companies.importer import import_csv
+from companies.load_data import generate_load_data
+from companies.models import ImportJob
+from events.menu_totals import verify_menu_totals
+from events.models import Event, EventMenu
+from financials.models import FinancialTransaction, Quote
+from financials.rollups import verify_rollups
+from search.models import SearchDocument
+from users.models import Company, User
+
+
+class GenerateLoadDataCommandTest(TestCase):
+    def generate(self, **options):
+        options = {'companies': 2, 'events': 30, 'transactions': 40, 'anchor': date(2026, 6, 1), **options}
+        output = StringIO()
+        call_command('generate_load_data', *[f'--{key}={value}' for key, value in options.items()], stdout=output)
+        return output.getvalue()
+
+    def snapshot(self, label):
+        events = Event.objects.filter(company__email__startswith=f'{label}-')
+        return list(events.order_by('company__email', 'event_date', 'start_time').values_list(
+            'title', 'event_date', 'start_time', 'status', 'guest_count', 'menu_price_total'
+        ))
+
+    def test_generates_consistent_tenants(self):
+        output = self.generate()
+
+        self.assertIn('Generated', output)
+        self.assertEqual(Company.objects.count(), 2)
+        self.assertEqual(Event.objects.count(), 60)
+        self.assertGreaterEqual(FinancialTransaction.objects.count(), 80)
+        self.assertTrue(EventMenu.objects.exists())
+        self.assertTrue(Quote.objects.exists())
+        # Derived data that bulk_create skips has been rebuilt
+        self.assertEqual(verify_menu_totals(), [])
+        self.assertEqual(verify_rollups(), [])
+        self.assertEqual(SearchDocument.objects.filter(kind='event').count(), 60)
+
+    def test_same_seed_generates_the_same_data(self):
+        self.generate(seed=7, label='first')
+        self.generate(seed=7, label='second')
+
+        first = self.snapshot('first')
+        self.assertEqual(len(first), 60)
+        self.assertEqual(first, self.snapshot('second'))
+
+    def test_refuses_to_reuse_a_label(self):
+        self.generate(companies=1, events=5)
+
+        with self.assertRaises(CommandError):
+            self.generate(companies=1, events=5)
+
+
+class EndpointBenchmarkTest(TestCase):
+    def test_measures_every_endpoint(self):
+        anchor = date(2026, 6, 1)
+        generate_load_data(companies=1, events=20, transactions=20, anchor=anchor)
+        owner = User.objects.get(role='owner')
+
+        results = run_benchmarks(owner, iterations=2, anchor=anchor)
+
+        self.assertEqual(set(results), set(ENDPOINTS))
+        for name, metrics in results.items():
+            self.assertEqual(metrics['status'], 200, name)
+            self.assertGreater(metrics['queries'], 0, name)
+            self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'], name)
+            self.assertGreater(metrics['peak_memory_kb'], 0, name)
+
+    def test_compare_reports(self):
+        baseline = {'endpoints': {
+            'events': {'queries': 2, 'p95_ms': 10.0, 'peak_memory_kb': 100.0},
+            'clients': {'queries': 2, 'p95_ms': 10.0, 'peak_memory_kb': 100.0},
+        }}
+        report = {'endpoints': {
+            'events': {'queries': 3, 'p95_ms': 12.0, 'peak_memory_kb': 100.0},
+            'clients': {'queries': 2, 'p95_ms': 20.0, 'peak_memory_kb': 90.0},
+        }}
+
+        self.assertEqual(compare_reports(report, baseline, tolerance=0.25), [
+            ('events', 'queries', 2, 3),
+            ('clients', 'p95_ms', 10.0, 20.0),
+        ])
+
+
+class DataExportTest(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Export Buffet', email='buffet@export.com', phone='(11) 99999-9999')
+        self.user = User.objects.create_user(
+            username='exportuser', email='export@example.com', password='testpass123', company=self.company
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.event = Event.objects.create(
+            company=self.company, created_by=self.user, title='Casamento "Silva", Souza', event_type='wedding',
+            event_date=date(2026, 3, 14), start_time=time(19, 0), end_time=time(23, 0), guest_count=120,
+            client_name='Ana', client_email='ana@example.com', client_phone='(11) 88888-8888',
+            status='proposta_aceita'
+        )
+        Event.objects.create(
+            company=self.company, created_by=self.user, title='Formatura', event_type='graduation',
+            event_date=date(2026, 5, 2), start_time=time(20, 0), end_time=time(23, 0), guest_count=80,
+            client_name='Bruno', client_email='bruno@example.com', client_phone='(11) 77777-7777'
+        )
+        for day, amount, kind in ((1, '1500.00', 'INCOME'), (2, '250.50', 'EXPENSE'), (3, '99.90', 'EXPENSE')):
+            FinancialTransaction.objects.create(
+                company=self.company, description=f'Lançamento {day}', amount=Decimal(amount),
+                transaction_type=kind, transaction_date=date(2026, 3, day), status='COMPLETED',
+                related_event=self.event
+            )
+        Client.objects.create(company=self.company, name='Cliente Export', email='cliente@export.com', phone='1')
+
+    def read_csv(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(content)))
+
+    def read_xlsx(self, content):
+        namespace = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIn('[Content_Types].xml', archive.namelist())
+            sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        return [
+            [''.join(cell.itertext()) for cell in row.findall('s:c', namespace)]
+            for row in sheet.iterfind('s:sheetData/s:row', namespace)
+        ]
+
+    def test_events_csv_uses_the_list_filters(self):
+        rows = self.read_csv(self.client.get(reverse('events:export_events'), {'status': 'proposta_aceita'}))
+
+        self.assertEqual(rows[0][:3], ['id', 'titulo', 'tipo'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Casamento "Silva", Souza')
+        self.assertEqual(rows[1][4:7], ['2026-03-14', '19:00:00', '23:00:00'])
+
+        response = self.client.get(reverse('events:export_events'), {'min_menu_price': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_transactions_xlsx(self):
+        response = self.client.get('/api/financials/transactions/export/', {'format': 'xlsx', 'type': 'EXPENSE'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('transacoes-', response['Content-Disposition'])
+        rows = self.read_xlsx(b''.join(response.streaming_content))
+
+        self.assertEqual(rows[0][:6], ['id', 'data', 'descricao', 'tipo', 'status', 'valor'])
+        # Most recent first, like the list; dates are serial numbers with a date style
+        self.assertEqual([row[2] for row in rows[1:]], ['Lançamento 3', 'Lançamento 2'])
+        self.assertEqual(rows[1][1], str((date(2026, 3, 3) - date(1899, 12, 30)).days))
+        self.assertEqual(rows[1][5], '99.90')
+        self.assertEqual(rows[1][7], self.event.title)
+
+        response = self.client.get('/api/financials/transactions/export/', {'type': 'OTHER'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_streams_in_chunks_without_loading_models(self):
+        response = self.client.get('/api/clients/export/')
+        self.assertEqual(self.read_csv(response)[1][2], 'Cliente Export')
+
+        Client.objects.bulk_create([
+            Client(company=self.company, name=f'Cliente {index:05}', email=f'c{index}@export.com', phone='1')
+            for index in range(EXPORT_CHUNK_SIZE + 10)
+        ])
+        response = self.client.get('/api/clients/export/')
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks).count(b'\n'), EXPORT_CHUNK_SIZE + 12)
+
+    def test_formula_like_text_is_quoted_and_imported_back(self):
+        client = Client.objects.create(
+            company=self.company, name='=HYPERLINK("http://example.com")', email='formula@export.com',
+            phone='+55 11 99999-9999', address='@casa', full_name='-Fulano'
+        )
+        response = self.client.get('/api/clients/export/', {'search': 'hyperlink'})
+        content = b''.join(response.streaming_content)
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(rows[1][11:13], ["'+55 11 99999-9999", "'@casa"])
+
+        client.delete()
+        result = import_csv('clients', self.company, io.BytesIO(content))
+        self.assertEqual(result['created_rows'], 1, result['row_errors'])
+        imported = Client.objects.get(email='formula@export.com')
+        self.assertEqual(
+            (imported.name, imported.full_name, imported.phone, imported.address),
+            ('=HYPERLINK("http://example.com")', '-Fulano', '+55 11 99999-9999', '@casa')
+        )
+
+    def test_command_writes_the_same_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'eventos.xlsx')
+            call_command(
+                'export_data', 'events', f'--company={self.company.pk}', '--format=xlsx', f'--output={path}',
+                '--filter', 'event_type=graduation', stdout=StringIO()
+            )
+            with open(path, 'rb') as output:
+                rows = self.read_xlsx(output.read())
+        self.assertEqual([row[1] for row in rows[1:]], ['Formatura'])
+
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'events', f'--company={self.company.pk}', '--filter', 'status')
+
+
+class BulkImportTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name='Import Buffet', email='buffet@import.com', phone='(11) 99999-9999')
+        self.user = User.objects.create_user(
+            username='importuser', email='import@example.com', password='testpass123', company=self.company
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Client.objects.create(company=self.company, name='Existente', email='existente@example.com', phone='1')
+
+    def upload(self, kind, lines):
+        content = '\n'.join(lines).encode('utf-8')
+        return self.client.post(
+            reverse('companies:import_jobs'),
+            {'kind': kind, 'file': SimpleUploadedFile('dados.csv', content, content_type='text/csv')},
+            format='multipart'
+        )
+
+    def import_clients(self, count, batch_size=100):
+        lines = ['nome,email,telefone'] + [f'Cliente {index},c{index}@example.com,1' for index in range(count)]
+        return import_csv('clients', self.company, io.BytesIO('\n'.join(lines).encode()), batch_size=batch_size)
+
+    def test_clients_are_validated_and_reported_per_row(self):
+        response = self.upload('clients', [
+            'tipo;nome;nome_completo;cpf;email;telefone',
+            'FISICA;Ana;Ana Souza;529.982.247-25;ana@example.com;(11) 1111-1111',
+            'FISICA;Bruno;Bruno Lima;529.982.247-24;bruno@example.com;(11) 2222-2222',
+            'FISICA;Carla;;;carla@example.com;(11) 3333-3333',
+            ';Ana de novo;;;ana@example.com;(11) 4444-4444',
+            ';Existente;;;existente@example.com;(11) 5555-5555',
+            '',
+            ';Diego;;;diego@example.com;(11) 6666-6666',
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(
+            (response.data['total_rows'], response.data['created_rows'], response.data['error_rows']), (6, 2, 4)
+        )
+        errors = {entry['row']: entry['errors'] for entry in response.data['row_errors']}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6])
+        self.assertEqual(errors[3], {'cpf': ['CPF inválido.']})
+        self.assertIn('full_name', errors[4])
+        self.assertEqual(errors[5], {'email': ['E-mail repetido no arquivo (linha 2).']})
+        self.assertIn('email', errors[6])
+
+        self.assertEqual(
+            sorted(Client.objects.filter(company=self.company).values_list('name', flat=True)),
+            ['Ana', 'Diego', 'Existente']
+        )
+        # bulk_create skips the signals: the importer indexes the rows itself
+        self.assertTrue(SearchDocument.objects.filter(kind='client', title='Ana Souza').exists())
+
+    def test_queries_grow_with_batches_not_rows(self):
+        with self.assertQueryBudget(12) as small:
+            self.import_clients(5)
+        with self.assertQueryBudget(len(small.captured_queries)):
+            result = self.import_clients(40)
+        # The first five emails of the second file were imported by the first one
+        self.assertEqual((result['created_rows'], result['error_rows']), (35, 5))
+
+    def test_events_link_clients_and_check_time_slots(self):
+        Event.objects.create(
+            company=self.company, created_by=self.user, title='Ocupado', event_type='other',
+            event_date=date(2026, 9, 5), start_time=time(19, 0), end_time=time(23, 0), guest_count=10,
+            client_name='X', client_email='x@example.com', client_phone='1'
+        )
+        csv_lines = [
+            'titulo,tipo,data,inicio,fim,convidados,cliente_email',
+            'Casamento,wedding,2026-09-12,19:00,23:00,150,existente@example.com',
+            'Conflito,wedding,2026-09-05,19:00,23:00,80,existente@example.com',
+            'Repetido,birthday,2026-09-12,19:00,22:00,30,existente@example.com',
+            'Sem cliente,birthday,2026-09-13,19:00,22:00,30,',
+            'Data ruim,birthday,13/09/2026,19:00,22:00,30,existente@example.com',
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'eventos.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(csv_lines))
+            errors = StringIO()
+            call_command('import_data', 'events', path, f'--company={self.company.pk}', stdout=StringIO(), stderr=errors)
+
+        event = Event.objects.get(title='Casamento')
+        self.assertEqual(event.client.email, 'existente@example.com')
+        self.assertEqual((event.client_name, event.client_phone), ('Existente', '1'))
+        self.assertEqual(event.created_by, None)
+        reported = errors.getvalue()
+        for line in (3, 4, 5, 6):
+            self.assertIn(f'line {line}:', reported)
+        self.assertIn('Dia e horário repetidos no arquivo (linha 2)', reported)
+
+        # The agenda month and the list pick up the imported event
+        response = self.client.get(reverse('events:calendar'), {'year': 2026, 'month': 9})
+        self.assertEqual([row['title'] for row in response.data['events']], ['Ocupado', 'Casamento'])
+
+    def test_large_files_run_as_background_jobs(self):
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', always_eager)
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+
+        with self.settings(IMPORT_SYNC_MAX_BYTES=10, MEDIA_ROOT=media_root.name):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.upload('clients', ['nome,email,telefone', 'Fulano,fulano@example.com,1'])
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        job = ImportJob.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.created_rows), ('done', 1))
+        # Registered on the app the worker service runs (celery -A buffetflow worker)
+        self.assertIn('companies.tasks.run_import_job', celery_app.tasks)
+        self.assertFalse(job.file)
+        self.assertEqual(
+            self.client.get(reverse('companies:import_job_detail', args=[job.pk])).data['status'], 'done'
+        )
+
+    def test_rejects_unknown_kinds_and_headers(self):
+        self.assertEqual(self.upload('menu', ['a,b']).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.upload('clients', ['foo,bar', '1,2'])
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertIn('cabeçalho', response.data['error'])
+
@@ -8,6 +8,8 @@ urlpatterns = [
     path('my-company/', views.my_company_view, name='my_company'),
     path('payment-methods/', views.payment_methods_view, name='payment_methods'),
     path('payment-methods/<int:pk>/', views.payment_method_detail_view, name='payment_method_detail'),
+    path('imports/', views.import_jobs_view, name='import_jobs'),
+    path('imports/<int:job_id>/', views.import_job_detail_view, name='import_job_detail'),
     path('<uuid:pk>/', views.company_detail_view, name='company_detail'),
 ]
 
@@ -2,9 +2,15 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+
 from users.models import Company
-from .models import PaymentMethod
-from .serializers import CompanySerializer, PaymentMethodSerializer, PaymentMethodCreateSerializer
+from .importer import IMPORTERS, run_import
+from .models import ImportJob, PaymentMethod
+from .serializers import CompanySerializer, ImportJobSerializer, PaymentMethodSerializer, PaymentMethodCreateSerializer
+from .tasks import run_import_job
 
 
 @api_view(['GET', 'POST'])
@@ -177,3 +183,43 @@ def payment_method_detail_view(request, pk):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_jobs_view(request):
+    """
+    Import clients or events from an uploaded CSV (``kind`` and ``file``).
+    Small files are imported right away (201); larger ones are queued as a
+    background job to poll (202).
+    """
+    company = request.user.company
+    if not company:
+        return Response({'detail': 'User does not have a company associated.'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        jobs = ImportJob.objects.filter(company=company)[:20]
+        return Response(ImportJobSerializer(jobs, many=True).data)
+
+    kind = request.data.get('kind')
+    upload = request.FILES.get('file')
+    if kind not in IMPORTERS:
+        return Response({'kind': [f'Escolha um destes: {", ".join(IMPORTERS)}']}, status=status.HTTP_400_BAD_REQUEST)
+    if upload is None:
+        return Response({'file': ['Envie um arquivo CSV.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    job = ImportJob.objects.create(company=company, requested_by=request.user, kind=kind)
+    if upload.size <= settings.IMPORT_SYNC_MAX_BYTES:
+        run_import(job, upload)
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_201_CREATED)
+
+    job.file.save(upload.name, upload)
+    transaction.on_commit(lambda: run_import_job.delay(job.id))
+    return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def import_job_detail_view(request, job_id):
+    """Poll the progress and the row errors of an import"""
+    job = get_object_or_404(ImportJob, id=job_id, company=request.user.company)
+    return Response(ImportJobSerializer(job).data)
+
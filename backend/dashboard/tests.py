@@ -1,3 +1,287 @@
-from django.test import TestCase
+import json
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buffetflow.request_metrics import reset_request_metrics
+from buffetflow.testing import QueryBudgetMixin
+from clients.models import Client
+from events.models import Event
+from users.models import Company
+
+User = get_user_model()
+
+
+class DashboardSummaryTestCase(QueryBudgetMixin, TestCase):
+    SUMMARY_QUERY_BUDGET = 3
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.company = Company.objects.create(
+            name='Summary Buffet',
+            email='buffet@summary.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='summaryuser',
+            email='summary@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        Client.objects.create(
+            name='Cliente Novo',
+            email='novo@example.com',
+            phone='(11) 88888-8888',
+            company=self.company
+        )
+
+        today = date.today()
+        statuses = ['proposta_aceita', 'concluido', 'proposta_pendente', 'proposta_enviada']
+        for index, event_status in enumerate(statuses):
+            self.create_event(today + timedelta(days=index + 1), event_status, 100 + index * 10, Decimal('1000.00'))
+
+    def create_event(self, event_date, event_status, guest_count, value):
+        return Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title=f'Evento {event_status}',
+            event_type='wedding',
+            event_date=event_date,
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=guest_count,
+            status=event_status,
+            value=value
+        )
+
+    def test_summary_matches_individual_endpoints(self):
+        """The summary returns the same data as the four dashboard endpoints"""
+        response = self.client.get('/api/dashboard/summary/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        stats = self.client.get('/api/dashboard/stats/').data
+        self.assertEqual(response.data['stats'], stats)
+        self.assertEqual(stats['total_events'], 4)
+        self.assertEqual(stats['confirmed_events'], 2)
+        self.assertEqual(stats['pending_proposals'], 2)
+        self.assertEqual(stats['avg_guest_count'], 115)
+        self.assertEqual(stats['new_clients_this_month'], 1)
+
+        upcoming = self.client.get('/api/dashboard/upcoming_events/').data
+        self.assertEqual(response.data['upcoming_events'], upcoming)
+
+        distribution = self.client.get('/api/dashboard/event_status_distribution/').data
+        self.assertEqual(response.data['event_status_distribution'], list(distribution))
+
+    def test_revenue_chart_is_gap_filled(self):
+        """The revenue series always has six months, oldest first"""
+        self.create_event(date.today().replace(day=1) - timedelta(days=40), 'concluido', 80, Decimal('500.00'))
+
+        response = self.client.get('/api/dashboard/summary/')
+
+        chart = response.data['monthly_revenue_chart']
+        self.assertEqual(len(chart), 6)
+        self.assertEqual(chart[-1]['month'], date.today().strftime('%b'))
+        self.assertEqual(chart[-3]['revenue'], 500.0)
+
+    def test_revenue_chart_endpoint_matches_summary(self):
+        """The standalone chart has the same gap-filled months and leaves future events out"""
+        self.create_event(date.today() + relativedelta(months=2), 'concluido', 80, Decimal('700.00'))
+        # Confirmed but without a value: an empty month, not an error
+        self.create_event(date.today().replace(day=1) - timedelta(days=70), 'concluido', 80, None)
+
+        chart = self.client.get('/api/dashboard/monthly_revenue_chart/').data
+        self.assertEqual(chart, self.client.get('/api/dashboard/summary/').data['monthly_revenue_chart'])
+        self.assertEqual(len(chart), 6)
+        self.assertEqual(chart[-1]['month'], date.today().strftime('%b'))
+        # Only the two confirmed events of setUp (1 and 2 days ahead) that fall in the current month count
+        this_month = sum(1000.0 for days in (1, 2) if (date.today() + timedelta(days=days)).month == date.today().month)
+        self.assertEqual(sum(month['revenue'] for month in chart), this_month)
+
+    def test_stats_only_aggregate_the_kpis(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/dashboard/stats/')
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('proposta_recusada', queries[0]['sql'])
+
+    def test_summary_within_query_budget(self):
+        """The summary runs a fixed number of queries"""
+        for index in range(20):
+            self.create_event(date.today() + timedelta(days=10 + index), 'proposta_aceita', 50, Decimal('200.00'))
+
+        with self.assertQueryBudget(self.SUMMARY_QUERY_BUDGET):
+            response = self.client.get('/api/dashboard/summary/')
+
+        self.assertEqual(response.data['stats']['total_events'], 24)
+
+
+class DashboardCacheTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.company = Company.objects.create(
+            name='Cache Buffet',
+            email='buffet@cache.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_event(self, event_status='proposta_aceita', days_ahead=3):
+        return Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title='Evento',
+            event_type='wedding',
+            event_date=date.today() + timedelta(days=days_ahead),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=100,
+            status=event_status,
+            value=Decimal('1000.00')
+        )
+
+    def test_second_request_is_served_from_cache(self):
+        self.create_event()
+        first = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertQueryBudget(0):
+            second = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_event_write_invalidates_cached_responses(self):
+        self.create_event()
+        self.assertEqual(self.client.get('/api/dashboard/stats/').data['total_events'], 1)
+
+        self.create_event('proposta_pendente', days_ahead=4)
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_events'], 2)
+
+    def test_cached_responses_expire_at_midnight(self):
+        self.client.get('/api/dashboard/stats/')
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with patch('buffetflow.cache.timezone.localdate', return_value=tomorrow):
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_cache_is_scoped_per_company(self):
+        self.create_event()
+        self.client.get('/api/dashboard/stats/')
+
+        other_company = Company.objects.create(name='Outro Buffet', email='outro@buffet.com', phone='(11) 7777-7777')
+        other_user = User.objects.create_user(
+            username='otheruser', email='other@example.com', password='testpass123', company=other_company
+        )
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total_events'], 0)
+
+    def test_cache_stats_count_hits_and_misses(self):
+        self.user.is_staff = True
+        self.user.save()
+        before = self.client.get('/api/dashboard/cache-stats/').data['financial-summary']
+
+        self.client.get('/api/financial-summary/')
+        self.client.get('/api/financial-summary/')
+
+        after = self.client.get('/api/dashboard/cache-stats/').data['financial-summary']
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Metrics Buffet',
+            email='buffet@metrics.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='metricsuser',
+            email='metrics@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.admin = User.objects.create_user(
+            username='metricsadmin',
+            email='admin@metrics.com',
+            password='testpass123',
+            is_staff=True
+        )
+        reset_request_metrics()
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(';')[0], part) for part in response['Server-Timing'].split(', ')
+        )
+
+    def test_server_timing_header(self):
+        self.client.force_authenticate(user=self.user)
+
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=True):
+            response = self.client.get('/api/events/')
+        self.assertEqual(set(self.server_timing(response)), {'db', 'view', 'render', 'total'})
+        self.assertRegex(self.server_timing(response)['db'], r'desc="[1-9]\d* queries"')
+
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=False):
+            response = self.client.get('/api/events/')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        self.client.force_authenticate(user=self.user)
+
+        with override_settings(REQUEST_METRICS_SLOW_MS=0), self.assertLogs('buffetflow.requests', 'WARNING') as logs:
+            self.client.get('/api/events/')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['endpoint'], 'GET /api/events/')
+        self.assertEqual(record['status'], 200)
+        self.assertTrue(record['slowest_sql'])
+        self.assertIn('SELECT', record['slowest_sql'][0]['sql'])
+
+    def test_endpoint_aggregates(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/events/')
+        self.client.get('/api/events/')
+
+        response = self.client.get('/api/dashboard/request-metrics/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/dashboard/request-metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = {row['endpoint']: row for row in response.data['endpoints']}
+        events = rows['GET /api/events/']
+        self.assertEqual(events['count'], 2)
+        self.assertGreater(events['avg_queries'], 0)
+        self.assertIsNotNone(events['p95_ms_at_most'])
@@ -1,14 +1,20 @@
 from django.urls import path
 from .views import (
+    get_dashboard_summary,
     get_dashboard_stats,
     get_upcoming_events,
     get_event_status_distribution,
     get_monthly_revenue_chart,
+    get_cache_stats,
+    get_request_metrics,
 )
 
 urlpatterns = [
+    path('summary/', get_dashboard_summary, name='dashboard-summary'),
     path('stats/', get_dashboard_stats, name='dashboard-stats'),
     path('upcoming_events/', get_upcoming_events, name='dashboard-upcoming-events'),
     path('event_status_distribution/', get_event_status_distribution, name='dashboard-event-status-distribution'),
     path('monthly_revenue_chart/', get_monthly_revenue_chart, name='dashboard-monthly-revenue-chart'),
+    path('cache-stats/', get_cache_stats, name='dashboard-cache-stats'),
+    path('request-metrics/', get_request_metrics, name='dashboard-request-metrics'),
 ]
@@ -1,66 +1,126 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Avg
-from django.db.models.functions import TruncMonth
+from django.db.models import Count, Sum, Avg, Q
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
+from buffetflow.cache import cached_per_company, cache_stats, conditional_per_company, CACHED_VIEWS
+from buffetflow.request_metrics import endpoint_metrics
 from events.models import Event
 from clients.models import Client
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_dashboard_stats(request):
-    company = request.user.company
-    
-    # Date calculations
-    today = datetime.now().date()
-    current_month_start = today.replace(day=1)
-    
-    # Queries
-    total_events = Event.objects.filter(company=company).count()
-    confirmed_events = Event.objects.filter(company=company, status__in=['proposta_aceita', 'em_execucao', 'pos_evento', 'concluido']).count()
-    
-    monthly_revenue = Event.objects.filter(
-        company=company, 
-        event_date__gte=current_month_start,
-        status__in=['proposta_aceita', 'em_execucao', 'pos_evento', 'concluido']
-    ).aggregate(total=Sum('value'))['total'] or 0
-    
-    avg_guest_count = Event.objects.filter(company=company).aggregate(avg=Avg('guest_count'))['avg'] or 0
-    
-    pending_proposals = Event.objects.filter(company=company, status__in=['proposta_pendente', 'proposta_enviada']).count()
-    
-    new_clients_this_month = Client.objects.filter(
+CONFIRMED_STATUSES = ['proposta_aceita', 'em_execucao', 'pos_evento', 'concluido']
+PENDING_STATUSES = ['proposta_pendente', 'proposta_enviada']
+REVENUE_CHART_MONTHS = 6
+
+
+def revenue_chart_months(today):
+    """First day of each month shown in the revenue chart, oldest first"""
+    first_month = today.replace(day=1) - relativedelta(months=REVENUE_CHART_MONTHS - 1)
+    return [first_month + relativedelta(months=offset) for offset in range(REVENUE_CHART_MONTHS + 1)]
+
+
+def stats_aggregates(today):
+    """Aggregates behind the event KPIs"""
+    confirmed = Q(status__in=CONFIRMED_STATUSES)
+    return {
+        'total_events': Count('id'),
+        'confirmed_events': Count('id', filter=confirmed),
+        'monthly_revenue': Sum('value', filter=confirmed & Q(event_date__gte=today.replace(day=1))),
+        'avg_guest_count': Avg('guest_count'),
+        'pending_proposals': Count('id', filter=Q(status__in=PENDING_STATUSES)),
+    }
+
+
+def stats_from(totals):
+    return {
+        'total_events': totals['total_events'],
+        'confirmed_events': totals['confirmed_events'],
+        'monthly_revenue': totals['monthly_revenue'] or 0,
+        'avg_guest_count': round(totals['avg_guest_count'] or 0, 2),
+        'pending_proposals': totals['pending_proposals'],
+    }
+
+
+def status_aggregates():
+    """One count per event status"""
+    return {
+        f'status__{status_value}': Count('id', filter=Q(status=status_value))
+        for status_value, _ in Event.STATUS_CHOICES
+    }
+
+
+def status_distribution_from(totals):
+    return [
+        {'status': status_value, 'count': totals[f'status__{status_value}']}
+        for status_value in sorted(value for value, _ in Event.STATUS_CHOICES)
+        if totals[f'status__{status_value}']
+    ]
+
+
+def revenue_chart_aggregates(today):
+    """Confirmed revenue of each chart month, up to the current one"""
+    confirmed = Q(status__in=CONFIRMED_STATUSES)
+    months = revenue_chart_months(today)
+    return {
+        f'revenue__{index}': Sum('value', filter=confirmed & Q(
+            event_date__gte=month_start,
+            event_date__lt=months[index + 1],
+        ))
+        for index, month_start in enumerate(months[:-1])
+    }
+
+
+def revenue_chart_from(totals, today):
+    """The revenue series for recharts: every chart month, oldest first, empty months as 0"""
+    return [
+        {
+            'month': month_start.strftime('%b'),
+            'revenue': float(totals[f'revenue__{index}'] or 0)
+        } for index, month_start in enumerate(revenue_chart_months(today)[:-1])
+    ]
+
+
+def aggregate_event_summary(company, today):
+    """
+    Compute every event KPI, the status distribution and the revenue series
+    with a single conditional aggregate over the company's events.
+    """
+    totals = Event.objects.filter(company=company).aggregate(
+        **stats_aggregates(today), **status_aggregates(), **revenue_chart_aggregates(today)
+    )
+    return stats_from(totals), status_distribution_from(totals), revenue_chart_from(totals, today)
+
+
+def aggregate_event_stats(company, today):
+    """Only the event KPIs, in one aggregate"""
+    return stats_from(Event.objects.filter(company=company).aggregate(**stats_aggregates(today)))
+
+
+def monthly_revenue_chart(company, today):
+    """Only the revenue series, in one aggregate"""
+    totals = Event.objects.filter(company=company).aggregate(**revenue_chart_aggregates(today))
+    return revenue_chart_from(totals, today)
+
+
+def count_new_clients(company, today):
+    return Client.objects.filter(
         company=company,
-        created_at__gte=current_month_start
+        created_at__gte=today.replace(day=1)
     ).count()
 
-    stats = {
-        'total_events': total_events,
-        'confirmed_events': confirmed_events,
-        'monthly_revenue': monthly_revenue,
-        'avg_guest_count': round(avg_guest_count, 2),
-        'pending_proposals': pending_proposals,
-        'new_clients_this_month': new_clients_this_month,
-    }
-    
-    return Response(stats)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_upcoming_events(request):
-    company = request.user.company
-    today = datetime.now().date()
-    
+def upcoming_events_data(company, today):
     upcoming = Event.objects.filter(
         company=company,
         event_date__gte=today,
         status__in=['proposta_aceita', 'em_execucao']
-    ).order_by('event_date', 'start_time')[:5]
-    
-    data = [
+    ).order_by('event_date', 'start_time').only(
+        'id', 'title', 'event_date', 'start_time', 'guest_count', 'status', 'client_name'
+    )[:5]
+
+    return [
         {
             'id': event.id,
             'title': event.title,
@@ -71,11 +131,57 @@ def get_upcoming_events(request):
             'clientName': event.client_name
         } for event in upcoming
     ]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_per_company('dashboard-summary')
+@cached_per_company('dashboard-summary')
+def get_dashboard_summary(request):
+    """
+    Everything the dashboard overview needs in one round trip.
+
+    Query budget: 3 queries (event aggregate, new clients count, upcoming events).
+    """
+    company = request.user.company
+    today = datetime.now().date()
+
+    stats, status_distribution, revenue_chart = aggregate_event_summary(company, today)
+    stats['new_clients_this_month'] = count_new_clients(company, today)
+
+    return Response({
+        'stats': stats,
+        'upcoming_events': upcoming_events_data(company, today),
+        'event_status_distribution': status_distribution,
+        'monthly_revenue_chart': revenue_chart,
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_per_company('dashboard-stats')
+@cached_per_company('dashboard-stats')
+def get_dashboard_stats(request):
+    company = request.user.company
+    today = datetime.now().date()
+
+    stats = aggregate_event_stats(company, today)
+    stats['new_clients_this_month'] = count_new_clients(company, today)
+
+    return Response(stats)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_per_company('dashboard-upcoming-events')
+def get_upcoming_events(request):
+    company = request.user.company
+    today = datetime.now().date()
     
-    return Response(data)
+    return Response(upcoming_events_data(company, today))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_per_company('dashboard-event-status-distribution')
+@cached_per_company('dashboard-event-status-distribution')
 def get_event_status_distribution(request):
     company = request.user.company
     
@@ -84,32 +190,25 @@ def get_event_status_distribution(request):
         .annotate(count=Count('id'))\
         .order_by('status')
         
-    return Response(status_distribution)
+    return Response(list(status_distribution))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional_per_company('dashboard-monthly-revenue-chart')
+@cached_per_company('dashboard-monthly-revenue-chart')
 def get_monthly_revenue_chart(request):
     company = request.user.company
-    
-    # Get data for the last 6 months
-    six_months_ago = datetime.now().date() - relativedelta(months=5)
-    six_months_ago = six_months_ago.replace(day=1)
+    return Response(monthly_revenue_chart(company, datetime.now().date()))
 
-    revenue_data = Event.objects.filter(
-        company=company,
-        event_date__gte=six_months_ago,
-        status__in=['proposta_aceita', 'em_execucao', 'pos_evento', 'concluido']
-    ).annotate(month=TruncMonth('event_date'))\
-     .values('month')\
-     .annotate(revenue=Sum('value'))\
-     .order_by('month')
-
-    # Format for recharts
-    chart_data = [
-        {
-            'month': item['month'].strftime('%b'), # e.g., 'Jan'
-            'revenue': float(item['revenue'])
-        } for item in revenue_data
-    ]
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_cache_stats(request):
+    """Hit/miss counters of the per-company response cache"""
+    return Response(cache_stats(CACHED_VIEWS))
 
-    return Response(chart_data)
\ No newline at end of file
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_request_metrics(request):
+    """Timing and query aggregates per endpoint, with samples of slow requests"""
+    return Response(endpoint_metrics())
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Event, MenuItem, EventMenu
+from .models import Event, MenuItem, EventMenu, ProposalPDFJob, CalendarFeed
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -7,7 +7,7 @@ class EventAdmin(admin.ModelAdmin):
                     'guest_count', 'status', 'company', 'created_at')
     list_filter = ('event_type', 'status', 'company', 'event_date', 'created_at')
     search_fields = ('title', 'client__name', 'client__email', 'description')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('menu_cost_total', 'menu_price_total', 'created_at', 'updated_at')
     date_hierarchy = 'event_date'
 
     fieldsets = (
@@ -21,7 +21,7 @@ class EventAdmin(admin.ModelAdmin):
             'fields': ('event_date', 'start_time', 'end_time', 'guest_count', 'venue_location')
         }),
         ('Status & Pricing', {
-            'fields': ('status', 'estimated_cost', 'final_price')
+            'fields': ('status', 'estimated_cost', 'final_price', 'menu_cost_total', 'menu_price_total')
         }),
         ('Additional Information', {
             'fields': ('special_requirements', 'notes')
@@ -66,3 +66,18 @@ class EventMenuAdmin(admin.ModelAdmin):
     
     def total_price(self, obj):
         return f"R$ {obj.total_price():.2f}"
+
+
+@admin.register(ProposalPDFJob)
+class ProposalPDFJobAdmin(admin.ModelAdmin):
+    list_display = ('event', 'status', 'cache_hit', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'cache_hit', 'created_at')
+    search_fields = ('event__title', 'fingerprint')
+    readonly_fields = ('fingerprint', 'created_at', 'finished_at')
+
+
+@admin.register(CalendarFeed)
+class CalendarFeedAdmin(admin.ModelAdmin):
+    list_display = ('company', 'created_at', 'updated_at')
+    search_fields = ('company__name',)
+    readonly_fields = ('token', 'created_at', 'updated_at')
@@ -0,0 +1,181 @@
+"""
+Agenda (calendar) payloads served from per-company month buckets.
+
+The serialized ``EventAgendaSerializer`` rows of each (company, month) are
+cached as one bucket and any requested range is assembled from the buckets
+of the months it spans; only the months missing from the cache are loaded,
+with a single query. Each bucket key embeds a per-month version, and an
+Event write bumps only the versions of the months it touches (the old and
+the new date), so paging back and forth in the agenda costs no queries.
+
+Versions live under a per-company epoch that is reset when a company is
+created, so ids reused by a new company never see stale buckets.
+"""
+import time
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import Company
+from .models import Event
+from .serializers import EventAgendaSerializer
+
+KEY_PREFIX = 'agenda'
+MAX_RANGE_MONTHS = 24
+
+
+class AgendaRangeError(ValueError):
+    pass
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def months_between(start, end):
+    """First day of every month from start to end, inclusive"""
+    months = []
+    current = month_start(start)
+    while current <= end:
+        months.append(current)
+        current += relativedelta(months=1)
+    return months
+
+
+def _epoch(company_id):
+    key = f'{KEY_PREFIX}:{company_id}:epoch'
+    epoch = cache.get(key)
+    if epoch is None:
+        epoch = time.time_ns()
+        if not cache.add(key, epoch, timeout=None):
+            epoch = cache.get(key, epoch)
+    return epoch
+
+
+def reset_agenda(company_id):
+    cache.set(f'{KEY_PREFIX}:{company_id}:epoch', time.time_ns(), timeout=None)
+
+
+def _version_key(company_id, epoch, month):
+    return f'{KEY_PREFIX}:{company_id}:{epoch}:{month:%Y-%m}:version'
+
+
+def _month_versions(company_id, epoch, months):
+    keys = {month: _version_key(company_id, epoch, month) for month in months}
+    stored = cache.get_many(keys.values())
+
+    versions = {}
+    for month, key in keys.items():
+        version = stored.get(key)
+        if version is None:
+            # Time based, so a version that was evicted never restarts at an old value
+            version = time.time_ns()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[month] = version
+    return versions
+
+
+def invalidate_months(company_id, days):
+    """Bump the versions of the months containing ``days``"""
+    if not company_id:
+        return
+    epoch = _epoch(company_id)
+    for month in {month_start(day) for day in days if day}:
+        key = _version_key(company_id, epoch, month)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def load_months(company_id, months):
+    """{month: serialized agenda rows} straight from the database, with one query"""
+    if not months:
+        return {}
+
+    in_months = Q()
+    for month in months:
+        in_months |= Q(event_date__gte=month, event_date__lt=month + relativedelta(months=1))
+    events = EventAgendaSerializer.setup_queryset(
+        Event.objects.filter(in_months, company_id=company_id).order_by('event_date', 'start_time')
+    )
+
+    buckets = {month: [] for month in months}
+    rows = EventAgendaSerializer(events, many=True).data
+    for event, row in zip(events, rows):
+        buckets[month_start(event.event_date)].append(dict(row))
+    return buckets
+
+
+def month_buckets(company_id, months):
+    """{month: serialized agenda rows}, from the cache where possible"""
+    epoch = _epoch(company_id)
+    versions = _month_versions(company_id, epoch, months)
+    keys = {month: f'{KEY_PREFIX}:{company_id}:{epoch}:{month:%Y-%m}:v{versions[month]}' for month in months}
+
+    stored = cache.get_many(keys.values())
+    buckets = {month: stored[key] for month, key in keys.items() if key in stored}
+
+    loaded = load_months(company_id, [month for month in months if month not in buckets])
+    if loaded:
+        cache.set_many({keys[month]: rows for month, rows in loaded.items()}, settings.AGENDA_CACHE_TIMEOUT)
+        buckets.update(loaded)
+    return buckets
+
+
+def agenda_events(company_id, start, end):
+    """Serialized agenda rows of the company between start and end (inclusive), in agenda order"""
+    months = months_between(start, end)
+    if len(months) > MAX_RANGE_MONTHS:
+        raise AgendaRangeError(f'The requested range spans more than {MAX_RANGE_MONTHS} months')
+
+    buckets = month_buckets(company_id, months)
+    first, last = start.isoformat(), end.isoformat()
+    return [row for month in months for row in buckets[month] if first <= row['event_date'] <= last]
+
+
+def _invalidate(company_id, days):
+    invalidate_months(company_id, days)
+    # Again after commit: a concurrent request may have cached the months
+    # with the data from before this transaction in the meantime
+    transaction.on_commit(lambda: invalidate_months(company_id, days))
+
+
+@receiver(pre_save, sender=Event)
+def agenda_event_pre_save(sender, instance, raw=False, **kwargs):
+    instance._agenda_previous = None
+    if not raw and instance.pk:
+        instance._agenda_previous = Event.objects.filter(pk=instance.pk).values_list(
+            'company_id', 'event_date'
+        ).first()
+
+
+@receiver(post_save, sender=Event)
+def agenda_event_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_agenda_previous', None)
+    instance._agenda_previous = None
+    if previous and previous[0] != instance.company_id:
+        _invalidate(previous[0], [previous[1]])
+    days = [Event._meta.get_field('event_date').to_python(instance.event_date)]
+    if previous and previous[0] == instance.company_id:
+        days.append(previous[1])
+    _invalidate(instance.company_id, days)
+
+
+@receiver(post_delete, sender=Event)
+def agenda_event_deleted(sender, instance, **kwargs):
+    _invalidate(instance.company_id, [instance.event_date])
+
+
+@receiver(post_save, sender=Company)
+def agenda_company_created(sender, instance, created=False, **kwargs):
+    if created:
+        reset_agenda(instance.pk)
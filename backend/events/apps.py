@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'events'
+
+    def ready(self):
+        from buffetflow.cache import invalidate_on_change
+        from .models import Event, MenuItem
+        # Connect the signal handlers that keep the denormalized menu totals
+        # and the agenda month buckets in sync
+        from . import agenda, menu_totals  # noqa: F401
+
+        invalidate_on_change(Event, lambda event: event.company_id)
+        invalidate_on_change(MenuItem, lambda menu_item: menu_item.company_id)
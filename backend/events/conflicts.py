@@ -0,0 +1,151 @@
+"""
+Scheduling conflict detection for events.
+
+Conflicts are found with a sweep-line over events sorted by
+(event_date, start_time), so a whole company/date range is checked with a
+single query instead of one query per event.
+"""
+import heapq
+from collections import namedtuple
+from datetime import time
+
+from .models import Event
+
+# Events in these statuses block the time slot for any other event
+CONFLICT_STATUSES = ['proposta_aceita', 'em_execucao']
+
+ConflictResult = namedtuple('ConflictResult', ['groups', 'conflicting_ids'])
+
+
+def _normalized_end(start_time, end_time):
+    # Events that cross midnight (e.g. 20:00 - 01:00) occupy the rest of the day
+    if end_time < start_time:
+        return time.max
+    return end_time
+
+
+def overlapping_pairs(rows):
+    """
+    Yield every overlapping pair from rows of
+    (id, event_date, start_time, end_time, status), sorted by
+    (event_date, start_time).
+
+    Each yielded item is (earlier_row, later_row).
+    """
+    current_date = None
+    active = []  # heap of (end_time, start_time, row)
+
+    for row in rows:
+        _, event_date, start_time, end_time, _ = row
+        if event_date != current_date:
+            current_date = event_date
+            active = []
+
+        # Drop events that finished before this one starts
+        while active and active[0][0] <= start_time:
+            heapq.heappop(active)
+
+        end = _normalized_end(start_time, end_time)
+        for _, other_start, other in active:
+            if end > other_start:
+                yield other, row
+
+        heapq.heappush(active, (end, start_time, row))
+
+
+def detect_conflicts(rows, blocking_statuses=CONFLICT_STATUSES):
+    """
+    Run the sweep-line over pre-sorted rows and build the conflict result.
+
+    An event is conflicting when it overlaps another event whose status is in
+    ``blocking_statuses``. Overlapping events are grouped per day into
+    connected components.
+    """
+    parent = {}
+
+    def find(event_id):
+        while parent[event_id] != event_id:
+            parent[event_id] = parent[parent[event_id]]
+            event_id = parent[event_id]
+        return event_id
+
+    conflicting_ids = set()
+    dates = {}
+
+    for first, second in overlapping_pairs(rows):
+        first_blocks = first[4] in blocking_statuses
+        second_blocks = second[4] in blocking_statuses
+        if not (first_blocks or second_blocks):
+            continue
+
+        if second_blocks:
+            conflicting_ids.add(first[0])
+        if first_blocks:
+            conflicting_ids.add(second[0])
+
+        for event_id in (first[0], second[0]):
+            parent.setdefault(event_id, event_id)
+        dates[first[0]] = dates[second[0]] = first[1]
+
+        root_first, root_second = find(first[0]), find(second[0])
+        if root_first != root_second:
+            parent[root_second] = root_first
+
+    members = {}
+    for event_id in parent:
+        members.setdefault(find(event_id), []).append(event_id)
+
+    groups = sorted(
+        ({'event_date': dates[root], 'event_ids': sorted(ids)} for root, ids in members.items()),
+        key=lambda group: (group['event_date'], group['event_ids'][0])
+    )
+    return ConflictResult(groups=groups, conflicting_ids=conflicting_ids)
+
+
+def conflict_rows(company, start_date=None, end_date=None, statuses=None, dates=None):
+    """Return the sorted rows the sweep-line needs, in a single query."""
+    events = Event.objects.filter(company=company)
+    if dates is not None:
+        events = events.filter(event_date__in=dates)
+    if start_date:
+        events = events.filter(event_date__gte=start_date)
+    if end_date:
+        events = events.filter(event_date__lte=end_date)
+    if statuses:
+        events = events.filter(status__in=statuses)
+
+    return events.order_by('event_date', 'start_time', 'id').values_list(
+        'id', 'event_date', 'start_time', 'end_time', 'status'
+    )
+
+
+def find_conflicts(company, start_date=None, end_date=None, statuses=None):
+    """
+    Find every scheduling conflict for a company in the given date range.
+
+    ``statuses`` restricts which events are considered at all; by default
+    every event is checked against the blocking ones.
+    """
+    return detect_conflicts(conflict_rows(company, start_date, end_date, statuses))
+
+
+def conflicting_ids_for(company, events):
+    """
+    Build the conflict map for an already fetched list of events (e.g. a page
+    of a list endpoint), checking only the days those events fall on.
+    """
+    dates = {event.event_date for event in events}
+    if not dates:
+        return set()
+    return detect_conflicts(conflict_rows(company, dates=dates)).conflicting_ids
+
+
+def event_conflicts(event):
+    """Return the conflict result for the day of a single (possibly unsaved) event."""
+    rows = [
+        row for row in conflict_rows(event.company_id, event.event_date, event.event_date)
+        if row[0] != event.pk
+    ]
+    rows.append((event.pk, event.event_date, event.start_time, event.end_time, event.status))
+    rows.sort(key=lambda row: row[2])
+    return detect_conflicts(rows)
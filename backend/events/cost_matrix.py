@@ -0,0 +1,104 @@
+"""
+Batch cost calculator.
+
+Every referenced menu item is fetched with one ``id__in`` query. Then each
+menu selection is reduced once to its cost and list price per guest, so
+the whole guest count x selection x margin matrix is a multiplication per
+cell. No cell needs another query or another pass over the items.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import product
+
+from .models import Event, EventMenu, MenuItem
+
+DEFAULT_MARGINS = (Decimal('30'),)
+MAX_SCENARIOS = 5000
+CENTS = Decimal('0.01')
+
+
+class CostMatrixError(ValueError):
+    pass
+
+
+def per_guest_totals(selection, menu_items):
+    """(cost, price) per guest of a {menu_item_id: quantity} selection"""
+    cost = price = Decimal('0')
+    for menu_item_id, quantity in selection.items():
+        menu_item = menu_items[menu_item_id]
+        cost += menu_item.cost_per_person * quantity
+        price += menu_item.price_per_person * quantity
+    return cost, price
+
+
+def _money(value):
+    return float(value.quantize(CENTS, rounding=ROUND_HALF_UP))
+
+
+def scenario_row(label, event_id, guests, margin, cost_per_guest, price_per_guest):
+    cost = cost_per_guest * guests
+    suggested_price = cost * (1 + margin / 100)
+    return {
+        'label': label,
+        'event_id': event_id,
+        'guests': guests,
+        'margin': float(margin),
+        'cost': _money(cost),
+        'price': _money(price_per_guest * guests),
+        'suggested_price': _money(suggested_price),
+        'profit': _money(suggested_price - cost),
+    }
+
+
+def event_selections(company, event_ids):
+    """{event_id: (title, guest_count, selection)} for the saved menus of the given events"""
+    events = {
+        event_id: (title, guest_count, {})
+        for event_id, title, guest_count in Event.objects.filter(company=company, id__in=event_ids).values_list(
+            'id', 'title', 'guest_count'
+        )
+    }
+    for event_id, menu_item_id, quantity in EventMenu.objects.filter(event_id__in=events).values_list(
+        'event_id', 'menu_item_id', 'quantity'
+    ):
+        events[event_id][2][menu_item_id] = quantity
+    return events
+
+
+def cost_matrix(company, menus=(), guest_counts=(), margins=DEFAULT_MARGINS, event_ids=()):
+    """
+    Cost/price of every (menu, guest count, margin) combination, plus every
+    saved event menu at its own guest count for each margin.
+    """
+    margins = list(margins) or list(DEFAULT_MARGINS)
+    events = event_selections(company, event_ids) if event_ids else {}
+
+    missing_events = sorted(set(event_ids) - set(events))
+    if missing_events:
+        raise CostMatrixError(f'Eventos não encontrados: {", ".join(map(str, missing_events))}')
+
+    scenario_count = len(menus) * len(guest_counts) * len(margins) + len(events) * len(margins)
+    if scenario_count > MAX_SCENARIOS:
+        raise CostMatrixError(f'No máximo {MAX_SCENARIOS} cenários por requisição')
+
+    referenced_ids = {menu_item_id for menu in menus for menu_item_id in menu['items']}
+    referenced_ids.update(menu_item_id for _, _, selection in events.values() for menu_item_id in selection)
+    menu_items = MenuItem.objects.filter(company=company, id__in=referenced_ids).only(
+        'id', 'cost_per_person', 'price_per_person'
+    ).in_bulk()
+
+    missing_items = sorted(referenced_ids - set(menu_items))
+    if missing_items:
+        raise CostMatrixError(f'Itens do cardápio não encontrados: {", ".join(map(str, missing_items))}')
+
+    rows = []
+    for menu in menus:
+        cost_per_guest, price_per_guest = per_guest_totals(menu['items'], menu_items)
+        for guests, margin in product(guest_counts, margins):
+            rows.append(scenario_row(menu['label'], None, guests, margin, cost_per_guest, price_per_guest))
+
+    for event_id, (title, guest_count, selection) in events.items():
+        cost_per_guest, price_per_guest = per_guest_totals(selection, menu_items)
+        for margin in margins:
+            rows.append(scenario_row(title, event_id, guest_count, margin, cost_per_guest, price_per_guest))
+
+    return rows
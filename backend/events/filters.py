@@ -0,0 +1,54 @@
+from decimal import Decimal, InvalidOperation
+
+from search.backends import matching_object_ids
+
+
+class EventFilterError(ValueError):
+    pass
+
+
+def _menu_price(value):
+    """Decimal of a menu value filter, None when absent; NaN and infinity are rejected"""
+    if not value:
+        return None
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        value = None
+    if value is None or not value.is_finite():
+        raise EventFilterError('min_menu_price e max_menu_price devem ser números')
+    return value
+
+
+def filter_events(events, params, company_id):
+    """
+    Apply the event list filters (date range, status, type, menu value and
+    search) given as query parameters; shared by the list and the export.
+    """
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if start_date:
+        events = events.filter(event_date__gte=start_date)
+    if end_date:
+        events = events.filter(event_date__lte=end_date)
+
+    status_filter = params.get('status')
+    if status_filter:
+        events = events.filter(status=status_filter)
+
+    event_type = params.get('event_type')
+    if event_type:
+        events = events.filter(event_type=event_type)
+
+    # Menu value is denormalized on the event
+    min_menu_price = _menu_price(params.get('min_menu_price'))
+    max_menu_price = _menu_price(params.get('max_menu_price'))
+    if min_menu_price is not None:
+        events = events.filter(menu_price_total__gte=min_menu_price)
+    if max_menu_price is not None:
+        events = events.filter(menu_price_total__lte=max_menu_price)
+
+    search = params.get('search', '').strip()
+    if search:
+        events = events.filter(pk__in=matching_object_ids(company_id, search, 'event'))
+    return events
@@ -0,0 +1,136 @@
+"""
+iCalendar (RFC 5545) feed of a company's events.
+
+The body is produced by generators: events are read with ``iterator()`` and
+each VEVENT is yielded as soon as it is formatted, so a feed of any size is
+streamed in constant memory. Times are stored as local wall-clock times in
+TIME_ZONE and written in UTC, which every calendar client understands
+without a VTIMEZONE block.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+# Default and maximum days of history/future in the feed window
+DEFAULT_PAST_DAYS = 30
+DEFAULT_FUTURE_DAYS = 365
+MAX_WINDOW_DAYS = 730
+ITERATOR_CHUNK_SIZE = 500
+# How often calendar clients should poll the feed
+REFRESH_INTERVAL = 'PT1H'
+
+FEED_FIELDS = ('id', 'title', 'event_date', 'start_time', 'end_time', 'venue_location', 'status', 'updated_at')
+
+ICS_STATUS = {
+    'proposta_pendente': 'TENTATIVE',
+    'proposta_enviada': 'TENTATIVE',
+    'proposta_recusada': 'CANCELLED',
+}
+
+
+class ICalendarRenderer(BaseRenderer):
+    """Lets content negotiation accept ``Accept: text/calendar`` (the body is streamed by the view)"""
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error responses get here; the feed itself is streamed
+        if isinstance(data, dict):
+            data = data.get('detail', '')
+        return str(data or '').encode(self.charset)
+
+
+class FeedWindowError(ValueError):
+    pass
+
+
+def feed_window(params, today):
+    """(first, last) event dates from the past_days/future_days query parameters"""
+    try:
+        past_days = int(params.get('past_days', DEFAULT_PAST_DAYS))
+        future_days = int(params.get('future_days', DEFAULT_FUTURE_DAYS))
+    except ValueError:
+        raise FeedWindowError('past_days and future_days must be integers')
+    if not (0 <= past_days <= MAX_WINDOW_DAYS and 0 <= future_days <= MAX_WINDOW_DAYS):
+        raise FeedWindowError(f'past_days and future_days must be between 0 and {MAX_WINDOW_DAYS}')
+    return today - timedelta(days=past_days), today + timedelta(days=future_days)
+
+
+def escape_text(value):
+    """TEXT value escaping (RFC 5545 3.3.11)"""
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def fold(line):
+    """Content line folded at 75 octets (RFC 5545 3.1), terminated by CRLF"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a multi-byte character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def vevent(event, local_zone, calendar_domain):
+    start = datetime.combine(event.event_date, event.start_time, local_zone)
+    end = datetime.combine(event.event_date, event.end_time, local_zone)
+    if end <= start:
+        # Ends after midnight
+        end += timedelta(days=1)
+
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@{calendar_domain}',
+        f'DTSTAMP:{_utc(event.updated_at)}',
+        f'LAST-MODIFIED:{_utc(event.updated_at)}',
+        f'DTSTART:{_utc(start)}',
+        f'DTEND:{_utc(end)}',
+        f'SUMMARY:{escape_text(event.title)}',
+        f'STATUS:{ICS_STATUS.get(event.status, "CONFIRMED")}',
+        f'DESCRIPTION:{escape_text(f"Status: {event.get_status_display()}")}',
+    ]
+    if event.venue_location:
+        lines.append(f'LOCATION:{escape_text(event.venue_location)}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def ics_stream(company, events, calendar_domain='buffetflow'):
+    """Yield the feed in pieces: the calendar header, one VEVENT per event and the footer"""
+    local_zone = ZoneInfo(settings.TIME_ZONE)
+    yield ''.join(fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//BuffetFlow//Agenda {escape_text(company.name)}//PT',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(company.name)}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}',
+        f'X-PUBLISHED-TTL:{REFRESH_INTERVAL}',
+    ])
+    for event in events.only(*FEED_FIELDS).iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield vevent(event, local_zone, calendar_domain)
+    yield fold('END:VCALENDAR')
+
+
+def feed_events(company, first, last):
+    """Events of the company in the window, in calendar order"""
+    return company.events.filter(event_date__gte=first, event_date__lte=last).order_by('event_date', 'start_time', 'id')
+
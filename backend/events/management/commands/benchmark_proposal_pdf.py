@@ -0,0 +1,51 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event
+from events.pdf_service import clear_asset_caches, generate_event_proposal_pdf
+
+
+class Command(BaseCommand):
+    help = 'Compare proposal PDF latency with cold and warm stylesheet/logo caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, help='Event id to render (defaults to the latest event)')
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def time_renders(self, event, iterations, cold):
+        timings = []
+        for _ in range(iterations):
+            if cold:
+                clear_asset_caches()
+            started = time.perf_counter()
+            generate_event_proposal_pdf(event)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def handle(self, *args, **options):
+        events = Event.objects.select_related('company').prefetch_related('menu_items__menu_item')
+        if options['event']:
+            event = events.filter(pk=options['event']).first()
+        else:
+            event = events.order_by('-id').first()
+        if event is None:
+            raise CommandError('No event to render')
+
+        iterations = max(options['iterations'], 1)
+        # One untimed render so imports and font loading don't count
+        generate_event_proposal_pdf(event)
+
+        results = {
+            'cold': self.time_renders(event, iterations, cold=True),
+            'warm': self.time_renders(event, iterations, cold=False),
+        }
+        for name, timings in results.items():
+            self.stdout.write(
+                f'{name}: mean {statistics.mean(timings):.2f} ms, '
+                f'median {statistics.median(timings):.2f} ms, min {min(timings):.2f} ms'
+            )
+
+        speedup = statistics.median(results['cold']) / statistics.median(results['warm'])
+        self.stdout.write(self.style.SUCCESS(f'Warm caches render {speedup:.2f}x faster (median)'))
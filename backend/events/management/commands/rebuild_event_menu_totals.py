@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.menu_totals import refresh_menu_totals, verify_menu_totals
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized menu totals of events from their menu rows, then verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Only process the events of this company id')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify the stored totals against the menu rows, without rebuilding',
+        )
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options['company']:
+            events = events.filter(company_id=options['company'])
+
+        if not options['check']:
+            count = refresh_menu_totals(events)
+            self.stdout.write(f'Recomputed the menu totals of {count} events')
+
+        mismatches = verify_menu_totals(events)
+        for event_id, field, stored, expected in mismatches:
+            self.stderr.write(f'event={event_id} {field}: stored {stored}, expected {expected}')
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} menu totals do not match the menu rows')
+
+        self.stdout.write(self.style.SUCCESS('Event menu totals match the menu rows'))
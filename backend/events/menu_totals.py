@@ -0,0 +1,145 @@
+"""
+Denormalized menu totals on Event.
+
+``Event.menu_cost_total``/``menu_price_total`` hold the sum of
+``EventMenu.total_cost()``/``total_price()`` so lists can show, sort and
+filter by menu value without joining EventMenu and MenuItem. They are
+recomputed with one aggregate whenever an EventMenu row, a MenuItem price
+or an Event guest count changes. ``verify_menu_totals`` reports drift
+(e.g. after queryset.update() or bulk_create, which don't send signals)
+and ``refresh_menu_totals`` repairs it with a single UPDATE.
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from buffetflow.cache import bump_company_version
+from .models import Event, EventMenu, MenuItem
+
+TOTAL_FIELDS = {
+    'menu_cost_total': 'cost_per_person',
+    'menu_price_total': 'price_per_person',
+}
+CENTS = Decimal('0.01')
+
+_batch = threading.local()
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _per_guest(price_field):
+    return Sum(F(f'menu_item__{price_field}') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def menu_total_expressions():
+    """{field: expression} computing each total of the outer Event row with a correlated subquery"""
+    expressions = {}
+    for field, price_field in TOTAL_FIELDS.items():
+        per_guest = EventMenu.objects.filter(event=OuterRef('pk')).values('event').annotate(
+            total=_per_guest(price_field)
+        ).values('total')
+        expressions[field] = ExpressionWrapper(
+            Coalesce(Subquery(per_guest), Value(Decimal('0'))) * F('guest_count'),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+    return expressions
+
+
+def set_menu_totals(event):
+    """Compute the totals of one (unsaved) event instance with one aggregate query"""
+    per_guest = EventMenu.objects.filter(event_id=event.pk).aggregate(
+        **{field: _per_guest(price_field) for field, price_field in TOTAL_FIELDS.items()}
+    )
+    for field in TOTAL_FIELDS:
+        setattr(event, field, _money(Decimal(per_guest[field] or 0) * (event.guest_count or 0)))
+
+
+def refresh_menu_totals(events):
+    """Recompute the totals of every event in the queryset with one UPDATE; returns the row count"""
+    return events.update(**menu_total_expressions())
+
+
+@contextmanager
+def batch_menu_totals():
+    """
+    Collect the events whose menu changes inside the block and refresh each
+    of them once on exit. Yields the set of event ids, so callers doing
+    bulk_create/bulk_update (which send no signals) can add theirs. Callers
+    also invalidate the company's cached data (``bump_company_version``).
+    """
+    event_ids = getattr(_batch, 'event_ids', None)
+    if event_ids is not None:
+        yield event_ids
+        return
+
+    _batch.event_ids = event_ids = set()
+    try:
+        yield event_ids
+    finally:
+        _batch.event_ids = None
+    if event_ids:
+        refresh_menu_totals(Event.objects.filter(pk__in=event_ids))
+
+
+def _menu_changed(event_ids, company_id=None):
+    pending = getattr(_batch, 'event_ids', None)
+    if pending is not None:
+        pending.update(event_ids)
+        return
+
+    events = Event.objects.filter(pk__in=event_ids)
+    refresh_menu_totals(events)
+    # The UPDATE sends no signals: invalidate the cached data of the company here
+    if company_id is None:
+        company_id = events.values_list('company_id', flat=True).first()
+    bump_company_version(company_id)
+
+
+def verify_menu_totals(events=None):
+    """List (event_id, field, stored, expected) for every total that doesn't match the menu rows"""
+    events = Event.objects.all() if events is None else events
+    expected_names = {field: f'expected_{field}' for field in TOTAL_FIELDS}
+    rows = events.annotate(
+        **{expected_names[field]: expression for field, expression in menu_total_expressions().items()}
+    ).values('id', *TOTAL_FIELDS, *expected_names.values()).order_by('id')
+
+    mismatches = []
+    for row in rows:
+        for field, expected_name in expected_names.items():
+            if _money(row[field]) != _money(row[expected_name]):
+                mismatches.append((row['id'], field, _money(row[field]), _money(row[expected_name])))
+    return mismatches
+
+
+@receiver(pre_save, sender=Event)
+def event_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # New events have no menu rows yet; partial saves are handled in post_save
+    if not raw and instance.pk and update_fields is None:
+        set_menu_totals(instance)
+
+
+@receiver(post_save, sender=Event)
+def event_post_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and update_fields is not None and 'guest_count' in update_fields:
+        refresh_menu_totals(Event.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=EventMenu)
+@receiver(post_delete, sender=EventMenu)
+def event_menu_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        company_id = instance.event.company_id if EventMenu.event.is_cached(instance) else None
+        _menu_changed([instance.event_id], company_id)
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        _menu_changed(EventMenu.objects.filter(menu_item=instance).values_list('event_id', flat=True), instance.company_id)
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:08
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def compute_menu_totals(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    EventMenu = apps.get_model('events', 'EventMenu')
+    decimal_field = models.DecimalField(max_digits=12, decimal_places=2)
+
+    totals = {}
+    for field, price_field in (('menu_cost_total', 'cost_per_person'), ('menu_price_total', 'price_per_person')):
+        per_guest = EventMenu.objects.filter(event=models.OuterRef('pk')).values('event').annotate(
+            total=models.Sum(models.F(f'menu_item__{price_field}') * models.F('quantity'), output_field=decimal_field)
+        ).values('total')
+        totals[field] = models.ExpressionWrapper(
+            Coalesce(models.Subquery(per_guest), models.Value(Decimal('0'))) * models.F('guest_count'),
+            output_field=decimal_field,
+        )
+    Event.objects.filter(pk__in=EventMenu.objects.values('event_id')).update(**totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_proposalpdfjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='menu_cost_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='menu_price_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(compute_menu_totals, migrations.RunPython.noop),
+    ]
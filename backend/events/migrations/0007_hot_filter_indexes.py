@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_menu_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['company', 'status', 'event_date'], name='event_company_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['company', 'menu_price_total', 'id'], name='event_company_menu_price_idx'),
+        ),
+    ]
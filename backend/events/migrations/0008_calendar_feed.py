@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import events.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_company_logo'),
+        ('events', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(default=events.models.new_feed_token, max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_feed', to='users.company')),
+            ],
+        ),
+    ]
@@ -1,3 +1,5 @@
+import secrets
+
 from django.db import models
 from django.conf import settings
 from users.models import Company
@@ -48,6 +50,10 @@ class Event(models.Model):
     estimated_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     final_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     value = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    # Sum of the EventMenu rows, maintained by events.menu_totals
+    menu_cost_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    menu_price_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
     
     # Additional information
     special_requirements = models.TextField(blank=True, null=True)
@@ -59,22 +65,19 @@ class Event(models.Model):
     
     class Meta:
         ordering = ['event_date', 'start_time']
+        # (company, event_date) lookups are served by the unique index's prefix
         unique_together = ['company', 'event_date', 'start_time']
+        indexes = [
+            models.Index(fields=['company', 'status', 'event_date'], name='event_company_status_date_idx'),
+            models.Index(fields=['company', 'menu_price_total', 'id'], name='event_company_menu_price_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.event_date}"
     
     def is_conflicting(self):
-        overlapping_events = Event.objects.filter(
-            company=self.company,
-            event_date=self.event_date,
-            status__in=['proposta_aceita', 'em_execucao']
-        ).exclude(pk=self.pk)
-        
-        for event in overlapping_events:
-            if (self.start_time < event.end_time and self.end_time > event.start_time):
-                return True
-        return False
+        from .conflicts import event_conflicts
+        return self.pk in event_conflicts(self).conflicting_ids
 
 class MenuItem(models.Model):
     CATEGORY_CHOICES = [
@@ -127,3 +130,50 @@ class EventMenu(models.Model):
     
     def total_price(self):
         return self.menu_item.price_per_person * self.event.guest_count * self.quantity
+
+
+class ProposalPDFJob(models.Model):
+    """A queued proposal PDF render; the file lives in the content-addressed PDF cache"""
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('running', 'Em processamento'),
+        ('done', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='pdf_jobs')
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    fingerprint = models.CharField(max_length=64)
+    cache_hit = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"PDF #{self.pk} - {self.event_id} ({self.status})"
+
+
+def new_feed_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed(models.Model):
+    """Secret URL of a company's iCalendar feed (calendar apps can't send credentials)"""
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name='calendar_feed')
+    token = models.CharField(max_length=64, unique=True, default=new_feed_token)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Calendar feed - {self.company}"
+
+    def rotate(self):
+        """Invalidate the current URL"""
+        self.token = new_feed_token()
+        self.save(update_fields=['token', 'updated_at'])
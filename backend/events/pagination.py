@@ -0,0 +1,8 @@
+from buffetflow.pagination import KeysetPagination
+
+
+class EventKeysetPagination(KeysetPagination):
+    """Events in agenda order: (event_date, start_time, id)"""
+    ordering = ('event_date', 'start_time', 'id')
+    # Alternative orderings accepted through ?ordering= (with an id tie-breaker)
+    sort_fields = ('menu_cost_total', 'menu_price_total')
@@ -1,17 +1,148 @@
 import io
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.utils import ImageReader
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from django.conf import settings
+from PIL import Image as PILImage
+from collections import OrderedDict, namedtuple
 from datetime import datetime, timedelta
+import functools
 import os
+import threading
+
+
+ProposalAssets = namedtuple('ProposalAssets', ['styles', 'logo'])
+
+# Logo desenhado com 2 x 1.5 polegadas; 150 dpi é suficiente para impressão
+LOGO_WIDTH = 2 * inch
+LOGO_HEIGHT = 1.5 * inch
+LOGO_PIXELS = (300, 225)
+LOGO_CACHE_SIZE = 128
+
+_logo_cache = OrderedDict()
+_logo_cache_lock = threading.Lock()
+
+
+def build_stylesheet():
+    """Folha de estilos base com os estilos personalizados da proposta"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue,
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=12,
+        spaceBefore=12,
+        textColor=colors.darkblue,
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CompanyInfo',
+        parent=styles['Normal'],
+        fontSize=10,
+        alignment=TA_CENTER,
+        spaceAfter=20,
+    ))
+    return styles
+
+
+@functools.lru_cache(maxsize=None)
+def get_stylesheet():
+    """Folha de estilos compilada uma vez por processo (somente leitura durante o build)"""
+    return build_stylesheet()
+
+
+def _logo_path(company):
+    return os.path.join(settings.MEDIA_ROOT, str(company.logo))
+
+
+def _logo_version(company):
+    """Identifica o arquivo do logo; muda quando o logo, a empresa ou o arquivo mudam"""
+    try:
+        mtime = os.stat(_logo_path(company)).st_mtime_ns
+    except OSError:
+        return None
+    return (str(company.logo), company.updated_at, mtime)
+
+
+def _decode_logo(path):
+    try:
+        with PILImage.open(path) as image:
+            mode = 'RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB'
+            image = image.convert(mode).resize(LOGO_PIXELS)
+    except (OSError, ValueError):
+        return None
+    reader = ImageReader(image)
+    reader.getRGBData()  # Decodifica agora para que cada PDF reutilize os pixels
+    return reader
+
+
+def get_company_logo(company):
+    """Logo decodificado e redimensionado, em cache por processo e por empresa"""
+    if not company.logo:
+        return None
+    version = _logo_version(company)
+    if version is None:
+        return None
+
+    with _logo_cache_lock:
+        cached = _logo_cache.get(company.pk)
+        if cached and cached[0] == version:
+            _logo_cache.move_to_end(company.pk)
+            return cached[1]
+
+    logo = _decode_logo(_logo_path(company))
+    with _logo_cache_lock:
+        _logo_cache[company.pk] = (version, logo)
+        _logo_cache.move_to_end(company.pk)
+        while len(_logo_cache) > LOGO_CACHE_SIZE:
+            _logo_cache.popitem(last=False)
+    return logo
+
+
+def clear_asset_caches():
+    """Descarta estilos e logos em cache (testes e benchmarks)"""
+    get_stylesheet.cache_clear()
+    with _logo_cache_lock:
+        _logo_cache.clear()
+
+
+def load_proposal_assets(company):
+    """Estilos e logo compartilhados por todas as propostas de uma empresa"""
+    return ProposalAssets(get_stylesheet(), get_company_logo(company))
+
+
+class LogoFlowable(Flowable):
+    """Desenha um logo já decodificado, sem reler o arquivo a cada PDF"""
+
+    def __init__(self, reader, width, height):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = 'CENTER'
+
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask='auto')
 
 
 class ProposalPDFGenerator:
-    def __init__(self, event):
+    def __init__(self, event, assets=None):
         self.event = event
         self.company = event.company
         self.buffer = io.BytesIO()
@@ -23,52 +154,15 @@ class ProposalPDFGenerator:
             topMargin=72,
             bottomMargin=18,
         )
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-
-    def _setup_custom_styles(self):
-        """Configura estilos personalizados para o PDF"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue,
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=12,
-            textColor=colors.darkblue,
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='CompanyInfo',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            alignment=TA_CENTER,
-            spaceAfter=20,
-        ))
+        self.assets = assets or load_proposal_assets(self.company)
+        self.styles = self.assets.styles
 
     def _add_company_header(self, story):
         """Adiciona cabeçalho da empresa com logo"""
         # Logo da empresa (se existir)
-        if self.company.logo:
-            try:
-                logo_path = os.path.join(settings.MEDIA_ROOT, str(self.company.logo))
-                if os.path.exists(logo_path):
-                    logo = Image(logo_path)
-                    logo.drawHeight = 1.5 * inch
-                    logo.drawWidth = 2 * inch
-                    logo.hAlign = 'CENTER'
-                    story.append(logo)
-                    story.append(Spacer(1, 12))
-            except Exception:
-                pass  # Se houver erro com o logo, continue sem ele
+        if self.assets.logo:
+            story.append(LogoFlowable(self.assets.logo, LOGO_WIDTH, LOGO_HEIGHT))
+            story.append(Spacer(1, 12))
 
         # Informações da empresa
         company_info = f"""
@@ -148,12 +242,9 @@ class ProposalPDFGenerator:
             # Cabeçalho da tabela
             menu_data = [['Item', 'Categoria', 'Valor/Pessoa', 'Qtd', 'Total']]
 
-            total_event_cost = 0
-
             for event_menu in menu_items:
                 item = event_menu.menu_item
-                total_item = event_menu.total_price()
-                total_event_cost += total_item
+                total_item = item.price_per_person * self.event.guest_count * event_menu.quantity
 
                 menu_data.append([
                     item.name,
@@ -164,7 +255,7 @@ class ProposalPDFGenerator:
                 ])
 
             # Adiciona linha de total
-            menu_data.append(['', '', '', 'TOTAL:', f"R$ {total_event_cost:.2f}"])
+            menu_data.append(['', '', '', 'TOTAL:', f"R$ {self.event.menu_price_total:.2f}"])
 
             menu_table = Table(menu_data, colWidths=[2.5*inch, 1.5*inch, 1*inch, 0.8*inch, 1.2*inch])
             menu_table.setStyle(TableStyle([
@@ -268,7 +359,7 @@ class ProposalPDFGenerator:
         return pdf_content
 
 
-def generate_event_proposal_pdf(event):
+def generate_event_proposal_pdf(event, assets=None):
     """Função helper para gerar PDF de proposta de evento"""
-    generator = ProposalPDFGenerator(event)
+    generator = ProposalPDFGenerator(event, assets)
     return generator.generate_pdf()
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Content-addressed storage of rendered proposal PDFs.
+
+A proposal is identified by a SHA-256 of everything the PDF shows (event,
+menu rows, company header) plus ``PDF_TEMPLATE_VERSION``. Unchanged
+proposals are served from storage instead of being rendered again; any
+edit produces a new fingerprint, so stale files are never served.
+Bump ``PDF_TEMPLATE_VERSION`` whenever the layout in pdf_service changes.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .pdf_service import generate_event_proposal_pdf
+
+PDF_TEMPLATE_VERSION = 2
+STORAGE_PREFIX = 'proposals'
+
+EVENT_FIELDS = (
+    'id', 'title', 'event_type', 'description', 'client_name', 'client_email', 'client_phone',
+    'event_date', 'start_time', 'end_time', 'guest_count', 'venue_location',
+    'final_price', 'estimated_cost', 'value', 'special_requirements', 'notes',
+)
+COMPANY_FIELDS = (
+    'name', 'business_name', 'address', 'city', 'state', 'postal_code', 'email', 'phone', 'website',
+)
+
+
+def proposal_fingerprint(event):
+    """SHA-256 of the data rendered into the proposal PDF of ``event``"""
+    company = event.company
+    menu_rows = list(
+        event.menu_items.order_by('id').values_list(
+            'menu_item__name', 'menu_item__category', 'menu_item__price_per_person', 'quantity'
+        )
+    )
+    # Without an explicit validity date the PDF prints today + 30 days
+    validity_date = event.proposal_validity_date or timezone.localdate() + timedelta(days=30)
+
+    payload = {
+        'template': PDF_TEMPLATE_VERSION,
+        'event': [getattr(event, field) for field in EVENT_FIELDS],
+        'validity_date': validity_date,
+        'menu': menu_rows,
+        'company': [getattr(company, field) for field in COMPANY_FIELDS],
+        'logo': str(company.logo or ''),
+    }
+    encoded = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def proposal_path(company_id, fingerprint):
+    return f'{STORAGE_PREFIX}/{company_id}/{fingerprint}.pdf'
+
+
+def cached_proposal_path(event, fingerprint):
+    """Storage path of the PDF if it was already rendered, else None"""
+    path = proposal_path(event.company_id, fingerprint)
+    return path if default_storage.exists(path) else None
+
+
+def store_proposal_pdf(event):
+    """Render the proposal unless it is cached; returns (fingerprint, path)"""
+    fingerprint = proposal_fingerprint(event)
+    path = cached_proposal_path(event, fingerprint)
+    if path is None:
+        path = default_storage.save(
+            proposal_path(event.company_id, fingerprint),
+            ContentFile(generate_event_proposal_pdf(event)),
+        )
+    return fingerprint, path
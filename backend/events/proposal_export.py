@@ -0,0 +1,156 @@
+"""
+Bulk proposal export: a ZIP of proposal PDFs streamed while it is built.
+
+PDFs are rendered in a process pool created once per web process, on the
+first export, and reused by the later ones. Its workers build the company's
+stylesheet and logo through the per-process caches of pdf_service, so they
+are decoded once per worker. At most ``window`` renders are in flight and
+every finished PDF is written to the archive and handed to the response
+right away, so memory is bounded by the window and not by the number of
+events in the batch.
+
+The pool needs the ``fork`` start method: workers inherit the loaded
+Django apps and receive events with everything prefetched, and never query
+the database. Database connections and caches are closed right before the
+fork so no worker shares a socket with the web process.
+"""
+import multiprocessing
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from .pdf_service import generate_event_proposal_pdf, load_proposal_assets
+
+EXPORT_CHUNK_SIZE = 100
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # Closed by the parent before forking; nothing is left to share with it
+    connections.close_all()
+
+
+def _render(event, assets):
+    try:
+        return event.id, generate_event_proposal_pdf(event, assets), None
+    except Exception as e:
+        return event.id, None, str(e)
+
+
+def _render_in_worker(event):
+    return _render(event, load_proposal_assets(event.company))
+
+
+def render_pool(workers):
+    """The process's render pool, forked on first use and reused while ``workers`` is unchanged"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers == workers:
+            return _pool
+        if _pool is not None:
+            _pool.shutdown()
+
+        # Forked children must not inherit open database or cache connections
+        connections.close_all()
+        caches.close_all()
+        _pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('fork'), initializer=_init_worker
+        )
+        _pool_workers = workers
+        # Start every worker now, before the export opens a cursor
+        _pool.submit(int).result()
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def export_queryset(events):
+    """Load everything the PDF needs up front; workers can't query the database"""
+    return events.select_related('company').prefetch_related('menu_items__menu_item').iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+
+
+def render_proposals(events, assets, workers, window):
+    """Yield (event_id, pdf, error) in event order, keeping at most ``window`` renders pending"""
+    if workers <= 1:
+        for event in events:
+            yield _render(event, assets)
+        return
+
+    pool = render_pool(workers)
+    pending = deque()
+    try:
+        for event in events:
+            pending.append(pool.submit(_render_in_worker, event))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        # A worker died: the next export forks a new pool
+        _discard_pool(pool)
+        raise
+    finally:
+        # Client gone mid-stream: don't leave its renders queued on the shared pool
+        for future in pending:
+            future.cancel()
+
+
+class ZipStream:
+    """Write-only file object for ZipFile whose content is drained after every member"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_proposal_zip(events, assets, workers=None):
+    """Generate the bytes of a ZIP with one proposal PDF per event"""
+    workers = workers or settings.PROPOSAL_EXPORT_WORKERS
+    stream = ZipStream()
+    errors = []
+
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for event_id, pdf, error in render_proposals(export_queryset(events), assets, workers, workers * 2):
+            if pdf is None:
+                errors.append(f'Evento #{event_id}: {error}')
+                continue
+            archive.writestr(f'orcamento-evento-{event_id}.pdf', pdf)
+            yield stream.drain()
+
+        if errors:
+            archive.writestr('erros.txt', '\n'.join(errors))
+
+    yield stream.drain()
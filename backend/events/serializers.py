@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Event, MenuItem, EventMenu
+from django.urls import reverse
+from .models import Event, MenuItem, EventMenu, ProposalPDFJob
 from clients.serializers import ClientSerializer
 
 class MenuItemSerializer(serializers.ModelSerializer):
@@ -18,9 +19,37 @@ class EventMenuSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('event', 'created_at')
 
-class EventSerializer(serializers.ModelSerializer):
+class EventMenuBulkItemSerializer(serializers.Serializer):
+    menu_item = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class EventMenuBulkSerializer(serializers.Serializer):
+    """The full menu of an event, replacing the current one"""
+    items = EventMenuBulkItemSerializer(many=True)
+
+    def validate_items(self, items):
+        menu_item_ids = [item['menu_item'] for item in items]
+        duplicates = sorted({menu_item_id for menu_item_id in menu_item_ids if menu_item_ids.count(menu_item_id) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f'Itens repetidos: {", ".join(map(str, duplicates))}')
+        return items
+
+class ConflictFlagMixin:
+    """
+    Reads ``is_conflicting`` from the ``conflicting_ids`` set in the serializer
+    context (built once by events.conflicts), falling back to a per-event check.
+    """
+
+    def get_is_conflicting(self, obj):
+        conflicting_ids = self.context.get('conflicting_ids')
+        if conflicting_ids is None:
+            return obj.is_conflicting()
+        return obj.pk in conflicting_ids
+
+class EventSerializer(ConflictFlagMixin, serializers.ModelSerializer):
     menu_items = EventMenuSerializer(many=True, read_only=True)
-    is_conflicting = serializers.BooleanField(read_only=True)
+    is_conflicting = serializers.SerializerMethodField()
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     client_data = ClientSerializer(source='client', read_only=True)
 
@@ -34,20 +63,74 @@ class EventCreateSerializer(serializers.ModelSerializer):
         model = Event
         exclude = ('company', 'created_by', 'created_at', 'updated_at')
 
-class EventListSerializer(serializers.ModelSerializer):
+class EventImportSerializer(EventCreateSerializer):
+    """
+    Row validation of bulk imports. The client is a plain id and the client
+    contact may be left out when the row names a client (by id or email):
+    the importer resolves clients and checks time slots for a whole batch.
+    """
+    client = serializers.IntegerField(required=False, allow_null=True)
+    client_name = serializers.CharField(max_length=200, required=False)
+    client_email = serializers.EmailField(required=False)
+    client_phone = serializers.CharField(max_length=20, required=False)
+
+    def validate(self, data):
+        if data.get('status') == 'proposta_enviada' and not data.get('proposal_validity_date'):
+            raise serializers.ValidationError({
+                'proposal_validity_date': ['Este campo é obrigatório quando o status é "Proposta Enviada".']
+            })
+        return data
+
+class EventListSerializer(ConflictFlagMixin, serializers.ModelSerializer):
     event_type_display = serializers.CharField(source='get_event_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    is_conflicting = serializers.BooleanField(read_only=True)
+    is_conflicting = serializers.SerializerMethodField()
     client_name = serializers.CharField(source='client.name', read_only=True)
     client_email = serializers.CharField(source='client.email', read_only=True)
     client_phone = serializers.CharField(source='client.phone', read_only=True)
 
+    # Model columns the computed fields read, used to project ?fields= with .only()
+    FIELD_DEPENDENCIES = {
+        'event_type_display': ('event_type',),
+        'status_display': ('status',),
+        'is_conflicting': ('event_date',),
+        'client_name': ('client__name',),
+        'client_email': ('client__email',),
+        'client_phone': ('client__phone',),
+    }
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def model_fields_for(cls, fields=None):
+        """Return the model columns needed to serialize the given fields (all by default)"""
+        columns = set()
+        for field_name in fields or cls.Meta.fields:
+            columns.update(cls.FIELD_DEPENDENCIES.get(field_name, (field_name,)))
+        return columns
+
+    @classmethod
+    def setup_queryset(cls, queryset, fields=None, extra_columns=()):
+        """
+        Load only the columns the serializer reads, joining the client table
+        (and only its name/email/phone) when a client field is requested.
+        """
+        columns = cls.model_fields_for(fields) | set(extra_columns)
+        if any(column.startswith('client__') for column in columns):
+            queryset = queryset.select_related('client')
+        return queryset.only(*columns)
+
     class Meta:
         model = Event
         fields = ('id', 'title', 'event_type', 'event_type_display', 'status', 'status_display',
                  'event_date', 'start_time', 'end_time', 'guest_count', 'venue_location', 'client', 'client_name',
                  'client_email', 'client_phone', 'estimated_cost', 'final_price', 'value',
-                 'is_conflicting', 'proposal_validity_date')
+                 'menu_cost_total', 'menu_price_total', 'is_conflicting', 'proposal_validity_date')
 
 class EventAgendaSerializer(serializers.ModelSerializer):
     """Optimized serializer for calendar/agenda view with minimal data"""
@@ -57,4 +140,61 @@ class EventAgendaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = ('id', 'title', 'event_date', 'start_time', 'end_time', 'status',
-                 'status_display', 'event_type', 'event_type_display', 'client_name')
\ No newline at end of file
+                 'status_display', 'event_type', 'event_type_display', 'client_name')
+
+    @classmethod
+    def setup_queryset(cls, queryset):
+        """Load only the columns the agenda needs"""
+        return queryset.only(*(field for field in cls.Meta.fields if not field.endswith('_display')))
+
+class ProposalPDFJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProposalPDFJob
+        fields = ('id', 'event', 'status', 'cache_hit', 'error', 'created_at', 'finished_at', 'download_url')
+
+    def get_download_url(self, obj):
+        if obj.status != 'done':
+            return None
+        url = reverse('events:proposal_pdf_job_download', args=[obj.id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class CostSelectionItemSerializer(serializers.Serializer):
+    menu_item_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class CostMenuSerializer(serializers.Serializer):
+    label = serializers.CharField(max_length=200, required=False)
+    items = CostSelectionItemSerializer(many=True, allow_empty=False)
+
+
+class CostMatrixRequestSerializer(serializers.Serializer):
+    """What-if menus x guest counts x margins, and/or saved events, for the batch calculator"""
+    menus = CostMenuSerializer(many=True, required=False, default=list)
+    guest_counts = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    margins = serializers.ListField(
+        child=serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0),
+        required=False,
+        default=list
+    )
+    event_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+
+    def validate(self, data):
+        if data['menus'] and not data['guest_counts']:
+            raise serializers.ValidationError(
+                {'guest_counts': ['Informe ao menos um número de convidados para os cardápios.']}
+            )
+        if not data['menus'] and not data['event_ids']:
+            raise serializers.ValidationError('Informe cardápios ou eventos para calcular.')
+
+        for index, menu in enumerate(data['menus']):
+            selection = {}
+            for item in menu['items']:
+                selection[item['menu_item_id']] = selection.get(item['menu_item_id'], 0) + item['quantity']
+            menu['label'] = menu.get('label') or f'Cardápio {index + 1}'
+            menu['items'] = selection
+        return data
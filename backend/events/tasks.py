@@ -0,0 +1,30 @@
+from celery import shared_task
+from django.utils import timezone
+
+from .models import ProposalPDFJob
+from .proposal_cache import store_proposal_pdf
+
+
+@shared_task
+def render_proposal_pdf(job_id):
+    """Render the proposal of a queued ProposalPDFJob into the PDF cache"""
+    job = ProposalPDFJob.objects.select_related('event__company').prefetch_related(
+        'event__menu_items__menu_item'
+    ).filter(pk=job_id).first()
+    if job is None or job.status == 'done':
+        return
+
+    job.status = 'running'
+    job.save(update_fields=['status'])
+
+    try:
+        job.fingerprint, _ = store_proposal_pdf(job.event)
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+    else:
+        job.status = 'done'
+        job.error = ''
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'fingerprint', 'error', 'finished_at'])
@@ -1,10 +1,34 @@
+import io
+import os
+import tempfile
+import zipfile
+from unittest.mock import patch
+from PIL import Image as PILImage
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.db import connection
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from datetime import date, time, timedelta
-from events.models import Event
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+from buffetflow import celery_app
+from buffetflow.testing import QueryBudgetMixin, QueryPlanMixin
+from clients.models import Client
+from django.db.models import Count
+from events.conflicts import CONFLICT_STATUSES, conflict_rows
+from events.menu_totals import batch_menu_totals, verify_menu_totals
+from events.ics import fold
+from events.proposal_export import render_pool
+from events.models import CalendarFeed, Event, EventMenu, MenuItem, ProposalPDFJob
+from events.pdf_service import (
+    LOGO_PIXELS, clear_asset_caches, generate_event_proposal_pdf, load_proposal_assets
+)
 from users.models import Company
 
 User = get_user_model()
@@ -251,4 +275,1141 @@ class AgendaEndpointTestCase(TestCase):
             ]
 
             for field in unwanted_fields:
-                self.assertNotIn(field, event)
\ No newline at end of file
+                self.assertNotIn(field, event)
+
+class ConflictDetectionTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(
+            username='conflictuser',
+            email='conflict@example.com',
+            password='testpass123'
+        )
+
+        self.company = Company.objects.create(
+            name='Conflict Buffet',
+            email='buffet@conflict.com',
+            phone='(11) 99999-9999'
+        )
+
+        self.user.company = self.company
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        self.day = date.today() + timedelta(days=3)
+
+    def create_event(self, title, start, end, status='proposta_aceita', event_date=None):
+        return Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title=title,
+            event_type='birthday',
+            event_date=event_date or self.day,
+            start_time=start,
+            end_time=end,
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=50,
+            status=status
+        )
+
+    def test_find_conflicts_groups_overlapping_events(self):
+        """Overlapping events are grouped and flagged in a single query"""
+        from events.conflicts import find_conflicts
+
+        first = self.create_event('Primeiro', time(12, 0), time(16, 0))
+        second = self.create_event('Segundo', time(15, 0), time(18, 0))
+        pending = self.create_event('Pendente', time(17, 0), time(19, 0), status='proposta_pendente')
+        separate = self.create_event('Noite', time(20, 0), time(23, 0))
+        self.create_event('Outro dia', time(12, 0), time(16, 0), event_date=self.day + timedelta(days=1))
+
+        with self.assertNumQueries(1):
+            result = find_conflicts(self.company)
+
+        self.assertEqual(result.conflicting_ids, {first.id, second.id, pending.id})
+        self.assertEqual(result.groups, [
+            {'event_date': self.day, 'event_ids': sorted([first.id, second.id, pending.id])}
+        ])
+        self.assertNotIn(separate.id, result.conflicting_ids)
+
+    def test_pending_events_do_not_block_each_other(self):
+        """Only events in a blocking status make an overlap a conflict"""
+        from events.conflicts import find_conflicts
+
+        self.create_event('Pendente A', time(12, 0), time(16, 0), status='proposta_pendente')
+        self.create_event('Pendente B', time(13, 0), time(17, 0), status='proposta_enviada')
+
+        result = find_conflicts(self.company)
+        self.assertEqual(result.conflicting_ids, set())
+        self.assertEqual(result.groups, [])
+
+    def test_event_crossing_midnight_occupies_rest_of_day(self):
+        """An event ending after midnight overlaps later events on its day"""
+        late = self.create_event('Formatura', time(20, 0), time(1, 0))
+        after = self.create_event('Festa', time(22, 0), time(23, 30))
+
+        self.assertTrue(late.is_conflicting())
+        self.assertTrue(after.is_conflicting())
+
+    def test_model_method_matches_engine(self):
+        """Event.is_conflicting agrees with the set-based engine"""
+        first = self.create_event('Primeiro', time(12, 0), time(16, 0))
+        adjacent = self.create_event('Adjacente', time(16, 0), time(18, 0))
+
+        self.assertFalse(first.is_conflicting())
+        self.assertFalse(adjacent.is_conflicting())
+
+        adjacent.start_time = time(15, 0)
+        self.assertTrue(adjacent.is_conflicting())
+
+    def test_create_returns_conflict_flag(self):
+        """Creating an overlapping event reports the conflict"""
+        self.create_event('Primeiro', time(12, 0), time(16, 0))
+
+        response = self.client.post(reverse('events:events'), {
+            'title': 'Novo',
+            'event_type': 'wedding',
+            'event_date': self.day.strftime('%Y-%m-%d'),
+            'start_time': '14:00',
+            'end_time': '18:00',
+            'client_name': 'Cliente',
+            'client_email': 'cliente@example.com',
+            'client_phone': '(11) 88888-8888',
+            'guest_count': 80,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['is_conflicting'])
+
+    def test_dashboard_conflict_queries_do_not_grow_with_events(self):
+        """The financial dashboard counts conflicts without per-event queries"""
+        for hour in range(8, 20):
+            self.create_event(f'Evento {hour}', time(hour, 0), time(hour + 2, 0))
+
+        response = self.client.get('/api/financials/dashboard/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['statistics']['conflicting_events'], 12)
+        self.assertEqual(len(response.data['conflict_groups']), 1)
+
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get('/api/financials/dashboard/')
+
+        self.create_event('Mais um', time(21, 0), time(23, 0))
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            self.client.get('/api/financials/dashboard/')
+
+
+class EventListConflictFlagsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(
+            username='listuser',
+            email='list@example.com',
+            password='testpass123'
+        )
+
+        self.company = Company.objects.create(
+            name='List Buffet',
+            email='buffet@list.com',
+            phone='(11) 99999-9999'
+        )
+
+        self.user.company = self.company
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+    def create_events(self, days, start_day=0):
+        for offset in range(start_day, start_day + days):
+            for start, end in ((time(12, 0), time(16, 0)), (time(15, 0), time(18, 0))):
+                Event.objects.create(
+                    company=self.company,
+                    created_by=self.user,
+                    title=f'Evento {offset} {start}',
+                    event_type='birthday',
+                    event_date=date.today() + timedelta(days=offset),
+                    start_time=start,
+                    end_time=end,
+                    client_name='Cliente',
+                    client_email='cliente@example.com',
+                    client_phone='(11) 88888-8888',
+                    guest_count=50,
+                    status='proposta_aceita'
+                )
+
+    def test_list_flags_conflicts(self):
+        """Every overlapping event in the list is flagged"""
+        self.create_events(2)
+
+        response = self.client.get(reverse('events:events'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertTrue(all(event['is_conflicting'] for event in response.data['results']))
+
+    def test_list_conflict_flags_use_constant_queries(self):
+        """Conflict flags cost the same number of queries for 2 or 50 events"""
+        url = reverse('events:events')
+        self.create_events(1)
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url, {'page_size': 50})
+
+        self.create_events(24, start_day=1)
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            response = self.client.get(url, {'page_size': 50})
+
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_keyset_pagination_walks_every_event_once(self):
+        """Following the next cursor returns each event exactly once, in order"""
+        self.create_events(15)
+        url = reverse('events:events')
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 20)
+
+        seen = []
+        params = {'page_size': 7}
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend((event['event_date'], event['start_time'], event['id'])
+                        for event in response.data['results'])
+            if not response.data['next']:
+                break
+            params['cursor'] = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(len({event_id for _, _, event_id in seen}), 30)
+
+    def test_invalid_cursor_returns_404(self):
+        """A tampered cursor is rejected"""
+        response = self.client.get(reverse('events:events'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_fields_projection(self):
+        """?fields= returns only the requested columns"""
+        self.create_events(1)
+
+        response = self.client.get(reverse('events:events'), {'fields': 'id,title,status_display'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'status_display'})
+
+        response = self.client.get(reverse('events:events'), {'fields': 'id,notes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+class EventEndpointQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    # Maximum number of queries each endpoint may run, whatever the data size
+    QUERY_BUDGETS = {
+        'events:events': 2,    # page of events joined with clients + conflict map
+        'events:calendar': 1,  # projected events of the month
+        'events:agenda': 1,
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User.objects.create_user(
+            username='budgetuser',
+            email='budget@example.com',
+            password='testpass123'
+        )
+
+        self.company = Company.objects.create(
+            name='Budget Buffet',
+            email='buffet@budget.com',
+            phone='(11) 99999-9999'
+        )
+
+        self.user.company = self.company
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        today = date.today()
+        for index in range(30):
+            client = Client.objects.create(
+                name=f'Cliente {index}',
+                email=f'cliente{index}@example.com',
+                phone='(11) 88888-8888',
+                company=self.company
+            )
+            Event.objects.create(
+                company=self.company,
+                created_by=self.user,
+                client=client,
+                title=f'Evento {index}',
+                event_type='birthday',
+                event_date=today.replace(day=1) + timedelta(days=index % 28),
+                start_time=time(8 + index % 12, 0),
+                end_time=time(9 + index % 12, 0),
+                client_name=client.name,
+                client_email=client.email,
+                client_phone=client.phone,
+                guest_count=50,
+                status='proposta_aceita'
+            )
+
+    def test_events_list_within_budget(self):
+        """The events list reads client data through one join"""
+        with self.assertQueryBudget(self.QUERY_BUDGETS['events:events']):
+            response = self.client.get(reverse('events:events'), {'page_size': 30})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(len(results), 30)
+        self.assertTrue(all(event['client_name'].startswith('Cliente') for event in results))
+        self.assertTrue(all(event['client_email'] for event in results))
+
+    def test_events_list_projection_within_budget(self):
+        """Projected lists load only the requested client columns"""
+        with self.assertQueryBudget(self.QUERY_BUDGETS['events:events']) as context:
+            response = self.client.get(reverse('events:events'), {'fields': 'id,title,client_phone'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('clients_client', context.captured_queries[0]['sql'])
+        self.assertNotIn('"clients_client"."cpf"', context.captured_queries[0]['sql'])
+
+    def test_calendar_within_budget(self):
+        """The month and range calendars run a single query"""
+        today = date.today()
+
+        with self.assertQueryBudget(self.QUERY_BUDGETS['events:calendar']):
+            response = self.client.get(reverse('events:calendar'), {'year': today.year, 'month': today.month})
+        self.assertEqual(len(response.data['events']), 30)
+
+        with self.assertQueryBudget(self.QUERY_BUDGETS['events:agenda']):
+            response = self.client.get(reverse('events:agenda'), {
+                'start_date': today.replace(day=1).strftime('%Y-%m-%d'),
+                'end_date': (today.replace(day=1) + timedelta(days=27)).strftime('%Y-%m-%d'),
+            })
+        self.assertEqual(len(response.data['events']), 30)
+
+
+class ProposalPDFJobTestCase(TestCase):
+    def setUp(self):
+        # Run the render task inline and keep the PDFs out of the real media root
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', always_eager)
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='PDF Buffet',
+            email='pdf@buffet.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='pdfuser',
+            email='pdf@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.event = Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title='Casamento',
+            event_type='wedding',
+            event_date=date.today() + timedelta(days=30),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=100,
+            proposal_validity_date=date.today() + timedelta(days=10)
+        )
+
+    def queue_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/events/{self.event.id}/proposal-pdf-jobs/')
+        return response
+
+    def test_job_renders_pdf_and_can_be_downloaded(self):
+        response = self.queue_job()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(response.data['cache_hit'])
+
+        job = self.client.get(f"/api/events/proposal-pdf-jobs/{response.data['id']}/").data
+        self.assertEqual(job['status'], 'done')
+
+        download = self.client.get(job['download_url'])
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(download['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
+
+    def test_unchanged_proposal_is_served_from_cache(self):
+        self.queue_job()
+
+        with patch('events.proposal_cache.generate_event_proposal_pdf') as render:
+            response = self.queue_job()
+            self.client.get(f'/api/events/{self.event.id}/generate-proposal-pdf/')
+        render.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['cache_hit'])
+        self.assertEqual(response.data['status'], 'done')
+
+    def test_changed_proposal_is_rendered_again(self):
+        first = ProposalPDFJob.objects.get(id=self.queue_job().data['id'])
+
+        self.event.guest_count = 150
+        self.event.save()
+        response = self.queue_job()
+
+        self.assertFalse(response.data['cache_hit'])
+        second = ProposalPDFJob.objects.get(id=response.data['id'])
+        self.assertNotEqual(first.fingerprint, second.fingerprint)
+        self.assertEqual(second.status, 'done')
+
+
+class ProposalExportTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Export Buffet',
+            email='export@buffet.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='exportuser',
+            email='export@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        today = date.today()
+        self.events = [
+            Event.objects.create(
+                company=self.company,
+                created_by=self.user,
+                title=f'Evento {index}',
+                event_type='wedding',
+                event_date=today + timedelta(days=index + 1),
+                start_time=time(18, 0),
+                end_time=time(23, 0),
+                client_name='Cliente',
+                client_email='cliente@example.com',
+                client_phone='(11) 88888-8888',
+                guest_count=100,
+                status=event_status
+            )
+            for index, event_status in enumerate(['proposta_pendente', 'proposta_enviada', 'proposta_aceita'])
+        ]
+
+    def export(self, query=''):
+        response = self.client.get(f'/api/events/proposals/export/{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_export_streams_zip_rendered_by_process_pool(self):
+        with self.settings(PROPOSAL_EXPORT_WORKERS=2):
+            archive = self.export()
+
+        self.assertEqual(
+            archive.namelist(),
+            [f'orcamento-evento-{event.id}.pdf' for event in self.events]
+        )
+        self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in archive.namelist()))
+
+    def test_exports_share_one_process_pool(self):
+        with self.settings(PROPOSAL_EXPORT_WORKERS=2):
+            self.export()
+            pool = render_pool(2)
+            archive = self.export('?status=proposta_aceita')
+
+        self.assertIs(render_pool(2), pool)
+        self.assertEqual(archive.namelist(), [f'orcamento-evento-{self.events[2].id}.pdf'])
+
+    def test_export_filters_by_status_and_date(self):
+        with self.settings(PROPOSAL_EXPORT_WORKERS=1):
+            by_status = self.export('?status=proposta_enviada,proposta_aceita')
+            by_date = self.export(f'?end_date={self.events[0].event_date.isoformat()}')
+
+        self.assertEqual(
+            by_status.namelist(),
+            [f'orcamento-evento-{event.id}.pdf' for event in self.events[1:]]
+        )
+        self.assertEqual(by_date.namelist(), [f'orcamento-evento-{self.events[0].id}.pdf'])
+
+    def test_export_rejects_invalid_dates(self):
+        response = self.client.get('/api/events/proposals/export/?start_date=amanha')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProposalAssetCacheTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = self.settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        clear_asset_caches()
+        self.addCleanup(clear_asset_caches)
+
+        os.makedirs(os.path.join(media_root.name, 'logos'))
+        PILImage.new('RGB', (1200, 900), 'navy').save(os.path.join(media_root.name, 'logos', 'logo.png'))
+
+        self.company = Company.objects.create(
+            name='Logo Buffet',
+            email='logo@buffet.com',
+            phone='(11) 99999-9999',
+            logo='logos/logo.png'
+        )
+
+    def test_stylesheet_and_logo_are_reused(self):
+        first = load_proposal_assets(self.company)
+        second = load_proposal_assets(self.company)
+
+        self.assertIs(first.styles, second.styles)
+        self.assertIs(first.logo, second.logo)
+        self.assertEqual(first.logo.getSize(), LOGO_PIXELS)
+
+    def test_logo_is_reloaded_when_company_changes(self):
+        first = load_proposal_assets(self.company).logo
+
+        self.company.name = 'Logo Buffet 2'
+        self.company.save()
+
+        self.assertIsNot(load_proposal_assets(self.company).logo, first)
+
+    def test_pdf_with_cached_logo(self):
+        user = User.objects.create_user(username='logouser', password='testpass123', company=self.company)
+        event = Event.objects.create(
+            company=self.company,
+            created_by=user,
+            title='Evento',
+            event_type='wedding',
+            event_date=date.today(),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=50
+        )
+        self.assertTrue(generate_event_proposal_pdf(event).startswith(b'%PDF'))
+        self.assertTrue(generate_event_proposal_pdf(event).startswith(b'%PDF'))
+
+
+class CostBatchCalculatorTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Cost Buffet',
+            email='cost@buffet.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='costuser',
+            email='cost@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.main = MenuItem.objects.create(
+            company=self.company, name='Risoto', category='main',
+            cost_per_person=Decimal('20.00'), price_per_person=Decimal('35.00')
+        )
+        self.dessert = MenuItem.objects.create(
+            company=self.company, name='Pudim', category='dessert',
+            cost_per_person=Decimal('5.00'), price_per_person=Decimal('10.00')
+        )
+        self.event = Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title='Formatura',
+            event_type='graduation',
+            event_date=date.today(),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=50
+        )
+        EventMenu.objects.create(event=self.event, menu_item=self.main, quantity=2)
+
+    def post(self, data):
+        return self.client.post('/api/events/calculate-cost/batch/', data, format='json')
+
+    def test_matrix_of_menus_guest_counts_and_margins(self):
+        data = {
+            'menus': [
+                {'label': 'Completo', 'items': [
+                    {'menu_item_id': self.main.id}, {'menu_item_id': self.dessert.id, 'quantity': 2}
+                ]},
+                {'items': [{'menu_item_id': self.main.id}]},
+            ],
+            'guest_counts': [100, 200],
+            'margins': [20, 50],
+            'event_ids': [self.event.id],
+        }
+        with self.assertQueryBudget(4):
+            response = self.post(data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        scenarios = response.data['scenarios']
+        self.assertEqual(len(scenarios), 2 * 2 * 2 + 2)
+
+        complete = scenarios[0]
+        self.assertEqual(complete['label'], 'Completo')
+        self.assertEqual((complete['guests'], complete['margin']), (100, 20.0))
+        self.assertEqual(complete['cost'], 3000.0)
+        self.assertEqual(complete['price'], 5500.0)
+        self.assertEqual(complete['suggested_price'], 3600.0)
+        self.assertEqual(complete['profit'], 600.0)
+        self.assertEqual(scenarios[4]['label'], 'Cardápio 2')
+
+        event_row = scenarios[-1]
+        self.assertEqual((event_row['event_id'], event_row['guests'], event_row['margin']), (self.event.id, 50, 50.0))
+        self.assertEqual(event_row['cost'], 2000.0)
+        self.assertEqual(event_row['suggested_price'], 3000.0)
+
+    def test_rejects_unknown_menu_items_and_missing_guest_counts(self):
+        response = self.post({'menus': [{'items': [{'menu_item_id': 9999}]}], 'guest_counts': [10]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('9999', response.data['error'])
+
+        response = self.post({'menus': [{'items': [{'menu_item_id': self.main.id}]}]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('guest_counts', response.data)
+
+
+class EventMenuTotalsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Totals Buffet',
+            email='totals@buffet.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='totalsuser',
+            email='totals@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.main = MenuItem.objects.create(
+            company=self.company, name='Risoto', category='main',
+            cost_per_person=Decimal('20.00'), price_per_person=Decimal('35.00')
+        )
+        self.dessert = MenuItem.objects.create(
+            company=self.company, name='Pudim', category='dessert',
+            cost_per_person=Decimal('5.00'), price_per_person=Decimal('10.00')
+        )
+        self.event = self.create_event(date.today(), 10)
+
+    def create_event(self, event_date, guest_count):
+        return Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title='Evento',
+            event_type='wedding',
+            event_date=event_date,
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=guest_count
+        )
+
+    def assertTotals(self, cost, price):
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.menu_cost_total, self.event.menu_price_total), (Decimal(cost), Decimal(price)))
+
+    def test_totals_follow_menu_rows_prices_and_guest_count(self):
+        event_menu = EventMenu.objects.create(event=self.event, menu_item=self.main, quantity=2)
+        EventMenu.objects.create(event=self.event, menu_item=self.dessert)
+        self.assertTotals('450.00', '800.00')
+
+        event_menu.quantity = 1
+        event_menu.save()
+        self.assertTotals('250.00', '450.00')
+
+        self.dessert.price_per_person = Decimal('12.50')
+        self.dessert.save()
+        self.assertTotals('250.00', '475.00')
+
+        self.event.guest_count = 20
+        self.event.save()
+        self.assertEqual(self.event.menu_price_total, Decimal('950.00'))
+        self.assertTotals('500.00', '950.00')
+
+        event_menu.delete()
+        self.assertTotals('100.00', '250.00')
+        self.assertEqual(verify_menu_totals(), [])
+
+    def test_command_repairs_drift(self):
+        EventMenu.objects.create(event=self.event, menu_item=self.main)
+        Event.objects.filter(pk=self.event.pk).update(menu_price_total=0)
+        self.assertEqual(len(verify_menu_totals()), 1)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_event_menu_totals', '--check', stdout=io.StringIO(), stderr=io.StringIO())
+        call_command('rebuild_event_menu_totals', stdout=io.StringIO())
+        self.assertTotals('200.00', '350.00')
+
+    def test_list_filters_and_sorts_by_menu_value(self):
+        other = self.create_event(date.today() + timedelta(days=1), 100)
+        EventMenu.objects.create(event=self.event, menu_item=self.main)
+        EventMenu.objects.create(event=other, menu_item=self.main)
+
+        response = self.client.get('/api/events/?ordering=-menu_price_total&fields=id,menu_price_total')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data['results']], [other.id, self.event.id])
+        self.assertEqual(response.data['results'][0]['menu_price_total'], '3500.00')
+
+        response = self.client.get('/api/events/?max_menu_price=1000')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.event.id])
+
+        response = self.client.get('/api/events/?ordering=title')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for value in ('abc', 'nan', 'inf', '-Infinity'):
+            response = self.client.get(f'/api/events/?min_menu_price={value}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, value)
+
+    def test_menu_item_change_inside_batch(self):
+        EventMenu.objects.create(event=self.event, menu_item=self.main)
+
+        with batch_menu_totals() as event_ids:
+            self.main.price_per_person = Decimal('40.00')
+            self.main.save()
+            self.assertEqual(event_ids, {self.event.pk})
+        self.assertTotals('200.00', '400.00')
+
+
+class EventMenuBulkReplaceTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Bulk Buffet',
+            email='bulk@buffet.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='bulkuser',
+            email='bulk@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.menu_items = [
+            MenuItem.objects.create(
+                company=self.company, name=f'Item {index}', category='main',
+                cost_per_person=Decimal('2.00'), price_per_person=Decimal('5.00')
+            )
+            for index in range(20)
+        ]
+        self.event = Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title='Evento',
+            event_type='wedding',
+            event_date=date.today(),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=10
+        )
+        self.url = f'/api/events/{self.event.id}/menu-items/'
+
+    def put(self, items):
+        return self.client.put(self.url, {'items': items}, format='json')
+
+    def test_replaces_whole_menu_in_constant_queries(self):
+        EventMenu.objects.create(event=self.event, menu_item=self.menu_items[0], quantity=5)
+        EventMenu.objects.create(event=self.event, menu_item=self.menu_items[19])
+
+        items = [{'menu_item': item.id, 'quantity': 2} for item in self.menu_items[:19]]
+        with self.assertQueryBudget(12):
+            response = self.put(items)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['items']), 19)
+        self.assertEqual(response.data['menu_price_total'], '1900.00')
+        self.assertEqual(response.data['menu_cost_total'], '760.00')
+        self.assertFalse(EventMenu.objects.filter(event=self.event, menu_item=self.menu_items[19]).exists())
+        self.assertEqual(verify_menu_totals(), [])
+
+    def test_invalid_menu_leaves_current_menu_untouched(self):
+        EventMenu.objects.create(event=self.event, menu_item=self.menu_items[0])
+        other_company = Company.objects.create(name='Outro', email='outro@buffet.com', phone='(11) 7777-7777')
+        foreign_item = MenuItem.objects.create(
+            company=other_company, name='Alheio', category='main',
+            cost_per_person=Decimal('1.00'), price_per_person=Decimal('1.00')
+        )
+
+        response = self.put([{'menu_item': self.menu_items[1].id}, {'menu_item': foreign_item.id}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(foreign_item.id), response.data['error'])
+
+        response = self.put([{'menu_item': self.menu_items[1].id}, {'menu_item': self.menu_items[1].id}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(
+            list(EventMenu.objects.filter(event=self.event).values_list('menu_item_id', flat=True)),
+            [self.menu_items[0].id]
+        )
+
+
+class EventQueryPlanTestCase(QueryPlanMixin, TestCase):
+    """The hot event filters must be served by an index, not a sequential scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.companies = [
+            Company.objects.create(name=f'Plan Buffet {index}', email=f'plan{index}@buffet.com', phone='(11) 99999-9999')
+            for index in range(3)
+        ]
+        statuses = [choice for choice, _ in Event.STATUS_CHOICES]
+        start = date(2026, 1, 1)
+        Event.objects.bulk_create([
+            Event(
+                company=company,
+                title=f'Evento {index}',
+                event_type='wedding',
+                event_date=start + timedelta(days=index),
+                start_time=time(18, 0),
+                end_time=time(23, 0),
+                client_name='Cliente',
+                client_email='cliente@example.com',
+                client_phone='(11) 88888-8888',
+                guest_count=100,
+                status=statuses[index % len(statuses)],
+                menu_price_total=Decimal(index)
+            )
+            for company in cls.companies
+            for index in range(200)
+        ])
+        cls.company = cls.companies[0]
+        cls.analyze()
+
+    def test_events_list_by_date(self):
+        self.assertUsesIndex(
+            Event.objects.filter(company=self.company, event_date__gte=date(2026, 3, 1))
+            .order_by('event_date', 'start_time', 'id')
+        )
+
+    def test_events_by_status_and_date(self):
+        self.assertUsesIndex(
+            Event.objects.filter(company=self.company, status='proposta_aceita', event_date__gte=date(2026, 3, 1))
+        )
+
+    def test_conflict_rows(self):
+        self.assertUsesIndex(conflict_rows(self.company, start_date=date(2026, 3, 1), statuses=CONFLICT_STATUSES))
+
+    def test_events_sorted_by_menu_value(self):
+        self.assertUsesIndex(Event.objects.filter(company=self.company).order_by('-menu_price_total', 'id')[:20])
+
+    def test_dashboard_status_distribution(self):
+        self.assertUsesIndex(
+            Event.objects.filter(company=self.company).values('status').annotate(count=Count('id')).order_by('status')
+        )
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='ETag Buffet',
+            email='buffet@etag.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='etaguser',
+            email='etag@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+        self.menu_item = MenuItem.objects.create(
+            company=self.company,
+            name='Risoto',
+            category='main',
+            cost_per_person=Decimal('10.00'),
+            price_per_person=Decimal('20.00')
+        )
+        self.event = Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title='Casamento',
+            event_type='wedding',
+            event_date=date.today() + timedelta(days=5),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=100
+        )
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+        return first['ETag']
+
+    def test_unchanged_data_returns_304_without_queries(self):
+        urls = [
+            '/api/events/',
+            '/api/events/calendar/',
+            '/api/events/menu-items/',
+            '/api/clients/',
+            '/api/dashboard/stats/',
+            '/api/dashboard/upcoming_events/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.revalidate(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(len(queries), 0)
+
+    def test_writes_change_the_etag(self):
+        etag = self.revalidate('/api/events/')
+
+        EventMenu.objects.create(event=self.event, menu_item=self.menu_item, quantity=1)
+
+        response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        response = self.client.put(
+            f'/api/events/{self.event.id}/menu-items/',
+            {'items': []},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query_string_and_company(self):
+        etag = self.revalidate('/api/events/')
+
+        response = self.client.get('/api/events/', {'status': 'concluido'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        other_company = Company.objects.create(name='Outro Buffet', email='outro@etag.com', phone='(11) 1')
+        other_user = User.objects.create_user(
+            username='outro', email='outro@example.com', password='testpass123', company=other_company
+        )
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class AgendaMonthCacheTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Agenda Buffet',
+            email='buffet@agenda.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='agendauser',
+            email='agenda@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+        self.january = self.create_event(date(2030, 1, 10))
+        self.create_event(date(2030, 2, 20))
+
+    def create_event(self, event_date, title='Evento'):
+        return Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title=title,
+            event_type='birthday',
+            event_date=event_date,
+            start_time=time(18, 0),
+            end_time=time(22, 0),
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=50
+        )
+
+    def month(self, month):
+        response = self.client.get(reverse('events:calendar'), {'year': 2030, 'month': month})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [event['title'] for event in response.data['events']]
+
+    def agenda(self, start, end):
+        response = self.client.get(reverse('events:agenda'), {'start_date': start, 'end_date': end})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [event['event_date'] for event in response.data['events']]
+
+    def test_months_are_served_from_the_cache(self):
+        with self.assertQueryBudget(1):
+            self.month(1)
+        with self.assertQueryBudget(0):
+            self.assertEqual(self.month(1), ['Evento'])
+
+        # A range only loads the months that are not cached yet, with one query
+        with self.assertQueryBudget(1):
+            self.assertEqual(self.agenda('2030-01-05', '2030-03-31'), ['2030-01-10', '2030-02-20'])
+        with self.assertQueryBudget(0):
+            self.assertEqual(self.agenda('2030-01-15', '2030-02-28'), ['2030-02-20'])
+
+    def test_writes_invalidate_only_their_months(self):
+        self.agenda('2030-01-01', '2030-03-31')
+
+        self.create_event(date(2030, 2, 21), title='Novo')
+        with self.assertQueryBudget(1) as context:
+            self.assertEqual(self.month(2), ['Evento', 'Novo'])
+        self.assertIn('2030-02-01', context.captured_queries[0]['sql'])
+        with self.assertQueryBudget(0):
+            self.month(1)
+
+        # Moving an event refreshes both its old and its new month
+        self.january.event_date = date(2030, 3, 5)
+        self.january.save()
+        self.assertEqual(self.month(1), [])
+        self.assertEqual(self.agenda('2030-03-01', '2030-03-31'), ['2030-03-05'])
+
+        self.january.delete()
+        self.assertEqual(self.agenda('2030-03-01', '2030-03-31'), [])
+
+    def test_invalid_parameters(self):
+        url = reverse('events:calendar')
+        for params in ({'month': 13}, {'year': 'abc'}, {'start_date': '2030-01-01', 'end_date': 'x'}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url, {'start_date': '2030-01-01', 'end_date': '2035-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CalendarFeedTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Feed Buffet',
+            email='buffet@feed.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='feeduser',
+            email='feed@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+        self.event = self.create_event(self.today + timedelta(days=3), title='Casamento; Silva, Souza')
+        self.create_event(self.today + timedelta(days=10), title='Formatura', status='proposta_recusada')
+        self.create_event(self.today - timedelta(days=60), title='Antigo')
+
+        self.token = self.client.get(reverse('events:calendar_feed')).data['token']
+        self.url = reverse('events:calendar_feed_ics', args=[self.token])
+
+    def create_event(self, event_date, title='Evento', status='proposta_aceita'):
+        return Event.objects.create(
+            company=self.company,
+            created_by=self.user,
+            title=title,
+            event_type='wedding',
+            event_date=event_date,
+            start_time=time(19, 0),
+            end_time=time(1, 0),
+            venue_location='Salão Principal',
+            client_name='Cliente',
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=100,
+            status=status
+        )
+
+    def fetch(self, url=None, **params):
+        # Calendar apps don't log in: the token is the only credential
+        response = APIClient().get(url or self.url, params, HTTP_ACCEPT='text/calendar')
+        body = b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+        return response, body
+
+    def test_feed_streams_events_in_the_window(self):
+        response, body = self.fetch()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+        self.assertNotIn('Antigo', body)
+
+        self.assertIn(f'UID:event-{self.event.pk}@buffetflow\r\n', body)
+        self.assertIn('SUMMARY:Casamento\\; Silva\\, Souza\r\n', body)
+        self.assertIn('STATUS:CANCELLED\r\n', body)
+        # 19:00-01:00 in São Paulo (UTC-3) is 22:00-04:00 UTC, ending the next day
+        day = self.event.event_date
+        self.assertIn(f'DTSTART:{day:%Y%m%d}T220000Z\r\n', body)
+        self.assertIn(f'DTEND:{day + timedelta(days=1):%Y%m%d}T040000Z\r\n', body)
+
+        _, body = self.fetch(past_days=90, future_days=5)
+        self.assertIn('Antigo', body)
+        self.assertNotIn('Formatura', body)
+
+    def test_feed_revalidates_with_etag(self):
+        response, _ = self.fetch()
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)  # the token lookup
+
+        self.event.title = 'Casamento adiado'
+        self.event.save()
+        response = APIClient().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_rotating_the_token_revokes_the_old_url(self):
+        response = self.client.post(reverse('events:calendar_feed'))
+        self.assertNotEqual(response.data['token'], self.token)
+        self.assertTrue(response.data['url'].endswith(f"/{response.data['token']}.ics"))
+        self.assertEqual(CalendarFeed.objects.filter(company=self.company).count(), 1)
+
+        self.assertEqual(self.fetch()[0].status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.fetch(response.data['url'])[0].status_code, status.HTTP_200_OK)
+
+    def test_invalid_window(self):
+        for params in ({'past_days': 'x'}, {'future_days': -1}, {'future_days': 5000}):
+            with self.subTest(params=params):
+                self.assertEqual(self.fetch(**params)[0].status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_long_lines_are_folded(self):
+        line = 'DESCRIPTION:' + 'ção ' * 40
+        folded = fold(line)
+        self.assertEqual(folded.replace('\r\n ', ''), line + '\r\n')
+        self.assertTrue(all(len(part.encode()) <= 75 for part in folded.split('\r\n')))
+
@@ -6,8 +6,11 @@ app_name = 'events'
 urlpatterns = [
     path('', views.events_view, name='events'),
     path('<int:event_id>/', views.event_detail_view, name='event_detail'),
+    path('export/', views.export_events_view, name='export_events'),
     path('calendar/', views.calendar_view, name='calendar'),
     path('agenda/', views.calendar_view, name='agenda'),  # Alias for agenda view
+    path('calendar-feed/', views.calendar_feed_view, name='calendar_feed'),
+    path('calendar-feed/<str:token>.ics', views.calendar_feed_ics_view, name='calendar_feed_ics'),
 
     path('menu-items/', views.menu_items_view, name='menu_items'),
     path('menu-items/<int:item_id>/', views.menu_item_detail_view, name='menu_item_detail'),
@@ -15,7 +18,12 @@ urlpatterns = [
     path('<int:event_id>/menu-items/', views.event_menu_items_view, name='event_menu_items'),
     path('<int:event_id>/cost-calculation/', views.event_cost_calculation_view, name='event_cost_calculation'),
     path('<int:event_id>/calculate-cost/', views.calculate_cost_view, name='calculate_cost'),
+    path('calculate-cost/batch/', views.calculate_cost_batch_view, name='calculate_cost_batch'),
     path('<int:event_id>/generate-proposal-pdf/', views.generate_proposal_pdf_view, name='generate_proposal_pdf'),
+    path('<int:event_id>/proposal-pdf-jobs/', views.proposal_pdf_jobs_view, name='proposal_pdf_jobs'),
+    path('proposal-pdf-jobs/<int:job_id>/', views.proposal_pdf_job_detail_view, name='proposal_pdf_job_detail'),
+    path('proposals/export/', views.export_proposals_view, name='export_proposals'),
+    path('proposal-pdf-jobs/<int:job_id>/download/', views.proposal_pdf_job_download_view, name='proposal_pdf_job_download'),
 
     path('<int:event_id>/menu/', views.add_menu_to_event_view, name='add_menu_to_event'),
     path('<int:event_id>/menu/<int:menu_item_id>/', views.remove_menu_from_event_view, name='remove_menu_from_event'),
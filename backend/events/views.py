@@ -1,20 +1,41 @@
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, renderer_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from django.http import HttpResponse
-from datetime import datetime, date
-from .models import Event, MenuItem, EventMenu
+from django.urls import reverse
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from .models import Event, MenuItem, EventMenu, ProposalPDFJob, CalendarFeed
 from .serializers import (
     EventSerializer,
     EventCreateSerializer,
     EventListSerializer,
-    EventAgendaSerializer,
     MenuItemSerializer,
-    EventMenuSerializer
+    EventMenuSerializer,
+    ProposalPDFJobSerializer,
+    CostMatrixRequestSerializer,
+    EventMenuBulkSerializer
+)
+from .menu_totals import batch_menu_totals
+from .agenda import agenda_events, AgendaRangeError
+from .filters import EventFilterError, filter_events
+from .ics import ICalendarRenderer, FeedWindowError, feed_events, feed_window, ics_stream
+from .cost_matrix import cost_matrix, CostMatrixError
+from .pdf_service import load_proposal_assets
+from .proposal_export import stream_proposal_zip
+from .proposal_cache import proposal_fingerprint, cached_proposal_path, proposal_path, store_proposal_pdf
+from .tasks import render_proposal_pdf
+from .conflicts import find_conflicts, conflicting_ids_for
+from .pagination import EventKeysetPagination
+from buffetflow.export import EXPORT_RENDERERS, ExportError, export_response
+from buffetflow.cache import (
+    bump_company_version, company_etag, conditional_per_company, etag_matches, set_revalidation_headers,
 )
-from .pdf_service import generate_event_proposal_pdf
 
 def validate_event_status_change(event_data):
     """
@@ -28,41 +49,50 @@ def validate_event_status_change(event_data):
 
     return None
 
+def serialize_event_detail(event):
+    """Serialize a single event, checking its day for conflicts in one query"""
+    prefetch_related_objects([event], 'menu_items__menu_item')
+    conflicts = find_conflicts(event.company_id, event.event_date, event.event_date)
+    return EventSerializer(event, context={'conflicting_ids': conflicts.conflicting_ids}).data
+
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional_per_company('events')
 def events_view(request):
     if request.method == 'GET':
-        events = Event.objects.filter(company=request.user.company)
-        
-        # Filter by date range
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        if start_date:
-            events = events.filter(event_date__gte=start_date)
-        if end_date:
-            events = events.filter(event_date__lte=end_date)
-        
-        # Filter by status
-        status_filter = request.GET.get('status')
-        if status_filter:
-            events = events.filter(status=status_filter)
-        
-        # Filter by event type
-        event_type = request.GET.get('event_type')
-        if event_type:
-            events = events.filter(event_type=event_type)
-        
-        # Search
-        search = request.GET.get('search')
-        if search:
-            events = events.filter(
-                Q(title__icontains=search) |
-                Q(client_name__icontains=search) |
-                Q(description__icontains=search)
+        try:
+            events = filter_events(
+                Event.objects.filter(company=request.user.company), request.GET, request.user.company_id
             )
-        
-        serializer = EventListSerializer(events, many=True)
-        return Response(serializer.data)
+        except EventFilterError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Field projection
+        fields = request.GET.get('fields')
+        if fields:
+            fields = [name.strip() for name in fields.split(',') if name.strip()]
+            invalid_fields = sorted(set(fields) - set(EventListSerializer.Meta.fields))
+            if invalid_fields:
+                return Response({'fields': [f'Campos inválidos: {", ".join(invalid_fields)}']},
+                                status=status.HTTP_400_BAD_REQUEST)
+        else:
+            fields = None
+
+        paginator = EventKeysetPagination()
+        ordering = request.GET.get('ordering')
+        if ordering:
+            if ordering.lstrip('-') not in EventKeysetPagination.sort_fields:
+                return Response({'ordering': [f'Ordenação inválida: {ordering}']}, status=status.HTTP_400_BAD_REQUEST)
+            paginator.ordering = (ordering, 'id')
+        events = EventListSerializer.setup_queryset(events, fields, paginator.get_ordering_fields_names())
+
+        page = paginator.paginate_queryset(events, request)
+
+        context = {}
+        if fields is None or 'is_conflicting' in fields:
+            context['conflicting_ids'] = conflicting_ids_for(request.user.company, page)
+        serializer = EventListSerializer(page, many=True, fields=fields, context=context)
+        return paginator.get_paginated_response(serializer.data)
     
     elif request.method == 'POST':
         if not request.user.company:
@@ -79,7 +109,7 @@ def events_view(request):
                 company=request.user.company,
                 created_by=request.user
             )
-            return Response(EventSerializer(event).data, status=status.HTTP_201_CREATED)
+            return Response(serialize_event_detail(event), status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'PUT', 'DELETE'])
@@ -88,8 +118,7 @@ def event_detail_view(request, event_id):
     event = get_object_or_404(Event, id=event_id, company=request.user.company)
     
     if request.method == 'GET':
-        serializer = EventSerializer(event)
-        return Response(serializer.data)
+        return Response(serialize_event_detail(event))
     
     elif request.method == 'PUT':
         # Validate status change
@@ -100,7 +129,7 @@ def event_detail_view(request, event_id):
         serializer = EventCreateSerializer(event, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            return Response(EventSerializer(event).data)
+            return Response(serialize_event_detail(event))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
@@ -109,44 +138,59 @@ def event_detail_view(request, event_id):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
-def calendar_view(request):
+@renderer_classes(EXPORT_RENDERERS)
+def export_events_view(request):
+    """Stream the events matching the list filters as CSV (default) or XLSX (``?format=xlsx``)"""
     if not request.user.company:
         return Response({'error': 'No company associated'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return export_response(request, 'events')
+    except ExportError as e:
+        return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    events = Event.objects.filter(company=request.user.company)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@conditional_per_company('calendar')
+def calendar_view(request):
+    if not request.user.company:
+        return Response({'error': 'No company associated'}, status=status.HTTP_400_BAD_REQUEST)
 
     # Support both date range and month/year filtering
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
 
-    if start_date and end_date:
-        # Date range filtering for agenda view
-        events = events.filter(event_date__gte=start_date, event_date__lte=end_date)
-    else:
-        # Legacy month/year filtering
-        year = int(request.GET.get('year', datetime.now().year))
-        month = int(request.GET.get('month', datetime.now().month))
-        events = events.filter(event_date__year=year, event_date__month=month)
-
-    events = events.order_by('event_date', 'start_time')
-
-    # Use optimized serializer for agenda view
-    serializer = EventAgendaSerializer(events, many=True)
+    try:
+        if start_date and end_date:
+            # Date range filtering for agenda view
+            start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        else:
+            # Legacy month/year filtering
+            today = date.today()
+            year = int(request.GET.get('year', today.year))
+            month = int(request.GET.get('month', today.month))
+            start = date(year, month, 1)
+            end = start + relativedelta(months=1, days=-1)
+    except ValueError:
+        return Response({'error': 'Invalid date parameters'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Served from the cached month buckets of the company
+    try:
+        events = agenda_events(request.user.company_id, start, end)
+    except AgendaRangeError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     # Return different response formats based on filtering method
     if start_date and end_date:
-        return Response({'events': serializer.data})
-    else:
-        year = int(request.GET.get('year', datetime.now().year))
-        month = int(request.GET.get('month', datetime.now().month))
-        return Response({
-            'year': year,
-            'month': month,
-            'events': serializer.data
-        })
+        return Response({'events': events})
+    return Response({
+        'year': year,
+        'month': month,
+        'events': events
+    })
 
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional_per_company('menu-items')
 def menu_items_view(request):
     if request.method == 'GET':
         menu_items = MenuItem.objects.filter(company=request.user.company)
@@ -226,17 +270,70 @@ def remove_menu_from_event_view(request, event_id, menu_item_id):
     event_menu.delete()
     return Response({'message': 'Menu item removed from event'}, status=status.HTTP_204_NO_CONTENT)
 
-@api_view(['GET', 'POST'])
+def replace_event_menu(event, items):
+    """
+    Make the menu rows of ``event`` match ``items`` ({menu_item: quantity})
+    with one bulk_create, one bulk_update and one delete in a transaction.
+    """
+    existing = {row.menu_item_id: row for row in EventMenu.objects.filter(event=event)}
+
+    created = [
+        EventMenu(event=event, menu_item_id=menu_item_id, quantity=quantity)
+        for menu_item_id, quantity in items.items()
+        if menu_item_id not in existing
+    ]
+    updated = []
+    for menu_item_id, row in existing.items():
+        if menu_item_id in items and row.quantity != items[menu_item_id]:
+            row.quantity = items[menu_item_id]
+            updated.append(row)
+    removed = [row.id for menu_item_id, row in existing.items() if menu_item_id not in items]
+
+    with transaction.atomic(), batch_menu_totals() as changed_event_ids:
+        # Bulk operations don't send the signals that maintain the totals
+        changed_event_ids.add(event.pk)
+        if created:
+            EventMenu.objects.bulk_create(created)
+        if updated:
+            EventMenu.objects.bulk_update(updated, ['quantity'])
+        if removed:
+            EventMenu.objects.filter(id__in=removed).delete()
+    # Menu changes inside batch_menu_totals don't invalidate the company's cached data
+    bump_company_version(event.company_id)
+
+@api_view(['GET', 'POST', 'PUT'])
 @permission_classes([permissions.IsAuthenticated])
 def event_menu_items_view(request, event_id):
-    """Get or add menu items for a specific event"""
+    """Get, add or replace (PUT, whole menu at once) menu items for a specific event"""
     event = get_object_or_404(Event, id=event_id, company=request.user.company)
 
     if request.method == 'GET':
-        event_menus = EventMenu.objects.filter(event=event).select_related('menu_item')
+        event_menus = EventMenu.objects.filter(event=event).select_related('menu_item', 'event')
         serializer = EventMenuSerializer(event_menus, many=True)
         return Response(serializer.data)
 
+    elif request.method == 'PUT':
+        serializer = EventMenuBulkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        items = {item['menu_item']: item['quantity'] for item in serializer.validated_data['items']}
+
+        found = set(MenuItem.objects.filter(company=request.user.company, id__in=items).values_list('id', flat=True))
+        missing = sorted(set(items) - found)
+        if missing:
+            return Response({'error': f'Itens do cardápio não encontrados: {", ".join(map(str, missing))}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        replace_event_menu(event, items)
+        event.refresh_from_db(fields=['menu_cost_total', 'menu_price_total'])
+
+        event_menus = EventMenu.objects.filter(event=event).select_related('menu_item', 'event')
+        return Response({
+            'items': EventMenuSerializer(event_menus, many=True).data,
+            'menu_cost_total': str(event.menu_cost_total),
+            'menu_price_total': str(event.menu_price_total),
+        })
+
     elif request.method == 'POST':
         menu_item_id = request.data.get('menu_item')
         quantity = request.data.get('quantity', 1)
@@ -324,24 +421,161 @@ def calculate_cost_view(request, event_id):
 
     return Response({'estimated_cost': float(total_cost)})
 
-@api_view(['GET'])
+@api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
-def generate_proposal_pdf_view(request, event_id):
-    """Generate and download a proposal PDF for an event"""
-    event = get_object_or_404(Event, id=event_id, company=request.user.company)
+def calculate_cost_batch_view(request):
+    """Cost and price of many menu/guest count/margin scenarios and saved events at once"""
+    serializer = CostMatrixRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Generate PDF
-        pdf_content = generate_event_proposal_pdf(event)
+        scenarios = cost_matrix(request.user.company, **serializer.validated_data)
+    except CostMatrixError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create response
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="orcamento-evento-{event.id}.pdf"'
+    return Response({'scenarios': scenarios})
 
-        return response
+def proposal_pdf_response(path, event_id):
+    response = FileResponse(default_storage.open(path, 'rb'), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="orcamento-evento-{event_id}.pdf"'
+    return response
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def generate_proposal_pdf_view(request, event_id):
+    """Download a proposal PDF for an event, rendering it only if it is not cached"""
+    event = get_object_or_404(
+        Event.objects.select_related('company').prefetch_related('menu_items__menu_item'),
+        id=event_id,
+        company=request.user.company
+    )
+
+    try:
+        _, path = store_proposal_pdf(event)
+        return proposal_pdf_response(path, event.id)
 
     except Exception as e:
         return Response(
             {'error': f'Erro ao gerar PDF: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def proposal_pdf_jobs_view(request, event_id):
+    """Queue the render of a proposal PDF; already rendered proposals finish immediately"""
+    event = get_object_or_404(Event.objects.select_related('company'), id=event_id, company=request.user.company)
+
+    fingerprint = proposal_fingerprint(event)
+    if cached_proposal_path(event, fingerprint):
+        job = ProposalPDFJob.objects.create(
+            event=event,
+            requested_by=request.user,
+            fingerprint=fingerprint,
+            status='done',
+            cache_hit=True,
+            finished_at=timezone.now()
+        )
+        return Response(ProposalPDFJobSerializer(job, context={'request': request}).data)
+
+    job = ProposalPDFJob.objects.create(event=event, requested_by=request.user, fingerprint=fingerprint)
+    transaction.on_commit(lambda: render_proposal_pdf.delay(job.id))
+    return Response(ProposalPDFJobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def proposal_pdf_job_detail_view(request, job_id):
+    """Poll the status of a proposal PDF job"""
+    job = get_object_or_404(ProposalPDFJob, id=job_id, event__company=request.user.company)
+    return Response(ProposalPDFJobSerializer(job, context={'request': request}).data)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def proposal_pdf_job_download_view(request, job_id):
+    """Download the PDF of a finished job"""
+    job = get_object_or_404(
+        ProposalPDFJob.objects.select_related('event'), id=job_id, event__company=request.user.company
+    )
+    path = proposal_path(job.event.company_id, job.fingerprint)
+    if job.status != 'done' or not default_storage.exists(path):
+        return Response({'error': 'PDF ainda não disponível'}, status=status.HTTP_409_CONFLICT)
+
+    return proposal_pdf_response(path, job.event_id)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_proposals_view(request):
+    """Stream a ZIP with the proposal PDFs of the events matching a date range and/or statuses"""
+    events = Event.objects.filter(company=request.user.company)
+
+    try:
+        start_date = request.GET.get('start_date')
+        end_date = request.GET.get('end_date')
+        if start_date:
+            events = events.filter(event_date__gte=date.fromisoformat(start_date))
+        if end_date:
+            events = events.filter(event_date__lte=date.fromisoformat(end_date))
+    except ValueError:
+        return Response({'error': 'Datas devem estar no formato YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    statuses = [value for value in request.GET.get('status', '').split(',') if value]
+    if statuses:
+        events = events.filter(status__in=statuses)
+
+    assets = load_proposal_assets(request.user.company)
+    response = StreamingHttpResponse(
+        stream_proposal_zip(events.order_by('event_date', 'start_time', 'id'), assets),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = 'attachment; filename="propostas.zip"'
+    return response
+
+
+def _calendar_feed_payload(request, feed):
+    return {
+        'token': feed.token,
+        'url': request.build_absolute_uri(reverse('events:calendar_feed_ics', args=[feed.token])),
+        'updated_at': feed.updated_at,
+    }
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def calendar_feed_view(request):
+    """The company's iCalendar subscription URL; POST rotates the token, invalidating the old URL"""
+    if not request.user.company:
+        return Response({'error': 'No company associated'}, status=status.HTTP_400_BAD_REQUEST)
+
+    feed, created = CalendarFeed.objects.get_or_create(company=request.user.company)
+    if request.method == 'POST' and not created:
+        feed.rotate()
+    return Response(_calendar_feed_payload(request, feed))
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+@renderer_classes([ICalendarRenderer])
+def calendar_feed_ics_view(request, token):
+    """
+    Stream the company's events as an .ics file. The token in the URL is the
+    credential, since calendar apps can't log in. past_days/future_days
+    select the synced window; unchanged feeds are answered with 304.
+    """
+    feed = get_object_or_404(CalendarFeed.objects.select_related('company'), token=token)
+
+    try:
+        first, last = feed_window(request.GET, timezone.localdate())
+    except FeedWindowError as e:
+        return HttpResponse(str(e), status=status.HTTP_400_BAD_REQUEST, content_type='text/plain; charset=utf-8')
+
+    etag = company_etag('calendar-feed', feed.company_id, feed.token, first, last)
+    if etag_matches(etag, request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = StreamingHttpResponse(
+            ics_stream(feed.company, feed_events(feed.company, first, last)),
+            content_type='text/calendar; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'inline; filename="agenda.ics"'
+    set_revalidation_headers(response, etag)
+    return response
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class FinancialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'financials'
+
+    def ready(self):
+        from buffetflow.cache import invalidate_on_change
+        from .models import FinancialTransaction, Quote
+        # Connect the signal handlers that keep MonthlyFinancialRollup in sync
+        from .rollups import quote_company_id
+
+        invalidate_on_change(FinancialTransaction, lambda transaction: transaction.company_id)
+        invalidate_on_change(Quote, quote_company_id)
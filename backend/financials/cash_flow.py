@@ -0,0 +1,139 @@
+"""
+Cash-flow series for the financial dashboard.
+
+The whole series is computed with one grouped query (truncate the
+transaction date to the period, conditional Sum per type) and then
+gap-filled in Python, so longer horizons don't cost more queries.
+"""
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncQuarter
+
+from .models import FinancialTransaction, MonthlyFinancialRollup
+
+MAX_PERIODS = 1000
+
+
+def _quarter_start(day):
+    return day.replace(month=3 * ((day.month - 1) // 3) + 1, day=1)
+
+
+# granularity -> (Trunc function, first day of the period, step to the next period)
+GRANULARITIES = {
+    'day': (TruncDay, lambda day: day, relativedelta(days=1)),
+    'week': (TruncWeek, lambda day: day - datetime.timedelta(days=day.weekday()), relativedelta(weeks=1)),
+    'month': (TruncMonth, lambda day: day.replace(day=1), relativedelta(months=1)),
+    'quarter': (TruncQuarter, _quarter_start, relativedelta(months=3)),
+}
+
+
+class CashFlowParamsError(ValueError):
+    pass
+
+
+def default_range(today):
+    """Last 12 calendar months, including the whole current one"""
+    current_month = today.replace(day=1)
+    return current_month - relativedelta(months=11), current_month + relativedelta(months=1, days=-1)
+
+
+def covers_whole_months(start, end):
+    return start.day == 1 and (end + datetime.timedelta(days=1)).day == 1
+
+
+def parse_params(params, today):
+    """Validate the from/to/granularity query parameters"""
+    granularity = params.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        raise CashFlowParamsError(f'granularity must be one of: {", ".join(GRANULARITIES)}')
+
+    start, end = default_range(today)
+    try:
+        if params.get('from'):
+            start = datetime.date.fromisoformat(params['from'])
+        if params.get('to'):
+            end = datetime.date.fromisoformat(params['to'])
+    except ValueError:
+        raise CashFlowParamsError('from and to must be dates in the format YYYY-MM-DD')
+
+    if start > end:
+        raise CashFlowParamsError('from must be before to')
+
+    return start, end, granularity
+
+
+def period_starts(start, end, granularity):
+    _, period_start, step = GRANULARITIES[granularity]
+    current = period_start(start)
+    periods = []
+    while current <= end:
+        periods.append(current)
+        if len(periods) > MAX_PERIODS:
+            raise CashFlowParamsError(f'The requested range has more than {MAX_PERIODS} periods')
+        current += step
+    return periods
+
+
+def _fill_periods(periods, rows):
+    totals = {row['period']: row for row in rows}
+
+    series = []
+    for period in periods:
+        row = totals.get(period, {})
+        series.append({
+            'period': period.isoformat(),
+            'month': period.strftime('%Y-%m'),
+            'income': row.get('income') or 0,
+            'expense': row.get('expense') or 0,
+        })
+    return series
+
+
+def cash_flow_series(transactions, start, end, granularity='month'):
+    """
+    Completed income/expense per period between start and end, with empty
+    periods filled with zeros.
+    """
+    periods = period_starts(start, end, granularity)
+    trunc, _, _ = GRANULARITIES[granularity]
+
+    rows = transactions.filter(
+        status='COMPLETED',
+        transaction_date__gte=start,
+        transaction_date__lte=end,
+    ).annotate(period=trunc('transaction_date')).values('period').annotate(
+        income=Sum('amount', filter=Q(transaction_type='INCOME')),
+        expense=Sum('amount', filter=Q(transaction_type='EXPENSE')),
+    ).order_by('period')
+
+    return _fill_periods(periods, rows)
+
+
+def rollup_cash_flow_series(company, start, end, granularity='month'):
+    """Same as cash_flow_series, read from the monthly rollups (whole months only)"""
+    periods = period_starts(start, end, granularity)
+    trunc, _, _ = GRANULARITIES[granularity]
+
+    rows = MonthlyFinancialRollup.objects.filter(
+        company=company,
+        month__gte=start,
+        month__lte=end,
+    ).annotate(period=trunc('month')).values('period').annotate(
+        income=Sum('income'),
+        expense=Sum('expense'),
+    ).order_by('period')
+
+    return _fill_periods(periods, rows)
+
+
+def company_cash_flow_series(company, start, end, granularity='month'):
+    """
+    Use the monthly rollups when the range is made of whole months and the
+    granularity is month or quarter; fall back to the raw transactions otherwise.
+    """
+    if granularity in ('month', 'quarter') and covers_whole_months(start, end):
+        return rollup_cash_flow_series(company, start, end, granularity)
+
+    return cash_flow_series(FinancialTransaction.objects.filter(company=company), start, end, granularity)
@@ -0,0 +1,14 @@
+import django_filters
+
+from .models import FinancialTransaction
+
+
+class FinancialTransactionFilter(django_filters.FilterSet):
+    start_date = django_filters.DateFilter(field_name='transaction_date', lookup_expr='gte')
+    end_date = django_filters.DateFilter(field_name='transaction_date', lookup_expr='lte')
+    type = django_filters.ChoiceFilter(field_name='transaction_type', choices=FinancialTransaction.TRANSACTION_TYPE_CHOICES)
+    event = django_filters.NumberFilter(field_name='related_event_id')
+
+    class Meta:
+        model = FinancialTransaction
+        fields = ['start_date', 'end_date', 'type', 'transaction_type', 'status', 'event']
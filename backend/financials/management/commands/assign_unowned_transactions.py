@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from buffetflow.cache import bump_company_version
+from users.models import Company
+from financials.models import FinancialTransaction
+from financials.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'List the financial transactions without a company (left over by migration 0003 when they had no '
+        'event and several companies existed), or assign them to a company and rebuild its rollups'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Assign the transactions to this company id')
+        parser.add_argument(
+            '--id', type=int, action='append', dest='ids',
+            help='Only assign this transaction id (repeatable; all unowned transactions by default)',
+        )
+
+    def handle(self, *args, **options):
+        unowned = FinancialTransaction.objects.filter(company__isnull=True)
+        if options['ids']:
+            unowned = unowned.filter(pk__in=options['ids'])
+
+        if not options['company']:
+            for transaction_id, description, amount, transaction_date in unowned.order_by('id').values_list(
+                'id', 'description', 'amount', 'transaction_date'
+            ):
+                self.stdout.write(f'#{transaction_id} {transaction_date} {amount} {description}')
+            self.stdout.write(f'{unowned.count()} transactions without a company')
+            return
+
+        try:
+            company = Company.objects.get(pk=options['company'])
+        except Company.DoesNotExist:
+            raise CommandError(f"Company {options['company']} not found")
+
+        count = unowned.update(company=company)
+        # update() sends no signals: rebuild what they would have maintained
+        rebuild_rollups(company)
+        bump_company_version(company.pk)
+        self.stdout.write(self.style.SUCCESS(f'Assigned {count} transactions to {company}'))
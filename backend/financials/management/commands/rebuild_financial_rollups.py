@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import Company
+from financials.rollups import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly financial rollups from the raw transactions and quotes, then verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Only rebuild the rollups of this company id')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify the stored rollups against the raw data, without rebuilding',
+        )
+
+    def handle(self, *args, **options):
+        company = None
+        if options['company']:
+            try:
+                company = Company.objects.get(pk=options['company'])
+            except Company.DoesNotExist:
+                raise CommandError(f"Company {options['company']} not found")
+
+        if not options['check']:
+            count = rebuild_rollups(company)
+            self.stdout.write(f'Rebuilt {count} monthly rollup rows')
+
+        mismatches = verify_rollups(company)
+        for company_id, month, field, stored, expected in mismatches:
+            self.stderr.write(
+                f'company={company_id} month={month:%Y-%m} {field}: stored {stored}, expected {expected}'
+            )
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} rollup values do not match the raw data')
+
+        self.stdout.write(self.style.SUCCESS('Monthly rollups match the raw data'))
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def assign_company_from_event(apps, schema_editor):
+    """
+    Give every existing transaction a company: the one of its event, or the
+    only company when there is just one. Transactions without an event in a
+    multi-company database can't be attributed automatically and keep no
+    company: ``manage.py assign_unowned_transactions`` lists them and assigns
+    them (until then the company-scoped lists, rollups and dashboards don't
+    show them).
+    """
+    FinancialTransaction = apps.get_model('financials', 'FinancialTransaction')
+    Event = apps.get_model('events', 'Event')
+    Company = apps.get_model('users', 'Company')
+
+    company_id = Event.objects.filter(pk=models.OuterRef('related_event_id')).values('company_id')[:1]
+    FinancialTransaction.objects.filter(
+        company__isnull=True,
+        related_event__isnull=False
+    ).update(company_id=models.Subquery(company_id))
+
+    companies = list(Company.objects.values_list('pk', flat=True)[:2])
+    if len(companies) == 1:
+        FinancialTransaction.objects.filter(company__isnull=True).update(company_id=companies[0])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_client'),
+        ('users', '0003_company_logo'),
+        ('financials', '0002_financialtransaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialtransaction',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='financial_transactions', to='users.company'),
+        ),
+        migrations.RunPython(assign_company_from_event, migrations.RunPython.noop),
+    ]
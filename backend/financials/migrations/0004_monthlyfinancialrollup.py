@@ -0,0 +1,95 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:56
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncMonth
+import django.db.models.deletion
+
+ROLLUP_FIELDS = (
+    'income', 'expense', 'receivable', 'approved_quote_value',
+    'transaction_count', 'quote_count', 'sent_quote_count', 'approved_quote_count',
+)
+
+
+def fill_rollups(apps, schema_editor):
+    """Fill the rollups from the existing transactions and quotes (same grouped queries as compute_rollups)"""
+    FinancialTransaction = apps.get_model('financials', 'FinancialTransaction')
+    Quote = apps.get_model('financials', 'Quote')
+    MonthlyFinancialRollup = apps.get_model('financials', 'MonthlyFinancialRollup')
+    Q, Sum, Count = models.Q, models.Sum, models.Count
+
+    buckets = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+
+    transaction_rows = FinancialTransaction.objects.filter(company__isnull=False).annotate(
+        month=TruncMonth('transaction_date')
+    ).values('company_id', 'month').annotate(
+        income=Sum('amount', filter=Q(status='COMPLETED', transaction_type='INCOME')),
+        expense=Sum('amount', filter=Q(status='COMPLETED', transaction_type='EXPENSE')),
+        receivable=Sum('amount', filter=Q(status='PENDING', transaction_type='INCOME')),
+        transaction_count=Count('id'),
+    ).order_by()
+    for row in transaction_rows:
+        bucket = buckets[(row['company_id'], row['month'])]
+        for field in ('income', 'expense', 'receivable', 'transaction_count'):
+            bucket[field] = row[field] or 0
+
+    created_rows = Quote.objects.annotate(
+        month=TruncMonth('created_at', output_field=models.DateField())
+    ).values('event__company_id', 'month').annotate(
+        quote_count=Count('id'),
+        sent_quote_count=Count('id', filter=Q(status='sent')),
+    ).order_by()
+    for row in created_rows:
+        bucket = buckets[(row['event__company_id'], row['month'])]
+        bucket['quote_count'] = row['quote_count']
+        bucket['sent_quote_count'] = row['sent_quote_count']
+
+    approved_rows = Quote.objects.filter(status='approved').annotate(
+        month=TruncMonth(Coalesce('approved_at', 'created_at'), output_field=models.DateField())
+    ).values('event__company_id', 'month').annotate(
+        approved_quote_count=Count('id'),
+        approved_quote_value=Sum('total_price'),
+    ).order_by()
+    for row in approved_rows:
+        bucket = buckets[(row['event__company_id'], row['month'])]
+        bucket['approved_quote_count'] = row['approved_quote_count']
+        bucket['approved_quote_value'] = row['approved_quote_value'] or 0
+
+    MonthlyFinancialRollup.objects.bulk_create([
+        MonthlyFinancialRollup(company_id=company_id, month=month, **values)
+        for (company_id, month), values in sorted(buckets.items())
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_company_logo'),
+        ('financials', '0003_financialtransaction_company'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyFinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('receivable', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('quote_count', models.IntegerField(default=0)),
+                ('sent_quote_count', models.IntegerField(default=0)),
+                ('approved_quote_count', models.IntegerField(default=0)),
+                ('approved_quote_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='financial_rollups', to='users.company')),
+            ],
+            options={
+                'ordering': ['company', 'month'],
+                'unique_together': {('company', 'month')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0004_monthlyfinancialrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financialtransaction',
+            index=models.Index(fields=['company', 'transaction_date', 'id'], name='transaction_company_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='financialtransaction',
+            index=models.Index(condition=models.Q(('status', 'COMPLETED')), fields=['company', 'transaction_date'], name='transaction_completed_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['company', 'created_at'], name='notification_company_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['company'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(condition=models.Q(('status', 'sent')), fields=['valid_until'], name='quote_sent_valid_until_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['approved_at'], name='quote_approved_at_idx'),
+        ),
+    ]
@@ -20,9 +20,22 @@ class FinancialTransaction(models.Model):
     transaction_date = models.DateField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     related_event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='financials')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name='financial_transactions')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset-paginated list (-transaction_date, -id) and date/type/status filters
+            models.Index(fields=['company', 'transaction_date', 'id'], name='transaction_company_date_idx'),
+            # Completed income/expense per period (cash-flow series)
+            models.Index(
+                fields=['company', 'transaction_date'],
+                condition=models.Q(status='COMPLETED'),
+                name='transaction_completed_date_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.description} - {self.get_transaction_type_display()}"
 
@@ -103,6 +116,11 @@ class Quote(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['event', 'version']
+        indexes = [
+            # Open quotes close to expiring, and approvals per month (rollups)
+            models.Index(fields=['valid_until'], condition=models.Q(status='sent'), name='quote_sent_valid_until_idx'),
+            models.Index(fields=['approved_at'], condition=models.Q(status='approved'), name='quote_approved_at_idx'),
+        ]
     
     def __str__(self):
         return f"Quote {self.quote_number} - {self.event.title} (v{self.version})"
@@ -149,6 +167,10 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['company', 'created_at'], name='notification_company_date_idx'),
+            models.Index(fields=['company'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.company.name}"
@@ -184,3 +206,35 @@ class AuditLog(models.Model):
     
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username} {self.get_action_display()} {self.model_name} ({self.object_repr})"
+
+class MonthlyFinancialRollup(models.Model):
+    """
+    Per-company, per-month totals of transactions and quotes.
+
+    Kept up to date incrementally by the signal handlers in
+    financials.rollups; bulk operations that bypass signals must be followed
+    by ``manage.py rebuild_financial_rollups``.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='financial_rollups')
+    month = models.DateField(help_text="First day of the month")
+
+    # Transactions (by transaction_date)
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    receivable = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.IntegerField(default=0)
+
+    # Quotes (created by created_at, approved by approved_at)
+    quote_count = models.IntegerField(default=0)
+    sent_quote_count = models.IntegerField(default=0)
+    approved_quote_count = models.IntegerField(default=0)
+    approved_quote_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['company', 'month']
+        unique_together = ['company', 'month']
+
+    def __str__(self):
+        return f"{self.company.name} - {self.month:%Y-%m}"
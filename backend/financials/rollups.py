@@ -0,0 +1,264 @@
+"""
+Incremental maintenance of MonthlyFinancialRollup.
+
+Every FinancialTransaction/Quote save or delete computes the row's
+contribution to its (company, month) buckets before and after the change
+and applies only the difference with F() updates, so dashboards can read
+O(months) rollup rows instead of aggregating raw rows on every request.
+
+``rebuild_rollups`` recomputes everything from the raw tables and
+``verify_rollups`` reports any drift (e.g. after queryset.update() or
+bulk_create, which don't send signals).
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from events.models import Event
+from .models import FinancialTransaction, MonthlyFinancialRollup, Quote
+
+DECIMAL_FIELDS = ('income', 'expense', 'receivable', 'approved_quote_value')
+COUNT_FIELDS = ('transaction_count', 'quote_count', 'sent_quote_count', 'approved_quote_count')
+ROLLUP_FIELDS = DECIMAL_FIELDS + COUNT_FIELDS
+
+
+def month_of(value):
+    """First day of the month of a date or (aware) datetime"""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value.replace(day=1)
+
+
+def transaction_contribution(financial_transaction):
+    """{(company_id, month): {field: delta}} for one transaction"""
+    if not financial_transaction.company_id or not financial_transaction.transaction_date:
+        return {}
+
+    deltas = {'transaction_count': 1}
+    amount = Decimal(financial_transaction.amount or 0)
+    if financial_transaction.status == 'COMPLETED':
+        if financial_transaction.transaction_type == 'INCOME':
+            deltas['income'] = amount
+        elif financial_transaction.transaction_type == 'EXPENSE':
+            deltas['expense'] = amount
+    elif financial_transaction.status == 'PENDING' and financial_transaction.transaction_type == 'INCOME':
+        deltas['receivable'] = amount
+
+    key = (financial_transaction.company_id, month_of(financial_transaction.transaction_date))
+    return {key: deltas}
+
+
+def quote_company_id(quote):
+    if Quote.event.is_cached(quote):
+        return quote.event.company_id
+    return Event.objects.filter(pk=quote.event_id).values_list('company_id', flat=True).first()
+
+
+def quote_contribution(quote, company_id=None):
+    """{(company_id, month): {field: delta}} for one quote"""
+    company_id = company_id or quote_company_id(quote)
+    if not company_id or not quote.created_at:
+        return {}
+
+    created_key = (company_id, month_of(quote.created_at))
+    contribution = defaultdict(dict)
+    contribution[created_key]['quote_count'] = 1
+    if quote.status == 'sent':
+        contribution[created_key]['sent_quote_count'] = 1
+    elif quote.status == 'approved':
+        approved_key = (company_id, month_of(quote.approved_at or quote.created_at))
+        contribution[approved_key]['approved_quote_count'] = 1
+        contribution[approved_key]['approved_quote_value'] = Decimal(quote.total_price or 0)
+    return dict(contribution)
+
+
+def combine(*weighted_contributions):
+    """Sum (sign, contribution) pairs, dropping zero deltas"""
+    net = defaultdict(lambda: defaultdict(int))
+    for sign, contribution in weighted_contributions:
+        for key, deltas in contribution.items():
+            for field, delta in deltas.items():
+                net[key][field] += sign * delta
+    return {
+        key: {field: delta for field, delta in deltas.items() if delta}
+        for key, deltas in net.items()
+        if any(deltas.values())
+    }
+
+
+def apply_contribution(contribution, create=True):
+    """
+    Add the deltas to their buckets. Removals pass ``create=False`` and only
+    touch existing buckets: when a company is deleted its rollups go in the
+    same cascade, and recreating them would point at the deleted company.
+    """
+    for (company_id, month), deltas in contribution.items():
+        buckets = MonthlyFinancialRollup.objects.filter(company_id=company_id, month=month)
+        if create:
+            rollup, _ = MonthlyFinancialRollup.objects.get_or_create(company_id=company_id, month=month)
+            buckets = MonthlyFinancialRollup.objects.filter(pk=rollup.pk)
+        buckets.update(
+            **{field: F(field) + delta for field, delta in deltas.items()},
+            updated_at=timezone.now(),
+        )
+
+
+def _remember_previous(model, instance, contribution_for):
+    instance._rollup_previous = {}
+    if instance.pk:
+        previous = model.objects.filter(pk=instance.pk).first()
+        if previous:
+            instance._rollup_previous = contribution_for(previous)
+
+
+def _apply_change(instance, contribution_for):
+    previous = getattr(instance, '_rollup_previous', {})
+    with transaction.atomic():
+        apply_contribution(combine((-1, previous), (1, contribution_for(instance))))
+    instance._rollup_previous = {}
+
+
+@receiver(pre_save, sender=FinancialTransaction)
+def transaction_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_previous(FinancialTransaction, instance, transaction_contribution)
+
+
+@receiver(post_save, sender=FinancialTransaction)
+def transaction_post_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _apply_change(instance, transaction_contribution)
+
+
+@receiver(post_delete, sender=FinancialTransaction)
+def transaction_post_delete(sender, instance, **kwargs):
+    apply_contribution(combine((-1, transaction_contribution(instance))), create=False)
+
+
+@receiver(pre_save, sender=Quote)
+def quote_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_previous(Quote, instance, quote_contribution)
+
+
+@receiver(post_save, sender=Quote)
+def quote_post_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _apply_change(instance, quote_contribution)
+
+
+@receiver(post_delete, sender=Quote)
+def quote_post_delete(sender, instance, **kwargs):
+    apply_contribution(combine((-1, quote_contribution(instance))), create=False)
+
+
+def compute_rollups(company=None):
+    """Recompute every bucket from the raw tables with grouped queries"""
+    transactions = FinancialTransaction.objects.filter(company__isnull=False)
+    quotes = Quote.objects.all()
+    if company is not None:
+        transactions = transactions.filter(company=company)
+        quotes = quotes.filter(event__company=company)
+
+    buckets = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+
+    transaction_rows = transactions.annotate(
+        month=TruncMonth('transaction_date')
+    ).values('company_id', 'month').annotate(
+        income=Sum('amount', filter=Q(status='COMPLETED', transaction_type='INCOME')),
+        expense=Sum('amount', filter=Q(status='COMPLETED', transaction_type='EXPENSE')),
+        receivable=Sum('amount', filter=Q(status='PENDING', transaction_type='INCOME')),
+        transaction_count=Count('id'),
+    ).order_by()
+    for row in transaction_rows:
+        bucket = buckets[(row['company_id'], row['month'])]
+        for field in ('income', 'expense', 'receivable', 'transaction_count'):
+            bucket[field] = row[field] or 0
+
+    created_rows = quotes.annotate(
+        month=TruncMonth('created_at', output_field=models.DateField())
+    ).values('event__company_id', 'month').annotate(
+        quote_count=Count('id'),
+        sent_quote_count=Count('id', filter=Q(status='sent')),
+    ).order_by()
+    for row in created_rows:
+        bucket = buckets[(row['event__company_id'], row['month'])]
+        bucket['quote_count'] = row['quote_count']
+        bucket['sent_quote_count'] = row['sent_quote_count']
+
+    approved_rows = quotes.filter(status='approved').annotate(
+        month=TruncMonth(Coalesce('approved_at', 'created_at'), output_field=models.DateField())
+    ).values('event__company_id', 'month').annotate(
+        approved_quote_count=Count('id'),
+        approved_quote_value=Sum('total_price'),
+    ).order_by()
+    for row in approved_rows:
+        bucket = buckets[(row['event__company_id'], row['month'])]
+        bucket['approved_quote_count'] = row['approved_quote_count']
+        bucket['approved_quote_value'] = row['approved_quote_value'] or 0
+
+    return dict(buckets)
+
+
+def rebuild_rollups(company=None):
+    """Replace the stored rollups with a fresh computation; returns the row count"""
+    buckets = compute_rollups(company)
+    rollups = [
+        MonthlyFinancialRollup(company_id=company_id, month=month, **values)
+        for (company_id, month), values in sorted(buckets.items(), key=lambda item: (item[0][0], item[0][1]))
+    ]
+
+    stored = MonthlyFinancialRollup.objects.all()
+    if company is not None:
+        stored = stored.filter(company=company)
+
+    with transaction.atomic():
+        stored.delete()
+        MonthlyFinancialRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def verify_rollups(company=None):
+    """
+    Compare the stored rollups with the raw data.
+
+    Returns a list of (company_id, month, field, stored, expected) for every
+    difference; an empty list means the rollups are consistent.
+    """
+    expected = compute_rollups(company)
+
+    stored_rows = MonthlyFinancialRollup.objects.all()
+    if company is not None:
+        stored_rows = stored_rows.filter(company=company)
+    stored = {
+        (row['company_id'], row['month']): row
+        for row in stored_rows.values('company_id', 'month', *ROLLUP_FIELDS)
+    }
+
+    zero = dict.fromkeys(ROLLUP_FIELDS, 0)
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=lambda item: (item[0], item[1])):
+        expected_values = expected.get(key, zero)
+        stored_values = stored.get(key, zero)
+        for field in ROLLUP_FIELDS:
+            if Decimal(stored_values[field]) != Decimal(expected_values[field]):
+                mismatches.append((key[0], key[1], field, stored_values[field], expected_values[field]))
+    return mismatches
+
+
+def rollup_totals(company, start=None, end=None):
+    """Sum the rollup rows of a company, optionally limited to [start, end] months"""
+    rows = MonthlyFinancialRollup.objects.filter(company=company)
+    if start:
+        rows = rows.filter(month__gte=month_of(start))
+    if end:
+        rows = rows.filter(month__lte=month_of(end))
+    totals = rows.aggregate(**{field: Sum(field) for field in ROLLUP_FIELDS})
+    return {field: value or 0 for field, value in totals.items()}
@@ -9,6 +9,13 @@ class FinancialTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = FinancialTransaction
         fields = '__all__'
+        read_only_fields = ('company', 'created_at', 'updated_at')
+
+    def validate_related_event(self, value):
+        request = self.context.get('request')
+        if value and request and value.company_id != request.user.company_id:
+            raise serializers.ValidationError('Evento não encontrado.')
+        return value
 
 class CostCalculationSerializer(serializers.ModelSerializer):
     total_cost = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
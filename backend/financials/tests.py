@@ -1,10 +1,22 @@
+import importlib
+
+from django.apps import apps as django_apps
+from django.db import connection
 from django.test import TestCase
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from users.models import Company
-from .models import FinancialTransaction
-from datetime import date
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+from events.models import Event
+from django.db.models import Sum
+from buffetflow.testing import QueryPlanMixin
+from .models import FinancialTransaction, MonthlyFinancialRollup, Notification, Quote
+from .rollups import rollup_totals, verify_rollups
+from datetime import date, time, timedelta
+from decimal import Decimal
 
 User = get_user_model()
 
@@ -39,6 +51,7 @@ class FinancialTransactionAPITest(APITestCase):
         self.assertEqual(str(transaction.amount), "150.50")
         self.assertEqual(transaction.transaction_type, "EXPENSE")
         self.assertEqual(transaction.status, "COMPLETED")
+        self.assertEqual(transaction.company, self.company)
 
     def test_create_financial_transaction_income(self):
         """Test creating an income transaction"""
@@ -63,10 +76,495 @@ class FinancialTransactionAPITest(APITestCase):
             description="Test transaction",
             amount=100.00,
             transaction_type="INCOME",
-            transaction_date=date.today()
+            transaction_date=date.today(),
+            company=self.company
         )
 
         response = self.client.get('/api/financials/transactions/')
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class FinancialDashboardCashFlowTest(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Cash Flow Buffet")
+        self.user = User.objects.create_user(
+            username="cashflow",
+            email="cashflow@example.com",
+            password="testpass123",
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_transaction(self, amount, transaction_type, transaction_date, status="COMPLETED"):
+        return FinancialTransaction.objects.create(
+            description="Transação",
+            amount=amount,
+            transaction_type=transaction_type,
+            transaction_date=transaction_date,
+            status=status,
+            company=self.company
+        )
+
+    def test_default_series_covers_last_twelve_calendar_months(self):
+        """The default chart has one entry per calendar month, gaps included"""
+        today = date.today()
+        self.create_transaction("100.00", "INCOME", today)
+        self.create_transaction("40.00", "EXPENSE", today)
+        self.create_transaction("999.00", "INCOME", today, status="PENDING")
+
+        response = self.client.get('/api/financials/financial-dashboard/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        chart = response.data['cash_flow_chart']
+        months = [entry['month'] for entry in chart]
+        self.assertEqual(len(months), 12)
+        self.assertEqual(len(set(months)), 12)
+        self.assertEqual(months[-1], today.strftime('%Y-%m'))
+        self.assertEqual(chart[-1]['income'], Decimal('100.00'))
+        self.assertEqual(chart[-1]['expense'], Decimal('40.00'))
+        self.assertEqual(chart[0]['income'], 0)
+
+        kpis = response.data['kpis']
+        self.assertEqual(kpis['net_profit'], Decimal('60.00'))
+        self.assertEqual(kpis['accounts_receivable'], Decimal('999.00'))
+
+    def test_custom_range_and_granularity(self):
+        """from/to/granularity select the horizon without extra queries"""
+        self.create_transaction("10.00", "INCOME", date(2024, 1, 15))
+        self.create_transaction("20.00", "INCOME", date(2024, 2, 10))
+        self.create_transaction("5.00", "EXPENSE", date(2024, 5, 1))
+
+        url = '/api/financials/financial-dashboard/'
+        response = self.client.get(url, {'from': '2024-01-01', 'to': '2024-12-31', 'granularity': 'quarter'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        chart = response.data['cash_flow_chart']
+        self.assertEqual([entry['period'] for entry in chart],
+                         ['2024-01-01', '2024-04-01', '2024-07-01', '2024-10-01'])
+        self.assertEqual(chart[0]['income'], Decimal('30.00'))
+        self.assertEqual(chart[1]['expense'], Decimal('5.00'))
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'from': '2020-01-01', 'to': '2024-12-31', 'granularity': 'week'})
+        self.assertEqual(response.data['cash_flow_chart'][0]['period'], '2019-12-30')
+
+    def test_invalid_params(self):
+        url = '/api/financials/financial-dashboard/'
+        self.assertEqual(self.client.get(url, {'granularity': 'year'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'from': '2024-13-01'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'from': '2024-02-01', 'to': '2024-01-01'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+
+class FinancialTransactionListTest(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="List Buffet")
+        self.user = User.objects.create_user(
+            username="listuser",
+            email="list@example.com",
+            password="testpass123",
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.event = Event.objects.create(
+            company=self.company,
+            title="Casamento",
+            event_type="wedding",
+            client_name="Cliente",
+            client_email="cliente@example.com",
+            client_phone="(11) 88888-8888",
+            event_date=date(2024, 3, 10),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            guest_count=100
+        )
+
+        rows = [
+            ("100.00", "INCOME", "COMPLETED", date(2024, 1, 5), self.event),
+            ("50.00", "EXPENSE", "COMPLETED", date(2024, 1, 20), None),
+            ("300.00", "INCOME", "PENDING", date(2024, 2, 1), self.event),
+            ("70.00", "EXPENSE", "CANCELED", date(2024, 2, 15), None),
+        ]
+        for amount, transaction_type, transaction_status, transaction_date, event in rows:
+            FinancialTransaction.objects.create(
+                description=f"{transaction_type} {transaction_date}",
+                amount=amount,
+                transaction_type=transaction_type,
+                status=transaction_status,
+                transaction_date=transaction_date,
+                related_event=event,
+                company=self.company
+            )
+
+        other_company = Company.objects.create(name="Other Buffet")
+        FinancialTransaction.objects.create(
+            description="Other company",
+            amount="999.00",
+            transaction_type="INCOME",
+            status="COMPLETED",
+            transaction_date=date(2024, 1, 10),
+            company=other_company
+        )
+
+    def test_list_is_scoped_to_company_with_totals(self):
+        """Only the caller's transactions are listed, newest first, with footer totals"""
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/financials/transactions/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dates = [item['transaction_date'] for item in response.data['results']]
+        self.assertEqual(dates, ['2024-02-15', '2024-02-01', '2024-01-20', '2024-01-05'])
+        self.assertEqual(response.data['results'][1]['related_event_title'], "Casamento")
+        self.assertEqual(response.data['totals'], {
+            'income': Decimal('100.00'),
+            'expense': Decimal('50.00'),
+            'pending': Decimal('300.00'),
+        })
+
+    def test_filters_apply_to_results_and_totals(self):
+        url = '/api/financials/transactions/'
+
+        response = self.client.get(url, {'start_date': '2024-02-01', 'end_date': '2024-02-28'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['totals']['income'], 0)
+        self.assertEqual(response.data['totals']['pending'], Decimal('300.00'))
+
+        response = self.client.get(url, {'type': 'EXPENSE', 'status': 'COMPLETED'})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['totals']['expense'], Decimal('50.00'))
+
+        response = self.client.get(url, {'event': self.event.id})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_keyset_pages(self):
+        url = '/api/financials/transactions/'
+        response = self.client.get(url, {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['transaction_date'] for item in response.data['results']], ['2024-01-05'])
+        self.assertIsNone(response.data['next'])
+
+    def test_cannot_link_event_from_other_company(self):
+        other_company = Company.objects.get(name="Other Buffet")
+        other_event = Event.objects.create(
+            company=other_company,
+            title="Outro",
+            event_type="other",
+            client_name="Cliente",
+            client_email="cliente@example.com",
+            client_phone="(11) 88888-8888",
+            event_date=date(2024, 3, 10),
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            guest_count=10
+        )
+
+        response = self.client.post('/api/financials/transactions/', {
+            "description": "Sinal",
+            "amount": "10.00",
+            "transaction_type": "INCOME",
+            "transaction_date": "2024-03-01",
+            "related_event": other_event.id,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MonthlyFinancialRollupTest(APITestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Rollup Buffet")
+        self.user = User.objects.create_user(
+            username="rollupuser",
+            email="rollup@example.com",
+            password="testpass123",
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+        self.event = Event.objects.create(
+            company=self.company,
+            title="Formatura",
+            event_type="graduation",
+            client_name="Cliente",
+            client_email="cliente@example.com",
+            client_phone="(11) 88888-8888",
+            event_date=date(2024, 6, 1),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            guest_count=200
+        )
+
+    def rollup(self, month):
+        return MonthlyFinancialRollup.objects.get(company=self.company, month=month)
+
+    def assertConsistent(self):
+        self.assertEqual(verify_rollups(), [])
+
+    def test_transactions_update_rollups_incrementally(self):
+        transaction = FinancialTransaction.objects.create(
+            description="Sinal",
+            amount="500.00",
+            transaction_type="INCOME",
+            transaction_date=date(2024, 5, 10),
+            status="PENDING",
+            company=self.company
+        )
+        self.assertEqual(self.rollup(date(2024, 5, 1)).receivable, Decimal('500.00'))
+
+        # Paid and moved to the next month
+        transaction.status = "COMPLETED"
+        transaction.transaction_date = date(2024, 6, 2)
+        transaction.save()
+
+        may, june = self.rollup(date(2024, 5, 1)), self.rollup(date(2024, 6, 1))
+        self.assertEqual((may.receivable, may.transaction_count), (0, 0))
+        self.assertEqual((june.income, june.transaction_count), (Decimal('500.00'), 1))
+        self.assertConsistent()
+
+        transaction.delete()
+        self.assertEqual(self.rollup(date(2024, 6, 1)).income, 0)
+        self.assertConsistent()
+
+    def test_quotes_update_rollups_incrementally(self):
+        quote = Quote.objects.create(
+            event=self.event,
+            total_cost="1000.00",
+            profit_margin="30.00",
+            total_price="1300.00",
+            valid_until=date(2024, 7, 1),
+            status="sent"
+        )
+        self.assertEqual(rollup_totals(self.company)['sent_quote_count'], 1)
+
+        quote.status = "approved"
+        quote.approved_at = timezone.now()
+        quote.save()
+
+        totals = rollup_totals(self.company)
+        self.assertEqual(totals['sent_quote_count'], 0)
+        self.assertEqual(totals['approved_quote_count'], 1)
+        self.assertEqual(totals['approved_quote_value'], Decimal('1300.00'))
+        self.assertConsistent()
+
+        response = self.client.get('/api/financial-summary/')
+        self.assertEqual(response.data['total_revenue'], 1300.0)
+        self.assertEqual(response.data['this_month_revenue'], 1300.0)
+
+        self.event.delete()
+        self.assertEqual(rollup_totals(self.company)['quote_count'], 0)
+        self.assertConsistent()
+
+    def test_deleting_the_company_leaves_no_rollups(self):
+        FinancialTransaction.objects.create(
+            description="Sinal", amount="500.00", transaction_type="INCOME",
+            transaction_date=date(2024, 5, 10), status="COMPLETED", company=self.company
+        )
+        Quote.objects.create(
+            event=self.event, total_cost="1000.00", profit_margin="30.00", total_price="1300.00",
+            valid_until=date(2024, 7, 1), status="approved", approved_at=timezone.now()
+        )
+        company_id = self.company.pk
+
+        # The cascade deletes the rows and their rollups; post_delete must not recreate buckets
+        self.company.delete()
+        connection.check_constraints()
+        self.assertFalse(MonthlyFinancialRollup.objects.filter(company_id=company_id).exists())
+
+    def test_rebuild_command_repairs_drift(self):
+        FinancialTransaction.objects.create(
+            description="Buffet",
+            amount="800.00",
+            transaction_type="INCOME",
+            transaction_date=date(2024, 5, 10),
+            status="COMPLETED",
+            company=self.company
+        )
+        # queryset.update() bypasses the signals
+        FinancialTransaction.objects.update(amount="900.00")
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_financial_rollups', '--check', stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_financial_rollups', stdout=out)
+        self.assertIn('match the raw data', out.getvalue())
+        self.assertEqual(self.rollup(date(2024, 5, 1)).income, Decimal('900.00'))
+
+    def test_migration_fills_rollups_from_existing_data(self):
+        FinancialTransaction.objects.create(
+            description="Buffet", amount="800.00", transaction_type="INCOME",
+            transaction_date=date(2024, 5, 10), status="COMPLETED", company=self.company
+        )
+        FinancialTransaction.objects.create(
+            description="Bebidas", amount="150.00", transaction_type="EXPENSE",
+            transaction_date=date(2024, 6, 2), status="COMPLETED", company=self.company
+        )
+        Quote.objects.create(
+            event=self.event, total_cost="1000.00", profit_margin="30.00", total_price="1300.00",
+            valid_until=date(2024, 7, 1), status="approved"
+        )
+        # Rows that existed before the rollup table
+        MonthlyFinancialRollup.objects.all().delete()
+
+        migration = importlib.import_module('financials.migrations.0004_monthlyfinancialrollup')
+        migration.fill_rollups(django_apps, None)
+
+        self.assertConsistent()
+        self.assertEqual(self.rollup(date(2024, 5, 1)).income, Decimal('800.00'))
+        self.assertEqual(self.rollup(date(2024, 6, 1)).expense, Decimal('150.00'))
+        self.assertEqual(rollup_totals(self.company)['approved_quote_value'], Decimal('1300.00'))
+
+    def test_dashboard_reads_rollups(self):
+        for month in range(1, 13):
+            FinancialTransaction.objects.create(
+                description="Receita",
+                amount="100.00",
+                transaction_type="INCOME",
+                transaction_date=date(2024, month, 5),
+                status="COMPLETED",
+                company=self.company
+            )
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/financials/financial-dashboard/', {
+                'from': '2024-01-01', 'to': '2024-12-31'
+            })
+
+        self.assertEqual(response.data['kpis']['total_income'], Decimal('1200.00'))
+        self.assertTrue(all(entry['income'] == Decimal('100.00') for entry in response.data['cash_flow_chart']))
+
+
+class UnownedTransactionsTest(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Owner Buffet")
+        self.unowned = FinancialTransaction.objects.create(
+            description="Gás", amount="120.00", transaction_type="EXPENSE",
+            transaction_date=date(2024, 5, 3), status="COMPLETED"
+        )
+
+    def backfill(self):
+        backfill = importlib.import_module('financials.migrations.0003_financialtransaction_company')
+        backfill.assign_company_from_event(django_apps, None)
+        self.unowned.refresh_from_db()
+
+    def test_backfill_assigns_the_only_company(self):
+        self.backfill()
+        self.assertEqual(self.unowned.company, self.company)
+
+    def test_command_assigns_what_the_backfill_cannot_attribute(self):
+        Company.objects.create(name="Other Buffet")
+        self.backfill()
+        self.assertIsNone(self.unowned.company)
+
+        out = StringIO()
+        call_command('assign_unowned_transactions', stdout=out)
+        self.assertIn('1 transactions without a company', out.getvalue())
+
+        call_command('assign_unowned_transactions', f'--company={self.company.pk}', stdout=StringIO())
+        self.unowned.refresh_from_db()
+        self.assertEqual(self.unowned.company, self.company)
+        self.assertEqual(rollup_totals(self.company)['expense'], Decimal('120.00'))
+
+
+class FinancialQueryPlanTest(QueryPlanMixin, TestCase):
+    """The hot financial filters must be served by an index, not a sequential scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.companies = [Company.objects.create(name=f'Plan Buffet {index}') for index in range(3)]
+        cls.company = cls.companies[0]
+        start = date(2026, 1, 1)
+
+        events = Event.objects.bulk_create([
+            Event(
+                company=company,
+                title=f'Evento {index}',
+                event_type='wedding',
+                event_date=start + timedelta(days=index),
+                start_time=time(18, 0),
+                end_time=time(23, 0),
+                client_name='Cliente',
+                client_email='cliente@example.com',
+                client_phone='(11) 88888-8888',
+                guest_count=100
+            )
+            for company in cls.companies
+            for index in range(100)
+        ])
+        quote_statuses = [choice for choice, _ in Quote.STATUS_CHOICES]
+        Quote.objects.bulk_create([
+            Quote(
+                event=event,
+                quote_number=f'QT-{event.pk}',
+                total_cost=Decimal('100.00'),
+                profit_margin=Decimal('30.00'),
+                total_price=Decimal('130.00'),
+                valid_until=event.event_date,
+                status=quote_statuses[index % len(quote_statuses)]
+            )
+            for index, event in enumerate(events)
+        ])
+        FinancialTransaction.objects.bulk_create([
+            FinancialTransaction(
+                company=company,
+                description=f'Lançamento {index}',
+                amount=Decimal('10.00'),
+                transaction_type='INCOME' if index % 2 else 'EXPENSE',
+                transaction_date=start + timedelta(days=index),
+                status='COMPLETED' if index % 3 else 'PENDING'
+            )
+            for company in cls.companies
+            for index in range(300)
+        ])
+        Notification.objects.bulk_create([
+            Notification(
+                company=company,
+                notification_type='general',
+                title=f'Aviso {index}',
+                message='Mensagem',
+                is_read=index % 4 != 0
+            )
+            for company in cls.companies
+            for index in range(100)
+        ])
+        cls.analyze()
+
+    def test_transactions_list(self):
+        self.assertUsesIndex(
+            FinancialTransaction.objects.filter(company=self.company).order_by('-transaction_date', '-id')[:21]
+        )
+
+    def test_transactions_by_date_range(self):
+        self.assertUsesIndex(
+            FinancialTransaction.objects.filter(
+                company=self.company, transaction_date__gte=date(2026, 3, 1), transaction_date__lte=date(2026, 6, 30)
+            )
+        )
+
+    def test_cash_flow_series(self):
+        self.assertUsesIndex(
+            FinancialTransaction.objects.filter(
+                company=self.company,
+                status='COMPLETED',
+                transaction_date__gte=date(2026, 1, 1),
+                transaction_date__lte=date(2026, 12, 31)
+            ).values('transaction_type').annotate(total=Sum('amount')).order_by()
+        )
+
+    def test_expiring_quotes(self):
+        self.assertUsesIndex(
+            Quote.objects.filter(event__company=self.company, status='sent', valid_until__lte=date(2026, 2, 1))
+        )
+
+    def test_unread_and_recent_notifications(self):
+        self.assertUsesIndex(Notification.objects.filter(company=self.company, is_read=False))
+        self.assertUsesIndex(Notification.objects.filter(company=self.company).order_by('-created_at')[:5])
+
+    def test_rollup_months(self):
+        self.assertUsesIndex(
+            MonthlyFinancialRollup.objects.filter(company=self.company, month__gte=date(2026, 1, 1))
+        )
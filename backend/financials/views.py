@@ -1,13 +1,22 @@
 from rest_framework import status, permissions, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db.models import Sum, Q
+from django_filters.rest_framework import DjangoFilterBackend
 from datetime import datetime, timedelta
 import datetime
 from events.models import Event
+from events.conflicts import find_conflicts, CONFLICT_STATUSES
+from django.utils.decorators import method_decorator
+from buffetflow.cache import cached_per_company
+from buffetflow.export import EXPORT_RENDERERS, ExportError, export_response
+from buffetflow.pagination import KeysetPagination
+from . import cash_flow
+from .filters import FinancialTransactionFilter
+from .rollups import rollup_totals
 from .models import FinancialTransaction, CostCalculation, Quote, Notification, AuditLog
 from .serializers import (
     FinancialTransactionSerializer,
@@ -269,10 +278,7 @@ def dashboard_view(request):
     )
     
     # Pending quotes
-    pending_quotes = Quote.objects.filter(
-        event__company=company,
-        status='sent'
-    ).count()
+    pending_quotes = rollup_totals(company)['sent_quote_count']
     
     expiring_quotes = Quote.objects.filter(
         event__company=company,
@@ -291,11 +297,9 @@ def dashboard_view(request):
         company=company
     ).order_by('-created_at')[:5]
     
-    # Conflicts
-    conflicting_events = []
-    for event in Event.objects.filter(company=company, status__in=['confirmed', 'in_progress']):
-        if event.is_conflicting():
-            conflicting_events.append(event.id)
+    # Conflicts between confirmed events, found in a single sweep
+    conflicts = find_conflicts(company, start_date=today, statuses=CONFLICT_STATUSES)
+    conflicting_events = sorted(conflicts.conflicting_ids)
     
     dashboard_data = {
         'upcoming_events': [
@@ -318,6 +322,7 @@ def dashboard_view(request):
             'unread_notifications': unread_notifications,
             'conflicting_events': len(conflicting_events)
         },
+        'conflict_groups': conflicts.groups,
         'recent_notifications': NotificationSerializer(recent_notifications, many=True).data,
         'alerts': {
             'expiring_quotes': expiring_quotes > 0,
@@ -330,6 +335,7 @@ def dashboard_view(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cached_per_company('financial-summary')
 def financial_summary_view(request):
     """
     Financial summary view for frontend Financial page
@@ -339,39 +345,15 @@ def financial_summary_view(request):
 
     company = request.user.company
 
-    # Total quotes
-    total_quotes = Quote.objects.filter(event__company=company).count()
-
-    # Pending quotes (sent but not approved/rejected)
-    pending_quotes = Quote.objects.filter(
-        event__company=company,
-        status='sent'
-    ).count()
+    # Read from the monthly rollups instead of aggregating every quote
+    totals = rollup_totals(company)
+    this_month = rollup_totals(company, start=timezone.localdate())
 
-    # Approved quotes
-    approved_quotes = Quote.objects.filter(
-        event__company=company,
-        status='approved'
-    ).count()
-
-    # Total revenue (from approved quotes)
-    total_revenue = Quote.objects.filter(
-        event__company=company,
-        status='approved'
-    ).aggregate(
-        total=Sum('total_price')
-    )['total'] or 0
-
-    # This month revenue
-    from datetime import datetime
-    this_month_start = datetime.now().replace(day=1)
-    this_month_revenue = Quote.objects.filter(
-        event__company=company,
-        status='approved',
-        approved_at__gte=this_month_start
-    ).aggregate(
-        total=Sum('total_price')
-    )['total'] or 0
+    total_quotes = totals['quote_count']
+    pending_quotes = totals['sent_quote_count']
+    approved_quotes = totals['approved_quote_count']
+    total_revenue = totals['approved_quote_value']
+    this_month_revenue = this_month['approved_quote_value']
 
     # Average order value
     average_order_value = total_revenue / approved_quotes if approved_quotes > 0 else 0
@@ -385,63 +367,78 @@ def financial_summary_view(request):
         'average_order_value': float(average_order_value),
     })
 
+class FinancialTransactionPagination(KeysetPagination):
+    """Most recent transactions first"""
+    ordering = ('-transaction_date', '-id')
+
 class FinancialTransactionViewSet(viewsets.ModelViewSet):
     serializer_class = FinancialTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FinancialTransactionPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = FinancialTransactionFilter
 
     def get_queryset(self):
-        return FinancialTransaction.objects.all()
+        return FinancialTransaction.objects.filter(
+            company=self.request.user.company
+        ).select_related('related_event')
 
-class FinancialDashboardView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+    def perform_create(self, serializer):
+        serializer.save(company=self.request.user.company)
 
-    def get(self, request):
-        # Métricas Principais
-        total_income = FinancialTransaction.objects.filter(
-            transaction_type='INCOME',
-            status='COMPLETED'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
 
-        total_expense = FinancialTransaction.objects.filter(
-            transaction_type='EXPENSE',
-            status='COMPLETED'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        # Footer totals over the whole filtered set, in a single aggregate
+        totals = queryset.aggregate(
+            income=Sum('amount', filter=Q(transaction_type='INCOME', status='COMPLETED')),
+            expense=Sum('amount', filter=Q(transaction_type='EXPENSE', status='COMPLETED')),
+            pending=Sum('amount', filter=Q(transaction_type='INCOME', status='PENDING')),
+        )
 
-        accounts_receivable = FinancialTransaction.objects.filter(
-            transaction_type='INCOME',
-            status='PENDING'
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['totals'] = {key: value or 0 for key, value in totals.items()}
+        return response
 
-        # Dados para o gráfico de fluxo de caixa (últimos 12 meses)
-        cash_flow_data = []
-        today = datetime.date.today()
-        for i in range(12, 0, -1):
-            month_date = today - datetime.timedelta(days=(i * 30))
-            month = month_date.strftime("%Y-%m")
+    @action(detail=False, renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """Stream the transactions matching the list filters as CSV (default) or XLSX (``?format=xlsx``)"""
+        if not request.user.company:
+            return Response({'error': 'No company associated'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return export_response(request, 'transactions')
+        except ExportError as e:
+            return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            income = FinancialTransaction.objects.filter(
-                transaction_type='INCOME',
-                status='COMPLETED',
-                transaction_date__year=month_date.year,
-                transaction_date__month=month_date.month
-            ).aggregate(total=Sum('amount'))['total'] or 0
+class FinancialDashboardView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
 
-            expense = FinancialTransaction.objects.filter(
-                transaction_type='EXPENSE',
-                status='COMPLETED',
-                transaction_date__year=month_date.year,
-                transaction_date__month=month_date.month
-            ).aggregate(total=Sum('amount'))['total'] or 0
+    @method_decorator(cached_per_company('financial-dashboard'))
+    def get(self, request):
+        company = request.user.company
+        try:
+            start, end, granularity = cash_flow.parse_params(request.GET, datetime.date.today())
+            cash_flow_data = cash_flow.company_cash_flow_series(company, start, end, granularity)
+        except cash_flow.CashFlowParamsError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            cash_flow_data.append({"month": month, "income": income, "expense": expense})
+        # Métricas Principais (somadas a partir dos rollups mensais)
+        totals = rollup_totals(company)
+        total_income = totals['income']
+        total_expense = totals['expense']
 
         response_data = {
             "kpis": {
                 "total_income": total_income,
                 "total_expense": total_expense,
                 "net_profit": total_income - total_expense,
-                "accounts_receivable": accounts_receivable,
+                "accounts_receivable": totals['receivable'],
             },
             "cash_flow_chart": cash_flow_data,
+            "granularity": granularity,
+            "from": start,
+            "to": end,
         }
         return Response(response_data)
@@ -0,0 +1,180 @@
+"""
+Database-specific full-text search over SearchDocument.
+
+* SQLite: an FTS5 table (``search_fts``) mirrors the documents through
+  triggers and is ranked with bm25. Typo tolerance comes from expanding each
+  query word with close terms from the FTS vocabulary (``search_fts_vocab``).
+* PostgreSQL: a GIN index on ``to_tsvector(content)`` for ranked word
+  matches, plus a trigram GIN index for typo-tolerant word similarity.
+* Anything else falls back to ``icontains``.
+
+Every backend returns ``(kind, object_id, title, subtitle, score)`` tuples,
+best match first, already limited to one company. Filters on the matches
+(list ``?search=``, exports) use ``matches`` instead: every matching
+document as an unranked queryset, with no limit, to use as a subquery.
+"""
+import difflib
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import SearchDocument
+
+SEARCH_CONFIG = 'portuguese'
+MIN_FUZZY_LENGTH = 4
+FUZZY_CUTOFF = 0.75
+MAX_FUZZY_TERMS = 3
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    """Lowercase without diacritics, as the FTS5 unicode61 tokenizer stores terms"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def query_words(query):
+    return WORD_RE.findall(normalize(query))
+
+
+class SQLiteSearchBackend:
+    def close_terms(self, cursor, word):
+        """Indexed terms that look like ``word`` (same first letter, difflib ratio >= cutoff)"""
+        if len(word) < MIN_FUZZY_LENGTH:
+            return []
+        cursor.execute(
+            'SELECT term FROM search_fts_vocab WHERE term >= %s AND term < %s',
+            [word[0], chr(ord(word[0]) + 1)],
+        )
+        candidates = [row[0] for row in cursor.fetchall()]
+        return difflib.get_close_matches(word, candidates, n=MAX_FUZZY_TERMS, cutoff=FUZZY_CUTOFF)
+
+    def match_expression(self, cursor, words):
+        """Every word must match, as a prefix or as one of its close terms"""
+        clauses = []
+        for word in words:
+            alternatives = [f'"{word}"*'] + [f'"{term}"' for term in self.close_terms(cursor, word) if term != word]
+            clauses.append('(' + ' OR '.join(alternatives) + ')')
+        return ' AND '.join(clauses)
+
+    def matches(self, company_id, query, kinds):
+        words = query_words(query)
+        if not words:
+            return SearchDocument.objects.none()
+
+        with connection.cursor() as cursor:
+            expression = self.match_expression(cursor, words)
+        return SearchDocument.objects.filter(
+            company_id=company_id, kind__in=kinds,
+            id__in=RawSQL('SELECT rowid FROM search_fts WHERE search_fts MATCH %s', [expression]),
+        )
+
+    def search(self, company_id, query, kinds, limit):
+        words = query_words(query)
+        if not words:
+            return []
+
+        with connection.cursor() as cursor:
+            kind_placeholders = ', '.join(['%s'] * len(kinds))
+            cursor.execute(
+                f"""
+                SELECT d.kind, d.object_id, d.title, d.subtitle, -bm25(search_fts, 10.0, 1.0) AS score
+                FROM search_fts
+                JOIN search_searchdocument d ON d.id = search_fts.rowid
+                WHERE search_fts MATCH %s AND d.company_id = %s AND d.kind IN ({kind_placeholders})
+                ORDER BY score DESC, d.id
+                LIMIT %s
+                """,
+                [self.match_expression(cursor, words), company_id, *kinds, limit],
+            )
+            return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    def search_query(self, query):
+        from django.contrib.postgres.search import SearchQuery
+
+        return SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+
+    def matches(self, company_id, query, kinds):
+        from django.contrib.postgres.search import SearchVector
+        from django.db.models import Q
+
+        if not query_words(query):
+            return SearchDocument.objects.none()
+
+        # Same expression as the GIN index built by the migration
+        return SearchDocument.objects.filter(company_id=company_id, kind__in=kinds).annotate(
+            vector=SearchVector('content', config=SEARCH_CONFIG),
+        ).filter(
+            Q(vector=self.search_query(query)) | Q(content__trigram_word_similar=query)
+        )
+
+    def search(self, company_id, query, kinds, limit):
+        from django.contrib.postgres.search import SearchRank, TrigramWordSimilarity
+        from django.db.models import F
+
+        if not query_words(query):
+            return []
+
+        documents = self.matches(company_id, query, kinds).annotate(
+            rank=SearchRank(F('vector'), self.search_query(query)),
+            similarity=TrigramWordSimilarity(query, 'content'),
+        ).order_by('-rank', '-similarity', 'id')
+
+        return [
+            (kind, object_id, title, subtitle, rank + similarity)
+            for kind, object_id, title, subtitle, rank, similarity in documents.values_list(
+                'kind', 'object_id', 'title', 'subtitle', 'rank', 'similarity'
+            )[:limit]
+        ]
+
+
+class ContainsSearchBackend:
+    def matches(self, company_id, query, kinds):
+        words = query.split()
+        if not words:
+            return SearchDocument.objects.none()
+
+        documents = SearchDocument.objects.filter(company_id=company_id, kind__in=kinds)
+        for word in words:
+            documents = documents.filter(content__icontains=word)
+        return documents
+
+    def search(self, company_id, query, kinds, limit):
+        if not query.split():
+            return []
+
+        documents = self.matches(company_id, query, kinds)
+        return [
+            (kind, object_id, title, subtitle, 1.0)
+            for kind, object_id, title, subtitle in documents.order_by('-updated_at').values_list(
+                'kind', 'object_id', 'title', 'subtitle'
+            )[:limit]
+        ]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, ContainsSearchBackend)()
+
+
+def search_documents(company_id, query, kinds=('event', 'client'), limit=20):
+    """Ranked matches of ``query`` among the documents of a company"""
+    return get_backend().search(company_id, query, list(kinds), limit)
+
+
+def matching_object_ids(company_id, query, kind):
+    """
+    Ids of every object of one kind matching ``query``, unranked and with no
+    limit, as a subquery for ``pk__in`` filters
+    """
+    return get_backend().matches(company_id, query, [kind]).values('object_id')
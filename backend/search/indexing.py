@@ -0,0 +1,128 @@
+"""
+Keeps SearchDocument rows in sync with the indexed models.
+
+Every save of an Event or Client upserts its document and every delete
+removes it; the database-level full-text index follows the document table
+(triggers on SQLite, GIN indexes on PostgreSQL). ``rebuild_index``
+regenerates the documents in bulk, e.g. after bulk imports that bypass
+signals.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from clients.models import Client
+from events.models import Event
+from .models import SearchDocument
+
+BATCH_SIZE = 500
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+def event_document(event):
+    return {
+        'title': event.title,
+        'subtitle': _join(event.client_name, event.event_date.strftime('%d/%m/%Y') if event.event_date else ''),
+        'content': _join(
+            event.title, event.client_name, event.client_email, event.description, event.venue_location,
+        ),
+    }
+
+
+def client_display_name(client):
+    # Same rule as Client.__str__, usable on historical models in migrations
+    if client.client_type == 'FISICA' and client.full_name:
+        return client.full_name
+    if client.client_type == 'JURIDICA' and client.fantasy_name:
+        return client.fantasy_name
+    return client.name
+
+
+def client_document(client):
+    return {
+        'title': client_display_name(client),
+        'subtitle': client.email,
+        'content': _join(
+            client.name, client.full_name, client.fantasy_name, client.corporate_name,
+            client.email, client.phone, client.cpf, client.cnpj,
+        ),
+    }
+
+
+# model -> (document kind, document builder)
+INDEXED_MODELS = {
+    Event: ('event', event_document),
+    Client: ('client', client_document),
+}
+
+
+def index_object(instance):
+    kind, build = INDEXED_MODELS[type(instance)]
+    SearchDocument.objects.update_or_create(
+        kind=kind,
+        object_id=instance.pk,
+        defaults={'company_id': instance.company_id, **build(instance)},
+    )
+
+
+def index_new_objects(instances):
+    """Create the documents of freshly bulk-created objects (which sent no signals)"""
+    documents = []
+    for instance in instances:
+        kind, build = INDEXED_MODELS[type(instance)]
+        documents.append(SearchDocument(
+            company_id=instance.company_id, kind=kind, object_id=instance.pk, **build(instance)
+        ))
+    SearchDocument.objects.bulk_create(documents, batch_size=BATCH_SIZE)
+    return len(documents)
+
+
+def unindex_object(instance):
+    kind, _ = INDEXED_MODELS[type(instance)]
+    SearchDocument.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def _saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+def _deleted(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+def connect_signals():
+    for model in INDEXED_MODELS:
+        uid = f'search:{model._meta.label}'
+        post_save.connect(_saved, sender=model, dispatch_uid=f'{uid}:save')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'{uid}:delete')
+
+
+def rebuild_index(company=None):
+    """Regenerate every search document (of one company); returns the document count"""
+    documents = SearchDocument.objects.all()
+    if company is not None:
+        documents = documents.filter(company=company)
+
+    count = 0
+    with transaction.atomic():
+        documents.delete()
+        for model, (kind, build) in INDEXED_MODELS.items():
+            objects = model.objects.all()
+            if company is not None:
+                objects = objects.filter(company=company)
+
+            batch = []
+            for instance in objects.iterator(chunk_size=BATCH_SIZE):
+                batch.append(SearchDocument(
+                    company_id=instance.company_id, kind=kind, object_id=instance.pk, **build(instance)
+                ))
+                if len(batch) >= BATCH_SIZE:
+                    SearchDocument.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            count += len(batch)
+    return count
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import Company
+from search.indexing import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the search documents of events and clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Only rebuild the documents of this company id')
+
+    def handle(self, *args, **options):
+        company = None
+        if options['company']:
+            try:
+                company = Company.objects.get(pk=options['company'])
+            except Company.DoesNotExist:
+                raise CommandError(f"Company {options['company']} not found")
+
+        count = rebuild_index(company)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} search documents'))
@@ -0,0 +1,100 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE search_fts USING fts5(
+        title, content,
+        content='search_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    "CREATE VIRTUAL TABLE search_fts_vocab USING fts5vocab(search_fts, 'row')",
+    """
+    CREATE TRIGGER search_fts_insert AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO search_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER search_fts_delete AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO search_fts(search_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER search_fts_update AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO search_fts(search_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO search_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS search_fts_update',
+    'DROP TRIGGER IF EXISTS search_fts_delete',
+    'DROP TRIGGER IF EXISTS search_fts_insert',
+    'DROP TABLE IF EXISTS search_fts_vocab',
+    'DROP TABLE IF EXISTS search_fts',
+]
+
+
+def postgres_indexes():
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    from django.contrib.postgres.search import SearchVector
+
+    from search.backends import SEARCH_CONFIG
+
+    return [
+        GinIndex(SearchVector('content', config=SEARCH_CONFIG), name='search_doc_content_fts_idx'),
+        GinIndex(OpClass('content', name='gin_trgm_ops'), name='search_doc_content_trgm_idx'),
+    ]
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        SearchDocument = apps.get_model('search', 'SearchDocument')
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for index in postgres_indexes():
+            schema_editor.add_index(SearchDocument, index)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        SearchDocument = apps.get_model('search', 'SearchDocument')
+        for index in postgres_indexes():
+            schema_editor.remove_index(SearchDocument, index)
+
+
+def index_existing_objects(apps, schema_editor):
+    from search.indexing import client_document, event_document
+
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    for model_name, kind, build in (('events.Event', 'event', event_document), ('clients.Client', 'client', client_document)):
+        model = apps.get_model(model_name)
+        SearchDocument.objects.bulk_create(
+            (
+                SearchDocument(company_id=instance.company_id, kind=kind, object_id=instance.pk, **build(instance))
+                for instance in model.objects.iterator(chunk_size=500)
+            ),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('events', '0006_event_menu_totals'),
+        ('clients', '0002_client_address_client_client_type_client_cnpj_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_objects, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized searchable text of one event or client.
+
+    The database-specific full-text index (FTS5 table on SQLite, tsvector and
+    trigram GIN indexes on PostgreSQL) is built on ``content`` by the
+    migrations; see search.backends.
+    """
+    KIND_CHOICES = [
+        ('event', 'Evento'),
+        ('client', 'Cliente'),
+    ]
+
+    company = models.ForeignKey('users.Company', on_delete=models.CASCADE, related_name='search_documents')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+
+    title = models.CharField(max_length=300)
+    subtitle = models.CharField(max_length=300, blank=True)
+    content = models.TextField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        indexes = [
+            models.Index(fields=['company', 'kind'], name='search_doc_company_kind_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
@@ -0,0 +1,122 @@
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from clients.models import Client
+from events.filters import filter_events
+from events.models import Event
+from users.models import Company
+from .backends import matching_object_ids
+from .indexing import rebuild_index
+from .models import SearchDocument
+
+User = get_user_model()
+
+
+class SearchEndpointTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name='Search Buffet',
+            email='search@buffet.com',
+            phone='(11) 99999-9999'
+        )
+        self.user = User.objects.create_user(
+            username='searchuser',
+            email='search@example.com',
+            password='testpass123',
+            company=self.company
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.maria = Client.objects.create(
+            name='Maria Conceição', email='maria@example.com', phone='(11) 91111-1111', company=self.company
+        )
+        self.joao = Client.objects.create(
+            name='João Pereira', email='joao@example.com', phone='(11) 92222-2222', company=self.company
+        )
+        self.wedding = self.create_event('Casamento Maria e Pedro', 'Maria Conceição', date(2026, 5, 10))
+        self.graduation = self.create_event('Formatura Medicina', 'João Pereira', date(2026, 6, 20))
+
+    def create_event(self, title, client_name, event_date, company=None):
+        return Event.objects.create(
+            company=company or self.company,
+            created_by=self.user,
+            title=title,
+            event_type='wedding',
+            event_date=event_date,
+            start_time=time(18, 0),
+            end_time=time(23, 0),
+            client_name=client_name,
+            client_email='cliente@example.com',
+            client_phone='(11) 88888-8888',
+            guest_count=100,
+            description='Festa no salão principal'
+        )
+
+    def search(self, query, **params):
+        response = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['type'], row['id']) for row in response.data['results']]
+
+    def test_ranks_events_and_clients_ignoring_accents(self):
+        results = self.search('conceicao')
+        self.assertEqual(set(results), {('client', self.maria.id), ('event', self.wedding.id)})
+
+        self.assertEqual(self.search('maria', type='event'), [('event', self.wedding.id)])
+
+    def test_matches_prefixes_and_typos(self):
+        self.assertEqual(self.search('medic'), [('event', self.graduation.id)])
+        self.assertEqual(self.search('formatra'), [('event', self.graduation.id)])
+        self.assertEqual(self.search('casamneto'), [('event', self.wedding.id)])
+
+    def test_index_follows_saves_and_deletes_and_is_scoped_per_company(self):
+        self.wedding.title = 'Bodas de Prata'
+        self.wedding.save()
+        self.assertEqual(self.search('bodas'), [('event', self.wedding.id)])
+        self.assertEqual(self.search('casamento'), [])
+
+        self.graduation.delete()
+        self.assertEqual(self.search('formatura'), [])
+
+        other_company = Company.objects.create(name='Outro', email='outro@buffet.com', phone='(11) 7777-7777')
+        self.create_event('Bodas de Ouro', 'Outra Cliente', date(2026, 7, 1), company=other_company)
+        self.assertEqual(self.search('bodas'), [('event', self.wedding.id)])
+
+    def test_events_and_clients_lists_use_the_index(self):
+        response = self.client.get('/api/events/', {'search': 'formatra'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.graduation.id])
+
+        response = self.client.get('/api/clients/', {'search': 'pereira'})
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([row['id'] for row in rows], [self.joao.id])
+
+    def test_list_search_returns_every_match(self):
+        Event.objects.bulk_create([
+            Event(
+                company=self.company, created_by=self.user, title=f'Aniversário {number}', event_type='birthday',
+                event_date=date(2030, 1, 1) + timedelta(days=number), start_time=time(12, 0), end_time=time(16, 0),
+                client_name='Cliente', client_email='cliente@example.com', client_phone='(11) 88888-8888',
+                guest_count=50,
+            )
+            for number in range(1005)
+        ])
+        rebuild_index(self.company)
+
+        self.assertEqual(matching_object_ids(self.company.pk, 'aniversario', 'event').count(), 1005)
+        events = filter_events(Event.objects.filter(company=self.company), {'search': 'aniversario'}, self.company.pk)
+        self.assertEqual(events.count(), 1005)
+
+    def test_rebuild_index(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.search('medicina'), [])
+
+        self.assertEqual(rebuild_index(self.company), 4)
+        self.assertEqual(self.search('medicina'), [('event', self.graduation.id)])
+
+    def test_requires_query(self):
+        response = self.client.get('/api/search/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
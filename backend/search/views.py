@@ -0,0 +1,42 @@
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from .backends import search_documents
+from .models import SearchDocument
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def search_view(request):
+    """Ranked, typo-tolerant search across the company's events and clients"""
+    if not request.user.company_id:
+        return Response({'error': 'No company associated'}, status=status.HTTP_400_BAD_REQUEST)
+
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return Response({'q': ['Este parâmetro é obrigatório.']}, status=status.HTTP_400_BAD_REQUEST)
+
+    kinds = [kind for kind, _ in SearchDocument.KIND_CHOICES]
+    kind = request.GET.get('type')
+    if kind:
+        if kind not in kinds:
+            return Response({'type': [f'Tipo inválido: {kind}']}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind]
+
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    results = search_documents(request.user.company_id, query, kinds, limit)
+    return Response({
+        'query': query,
+        'results': [
+            {'type': kind, 'id': object_id, 'title': title, 'subtitle': subtitle, 'score': round(score, 4)}
+            for kind, object_id, title, subtitle, score in results
+        ],
+    })
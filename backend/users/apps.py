@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from buffetflow.cache import reset_version_on_create
+        from .models import Company
+
+        reset_version_on_create(Company)
@@ -242,22 +242,12 @@ function OverviewTab() {
       setIsLoading(true)
       setError(null)
       try {
-        const [
-          statsRes,
-          upcomingEventsRes,
-          statusDistributionRes,
-          monthlyRevenueRes
-        ] = await Promise.all([
-          dashboardAPI.getStats(),
-          dashboardAPI.getUpcomingEvents(),
-          dashboardAPI.getEventStatusDistribution(),
-          dashboardAPI.getMonthlyRevenueChart(),
-        ])
-
-        setStats(statsRes.data)
-        setUpcomingEvents(upcomingEventsRes.data)
-        setStatusDistribution(statusDistributionRes.data)
-        setMonthlyRevenue(monthlyRevenueRes.data)
+        const { data } = await dashboardAPI.getSummary()
+
+        setStats(data.stats)
+        setUpcomingEvents(data.upcoming_events)
+        setStatusDistribution(data.event_status_distribution)
+        setMonthlyRevenue(data.monthly_revenue_chart)
 
       } catch (err) {
         setError("Falha ao carregar os dados do dashboard. Tente novamente mais tarde.")
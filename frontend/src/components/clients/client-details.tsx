@@ -52,7 +52,7 @@ export function ClientDetails({ clientId, onBack, onEdit }: ClientDetailsProps)
       setIsLoading(true)
       const [clientResponse, eventsResponse] = await Promise.all([
         clientsAPI.get(clientId),
-        eventsAPI.list()
+        eventsAPI.listAll()
       ])
 
       setClient(clientResponse.data)
@@ -42,7 +42,7 @@ export function CustomEventsTable({
     try {
       setIsLoading(true)
       setError(null)
-      const response = await eventsAPI.list()
+      const response = await eventsAPI.listAll()
       setData(response.data || [])
     } catch (error) {
       console.error('Erro ao carregar eventos:', error)
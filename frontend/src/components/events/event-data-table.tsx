@@ -72,7 +72,7 @@ export function EventDataTable({
     try {
       setIsLoading(true)
       setError(null)
-      const response = await eventsAPI.list()
+      const response = await eventsAPI.listAll()
       setData(response.data || [])
     } catch (error) {
       console.error('Erro ao carregar eventos:', error)
@@ -50,7 +50,7 @@ export function EventsList({ companyId, onEventSelect, onCreateNew, viewMode, on
   const loadEvents = useCallback(async () => {
     try {
       setIsLoading(true)
-      const response = await eventsAPI.list()
+      const response = await eventsAPI.listAll()
       setEvents(response.data || [])
     } catch (error) {
       console.error('Erro ao carregar eventos:', error)
@@ -56,7 +56,7 @@ export function SimpleEventsTable({ companyId, onEventSelect, onCreateNew, viewM
   const loadEvents = useCallback(async () => {
     try {
       setIsLoading(true)
-      const response = await eventsAPI.list()
+      const response = await eventsAPI.listAll()
       setEvents(response.data || [])
     } catch (error) {
       console.error('Erro ao carregar eventos:', error)
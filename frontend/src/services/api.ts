@@ -60,8 +60,21 @@ export const authAPI = {
 };
 
 export const eventsAPI = {
-  list: () =>
-    api.get('/events/'),
+  // Keyset-paginated: returns { next, results }; pass `cursor` to fetch the next page
+  list: (params?: { cursor?: string; page_size?: number; fields?: string; [key: string]: any }) =>
+    api.get('/events/', { params }),
+
+  // Follows the `next` cursors and returns every event in a single array
+  listAll: async (params?: { [key: string]: any }) => {
+    const events: any[] = []
+    let response = await api.get('/events/', { params: { page_size: 100, ...params } })
+    events.push(...response.data.results)
+    while (response.data.next) {
+      response = await api.get(response.data.next)
+      events.push(...response.data.results)
+    }
+    return { ...response, data: events }
+  },
 
   create: (eventData: any) =>
     api.post('/events/', eventData),
@@ -83,20 +96,60 @@ export const eventsAPI = {
       },
     }),
 
+  calendarFeed: () =>
+    api.get('/events/calendar-feed/'),
+
+  rotateCalendarFeed: () =>
+    api.post('/events/calendar-feed/'),
+
   calculateCost: (eventId: string, data: { guests: number; items: { menu_item_id: number; quantity: number }[] }) =>
     api.post(`/events/${eventId}/calculate-cost/`, data),
 
+  calculateCostBatch: (data: {
+    menus?: { label?: string; items: { menu_item_id: number; quantity?: number }[] }[];
+    guest_counts?: number[];
+    margins?: number[];
+    event_ids?: number[];
+  }) => api.post('/events/calculate-cost/batch/', data),
+
   generateProposalPDF: (eventId: string) =>
     api.get(`/events/${eventId}/generate-proposal-pdf/`, {
       responseType: 'blob',
     }),
 
+  exportProposals: (params?: { start_date?: string; end_date?: string; status?: string }) =>
+    api.get('/events/proposals/export/', {
+      params,
+      responseType: 'blob',
+    }),
+
+  // Same filters as list; format: 'csv' (default) or 'xlsx'
+  exportEvents: (params?: { format?: 'csv' | 'xlsx'; start_date?: string; end_date?: string; status?: string; event_type?: string; search?: string }) =>
+    api.get('/events/export/', {
+      params,
+      responseType: 'blob',
+    }),
+
+  createProposalPDFJob: (eventId: string) =>
+    api.post(`/events/${eventId}/proposal-pdf-jobs/`),
+
+  getProposalPDFJob: (jobId: number) =>
+    api.get(`/events/proposal-pdf-jobs/${jobId}/`),
+
+  downloadProposalPDFJob: (jobId: number) =>
+    api.get(`/events/proposal-pdf-jobs/${jobId}/download/`, {
+      responseType: 'blob',
+    }),
+
   getEventMenuItems: (eventId: string) =>
     api.get(`/events/${eventId}/menu-items/`),
 
   addEventMenuItem: (eventId: string, data: { menu_item: number; quantity: number }) =>
     api.post(`/events/${eventId}/menu-items/`, data),
 
+  replaceEventMenuItems: (eventId: string, items: { menu_item: number; quantity: number }[]) =>
+    api.put(`/events/${eventId}/menu-items/`, { items }),
+
   removeEventMenuItem: (eventId: string, menuItemId: number) =>
     api.delete(`/events/${eventId}/menu/${menuItemId}/`),
 };
@@ -132,6 +185,19 @@ export const companiesAPI = {
 
   deletePaymentMethod: (id: number) =>
     api.delete(`/companies/payment-methods/${id}/`),
+
+  // CSV import of clients or events: 201 when imported right away, 202 when queued (poll getImport)
+  importCSV: (kind: 'clients' | 'events', file: File) => {
+    const data = new FormData();
+    data.append('kind', kind);
+    data.append('file', file);
+    return api.post('/companies/imports/', data, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
+
+  getImport: (id: number) =>
+    api.get(`/companies/imports/${id}/`),
 };
 
 export const usersAPI = {
@@ -180,8 +246,9 @@ export const financialsAPI = {
 
   // Financial Transactions
   transactions: {
-    list: () =>
-      api.get('/financials/transactions/'),
+    // Keyset-paginated: returns { next, results, totals }
+    list: (params?: { cursor?: string; page_size?: number; start_date?: string; end_date?: string; type?: string; status?: string; event?: number }) =>
+      api.get('/financials/transactions/', { params }),
 
     create: (transactionData: any) =>
       api.post('/financials/transactions/', transactionData),
@@ -197,6 +264,9 @@ export const financialsAPI = {
 
     delete: (id: string) =>
       api.delete(`/financials/transactions/${id}/`),
+
+    export: (params?: { format?: 'csv' | 'xlsx'; start_date?: string; end_date?: string; type?: string; status?: string; event?: number }) =>
+      api.get('/financials/transactions/export/', { params, responseType: 'blob' }),
   },
 };
 
@@ -206,6 +276,9 @@ export const clientsAPI = {
     return api.get('/clients/', { params });
   },
 
+  export: (params?: { format?: 'csv' | 'xlsx'; search?: string }) =>
+    api.get('/clients/export/', { params, responseType: 'blob' }),
+
   create: (clientData: any) =>
     api.post('/clients/', clientData),
 
@@ -220,6 +293,10 @@ export const clientsAPI = {
 };
 
 export const dashboardAPI = {
+  // Stats, upcoming events, status distribution and revenue chart in one request
+  getSummary: () =>
+    api.get('/dashboard/summary/'),
+
   getStats: () => 
     api.get('/dashboard/stats/'),
   
@@ -233,4 +310,10 @@ export const dashboardAPI = {
     api.get('/dashboard/monthly_revenue_chart/'),
 };
 
+export const searchAPI = {
+  // Ranked, typo-tolerant search across events and clients
+  search: (q: string, params?: { type?: 'event' | 'client'; limit?: number }) =>
+    api.get('/search/', { params: { q, ...params } }),
+};
+
 export default api;
\ No newline at end of file